@@ -0,0 +1,10 @@
+"""Scripts de benchmark da API (não fazem parte do deploy)."""
+import os
+
+
+def setup_django():
+    """Inicializa o Django para os scripts rodados com `python -m benchmarks.<nome>`."""
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'social_api.settings')
+    django.setup()
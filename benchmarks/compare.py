@@ -0,0 +1,73 @@
+"""
+Compara dois resultados de `benchmarks.run` e aponta regressões:
+
+    python -m benchmarks.compare benchmarks/results/abc123.json benchmarks/results/def456.json
+
+Sai com código 1 se algum cenário piorar além de `--threshold` no p99 ou
+passar a fazer mais queries por requisição.
+"""
+import argparse
+import json
+import sys
+
+
+def change(old, new):
+    if old in (None, 0) or new is None:
+        return None
+    return (new - old) / old * 100
+
+
+def compare(old, new, threshold):
+    rows = []
+    regressions = []
+    for name, current in new['results'].items():
+        previous = old['results'].get(name)
+        if previous is None:
+            rows.append((name, None, None, None, 'novo'))
+            continue
+
+        p99 = change(previous['p99_ms'], current['p99_ms'])
+        rps = change(previous['rps'], current['rps'])
+        queries = None
+        if previous.get('queries_avg') is not None and current.get('queries_avg') is not None:
+            queries = current['queries_avg'] - previous['queries_avg']
+
+        flags = []
+        if p99 is not None and p99 > threshold:
+            flags.append('p99')
+        if queries is not None and queries > 0:
+            flags.append('queries')
+        if flags:
+            regressions.append(name)
+        rows.append((name, p99, rps, queries, ', '.join(flags)))
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compara dois resultados de benchmark.")
+    parser.add_argument('old')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=10.0, help="Piora tolerada no p99, em %%")
+    args = parser.parse_args(argv)
+
+    with open(args.old) as old_file, open(args.new) as new_file:
+        old, new = json.load(old_file), json.load(new_file)
+
+    rows, regressions = compare(old, new, args.threshold)
+
+    def pct(value):
+        return '-' if value is None else f'{value:+.1f}%'
+
+    print(f"{old['meta']['commit']} -> {new['meta']['commit']}")
+    print(f"{'cenário':<40} {'p99':>9} {'req/s':>9} {'queries':>8}  regressão")
+    for name, p99, rps, queries, flags in rows:
+        delta = '-' if queries is None else f'{queries:+.1f}'
+        print(f"{name:<40} {pct(p99):>9} {pct(rps):>9} {delta:>8}  {flags}")
+
+    if regressions:
+        print(f"\n{len(regressions)} cenário(s) com regressão.")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
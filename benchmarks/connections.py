@@ -0,0 +1,161 @@
+"""
+Custo de abrir conexões com o banco sob carga concorrente.
+
+Cria um banco de teste (no SQLite, um arquivo de verdade, para que cada
+conexão abra o arquivo e aplique os PRAGMAs) e dispara `--requests`
+requisições `GET /api/follows/following/` autenticadas (uma query cada) a partir de `--threads`
+threads, passando pelo WSGIHandler como um servidor faria, com os sinais de
+início e fim de requisição que abrem e fecham as conexões. Compara uma
+conexão por requisição (CONN_MAX_AGE=0), conexões persistentes e, no Postgres
+com psycopg 3 (DATABASE_URL definido), o pool nativo do Django:
+
+    python -m benchmarks.connections --threads 16 --requests 4000
+"""
+import argparse
+import itertools
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import setup_django
+from benchmarks.stats import HEADER, format_row, summarize
+
+
+def pool_available():
+    try:
+        import psycopg  # noqa: F401
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def scenarios(vendor, threads):
+    yield 'conexão por requisição', {'CONN_MAX_AGE': 0}
+    yield 'conexão persistente', {'CONN_MAX_AGE': 600}
+    if vendor == 'postgresql' and pool_available():
+        yield 'pool', {'CONN_MAX_AGE': 0, 'pool': {'min_size': threads, 'max_size': threads}}
+
+
+def configure(options):
+    """Troca a configuração do `default` para as conexões abertas daqui em diante."""
+    from django.db import connections
+
+    database = connections.settings['default']
+    if hasattr(connections['default'], 'close_pool'):
+        connections['default'].close_pool()
+    database['CONN_MAX_AGE'] = options['CONN_MAX_AGE']
+    database['OPTIONS'].pop('pool', None)
+    if 'pool' in options:
+        database['OPTIONS']['pool'] = options['pool']
+
+
+def connect_cost(samples):
+    """Tempo médio (ms) para abrir e fechar uma conexão, com os PRAGMAs no SQLite."""
+    from django.db import connections
+
+    connection = connections.create_connection('default')
+    started = time.perf_counter()
+    for _ in range(samples):
+        connection.ensure_connection()
+        connection.close()
+    return (time.perf_counter() - started) / samples * 1000
+
+
+def run_scenario(handler, environ_for, threads, requests):
+    from django.db import connections
+
+    tickets = itertools.count()
+
+    def worker():
+        latencies = []
+        try:
+            while next(tickets) < requests:
+                started = time.perf_counter()
+                status = []
+                response = handler(environ_for(), lambda s, headers: status.append(s))
+                b''.join(response)
+                response.close()
+                latencies.append(time.perf_counter() - started)
+                assert status[0].startswith('200'), status
+        finally:
+            connections.close_all()
+        return latencies
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        futures = [pool.submit(worker) for _ in range(threads)]
+        latencies = [latency for future in futures for latency in future.result()]
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def run(args):
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.db import connection
+    from django.db.backends.signals import connection_created
+    from django.test import RequestFactory
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from users.models import User
+
+    user = User.objects.create(username='conn-autor', email='conn-autor@example.com')
+    token = f'Bearer {AccessToken.for_user(user)}'
+    factory = RequestFactory()
+
+    def environ_for():
+        return factory.get('/api/follows/following/', secure=True, HTTP_AUTHORIZATION=token).environ
+
+    connects = itertools.count()
+    lock = threading.Lock()
+
+    def count_connect(sender, **kwargs):
+        with lock:
+            next(connects)
+
+    connection_created.connect(count_connect, weak=False)
+    handler = WSGIHandler()
+    vendor = connection.vendor
+
+    print(f"{vendor}: abrir uma conexão leva {connect_cost(200):.2f} ms em média")
+    print(HEADER + f" {'conexões':>9}")
+    for label, options in scenarios(vendor, args.threads):
+        configure(options)
+        # Aquece caches e o pool antes de medir
+        run_scenario(handler, environ_for, args.threads, args.threads * 10)
+        before = next(connects)
+        summary = run_scenario(handler, environ_for, args.threads, args.requests)
+        opened = next(connects) - before - 1
+        print(format_row(label, summary) + f" {opened:>9}")
+    configure({'CONN_MAX_AGE': 0})
+    if vendor != 'postgresql' or not pool_available():
+        print("\n(pool: só no Postgres com psycopg[pool]; defina DATABASE_URL para compará-lo)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do custo de abrir conexões com o banco.")
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=4000, help="Requisições medidas por cenário")
+    args = parser.parse_args(argv)
+
+    setup_django()
+    logging.disable(logging.WARNING)
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    with tempfile.TemporaryDirectory() as directory:
+        if connection.vendor == 'sqlite':
+            # O banco de teste padrão do SQLite fica em memória, sem abrir arquivo
+            connection.settings_dict['TEST']['NAME'] = os.path.join(directory, 'connections.sqlite3')
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            run(args)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""
+Gerador de dados sintéticos para os benchmarks.
+
+O grafo de follows segue uma lei de potência: poucos usuários concentram a
+maior parte dos seguidores (escolhidos com peso 1/rank^alpha) e o número de
+usuários seguidos por pessoa vem de uma distribuição de Pareto. Likes e
+comentários por post são exponenciais em torno da média pedida.
+
+Grava no banco configurado:
+
+    python -m benchmarks.datagen --users 2000 --posts-per-user 20
+"""
+import argparse
+import random
+import sys
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+
+PASSWORD = 'bench-password'
+USERNAME_PREFIX = 'bench'
+ADMIN_USERNAME = 'bench_admin'
+BATCH_SIZE = 1000
+
+DEFAULTS = {
+    'users': 300,
+    'avg_following': 20,
+    'follow_alpha': 1.1,
+    'posts_per_user': 10,
+    'likes_per_post': 5,
+    'comments_per_post': 2,
+    'seed': 42,
+}
+
+
+def _pick_distinct(rng, population, cum_weights, k, exclude):
+    """Sorteia até `k` itens distintos de `population` segundo os pesos."""
+    chosen = set()
+    attempts = 0
+    while len(chosen) < k and attempts < 10:
+        for item in rng.choices(population, cum_weights=cum_weights, k=k - len(chosen)):
+            if item != exclude:
+                chosen.add(item)
+        attempts += 1
+    return chosen
+
+
+def _following_count(rng, avg_following, max_following):
+    # Pareto com shape 2 tem média 2 * escala
+    return min(max_following, int(rng.paretovariate(2) * avg_following / 2))
+
+
+def _exponential(rng, mean, limit):
+    if mean <= 0:
+        return 0
+    return min(limit, int(rng.expovariate(1 / mean)))
+
+
+def generate(*, users, avg_following, follow_alpha, posts_per_user, likes_per_post,
+             comments_per_post, seed, stdout=sys.stdout):
+    """Cria usuários, follows, posts, likes e comentários e acerta contadores e timelines."""
+    from follows.models import Follow
+    from posts.models import Comment, Like, Post
+    from users.models import User
+
+    rng = random.Random(seed)
+    password = make_password(PASSWORD)
+
+    User.objects.bulk_create([
+        User(username=f'{USERNAME_PREFIX}{i}', email=f'{USERNAME_PREFIX}{i}@example.com', password=password)
+        for i in range(users)
+    ], batch_size=BATCH_SIZE)
+    User.objects.create_superuser(ADMIN_USERNAME, f'{ADMIN_USERNAME}@example.com', PASSWORD)
+    user_ids = list(User.objects.filter(
+        username__startswith=USERNAME_PREFIX
+    ).exclude(username=ADMIN_USERNAME).order_by('id').values_list('id', flat=True))
+    stdout.write(f"{len(user_ids)} usuários\n")
+
+    # Popularidade: o usuário na posição `rank` tem peso 1/(rank+1)^alpha
+    popularity = user_ids[:]
+    rng.shuffle(popularity)
+    cum_weights = []
+    total = 0.0
+    for rank in range(len(popularity)):
+        total += 1 / (rank + 1) ** follow_alpha
+        cum_weights.append(total)
+
+    follows = []
+    for follower_id in user_ids:
+        count = _following_count(rng, avg_following, len(user_ids) - 1)
+        for followed_id in _pick_distinct(rng, popularity, cum_weights, count, follower_id):
+            follows.append(Follow(follower_id=follower_id, followed_id=followed_id))
+    Follow.objects.bulk_create(follows, batch_size=BATCH_SIZE, ignore_conflicts=True)
+    stdout.write(f"{len(follows)} follows\n")
+
+    Post.objects.bulk_create([
+        Post(user_id=user_id, content=f'Post {n} de {user_id}')
+        for user_id in user_ids
+        for n in range(posts_per_user)
+    ], batch_size=BATCH_SIZE)
+    post_ids = list(Post.objects.filter(user_id__in=user_ids).values_list('id', flat=True))
+    stdout.write(f"{len(post_ids)} posts\n")
+
+    likes = []
+    comments = []
+    for post_id in post_ids:
+        for user_id in rng.sample(user_ids, _exponential(rng, likes_per_post, len(user_ids))):
+            likes.append(Like(user_id=user_id, post_id=post_id))
+        for _ in range(_exponential(rng, comments_per_post, 50)):
+            comments.append(Comment(user_id=rng.choice(user_ids), post_id=post_id, content='Comentário'))
+    Like.objects.bulk_create(likes, batch_size=BATCH_SIZE, ignore_conflicts=True)
+    Comment.objects.bulk_create(comments, batch_size=BATCH_SIZE)
+    stdout.write(f"{len(likes)} likes, {len(comments)} comentários\n")
+
+    # Contadores, timelines, trending e sugestões com os mesmos comandos usados em produção
+    call_command('reconcile_counters', stdout=stdout)
+    call_command('rebuild_timelines', stdout=stdout)
+    call_command('refresh_trending', '--rebuild', stdout=stdout)
+    call_command('compute_suggestions', stdout=stdout)
+
+    return {
+        'users': len(user_ids),
+        'follows': len(follows),
+        'posts': len(post_ids),
+        'likes': len(likes),
+        'comments': len(comments),
+    }
+
+
+def add_arguments(parser):
+    parser.add_argument('--users', type=int, default=DEFAULTS['users'])
+    parser.add_argument(
+        '--avg-following', type=int, default=DEFAULTS['avg_following'],
+        help="Média de usuários seguidos por pessoa",
+    )
+    parser.add_argument(
+        '--follow-alpha', type=float, default=DEFAULTS['follow_alpha'],
+        help="Expoente da lei de potência dos seguidores (maior = mais concentrado)",
+    )
+    parser.add_argument('--posts-per-user', type=int, default=DEFAULTS['posts_per_user'])
+    parser.add_argument('--likes-per-post', type=float, default=DEFAULTS['likes_per_post'])
+    parser.add_argument('--comments-per-post', type=float, default=DEFAULTS['comments_per_post'])
+    parser.add_argument('--seed', type=int, default=DEFAULTS['seed'])
+
+
+def get_params(args):
+    return {name: getattr(args, name) for name in DEFAULTS}
+
+
+def main(argv=None):
+    from benchmarks import setup_django
+
+    parser = argparse.ArgumentParser(description="Gera dados sintéticos no banco configurado.")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    setup_django()
+    generate(**get_params(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Custo de gerar as variantes de uma foto e bytes economizados pelos clientes.
+
+Gera uma foto sintética de `--width` x `--height` (JPEG de câmera, com ruído
+para não comprimir artificialmente bem) e mede, `--repeat` vezes cada:
+
+- decodificar o JPEG inteiro e reduzir, contra o `draft` do processing.py
+  (o decodificador já entrega a imagem reduzida);
+- gerar todas as variantes de IMAGES_POST_WIDTHS x IMAGES_FORMATS no próprio
+  processo e no pool com `--processes` processos.
+
+No fim compara o tamanho do original com cada variante, o que um celular
+(640w) ou um desktop (1080w) baixa com o `srcset`:
+
+    python -m benchmarks.images --processes 4
+"""
+import argparse
+import io
+import os
+import time
+
+from benchmarks import setup_django
+from benchmarks.stats import HEADER, format_row, summarize
+
+
+def synthetic_photo(width, height):
+    from PIL import Image, ImageFilter
+
+    # Ruído suavizado: detalhe de foto de verdade, não um bloco de cor única
+    noise = Image.effect_noise((width // 4, height // 4), 64).filter(ImageFilter.GaussianBlur(2))
+    image = Image.merge('RGB', [noise, noise.rotate(90, expand=False), noise.transpose(Image.Transpose.FLIP_LEFT_RIGHT)])
+    image = image.resize((width, height), Image.Resampling.BICUBIC)
+    output = io.BytesIO()
+    image.save(output, format='JPEG', quality=90)
+    return output.getvalue()
+
+
+def timed(func, repeat):
+    durations = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        call_started = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - call_started)
+    return summarize(durations, time.perf_counter() - started)
+
+
+def full_decode(data, width):
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    return image.resize((width, round(image.height * width / image.width)), Image.Resampling.LANCZOS)
+
+
+def run(args):
+    from django.conf import settings
+
+    from images import processing
+
+    data = synthetic_photo(args.width, args.height)
+    sizes = [(width, False) for width in settings.IMAGES_POST_WIDTHS]
+    formats = settings.IMAGES_FORMATS
+    print(
+        f"Original: {args.width}x{args.height} JPEG, {len(data) / 1024:.0f} KB; "
+        f"variantes {[width for width, _ in sizes]} em {list(formats)}; {os.cpu_count()} CPU(s)"
+    )
+
+    print(HEADER)
+    widest = max(width for width, _ in sizes)
+    print(format_row(f'reduzir {widest}w: decodifica tudo', timed(lambda: full_decode(data, widest), args.repeat)))
+    print(format_row(f'reduzir {widest}w: draft', timed(lambda: processing.resize(data, widest, False), args.repeat)))
+
+    print(format_row('variantes: no processo', timed(
+        lambda: processing.encode_all(data, sizes, formats, 0), args.repeat
+    )))
+    # Aquece o pool (os processos sobem com `spawn` e importam o Pillow)
+    processing.encode_all(data, sizes, formats, args.processes)
+    print(format_row(f'variantes: pool de {args.processes} proc.', timed(
+        lambda: processing.encode_all(data, sizes, formats, args.processes), args.repeat
+    )))
+    processing.reset_pool()
+
+    print("\nBytes por cliente (com srcset, o navegador baixa só uma largura):")
+    results = processing.encode_all(data, sizes, formats, 0)
+    for (width, _), encoded in zip(sizes, results):
+        parts = ', '.join(
+            f"{fmt} {len(content) / 1024:.0f} KB ({len(data) / len(content):.0f}x menor)"
+            for fmt, (content, _width, _height) in encoded.items()
+        )
+        print(f"    {width}w: {parts}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark da geração de variantes de imagem.")
+    parser.add_argument('--width', type=int, default=4000)
+    parser.add_argument('--height', type=int, default=3000)
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--repeat', type=int, default=10, help="Medições por cenário")
+    args = parser.parse_args(argv)
+
+    setup_django()
+    run(args)
+
+
+if __name__ == '__main__':
+    main()
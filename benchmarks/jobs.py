@@ -0,0 +1,118 @@
+"""
+Criação de posts com o fan-out na requisição x na fila de jobs.
+
+Cria um banco de teste com um autor seguido por `--followers` usuários e
+mede `POST /api/posts/` pelo test client com JOBS_ALWAYS_EAGER (fan-out dentro
+da requisição, como antes da fila) e com a fila (a requisição só grava o post,
+a entrada do autor e o job). Depois esvazia a fila como o `run_jobs` faria e
+mede quanto o worker leva por post, e quanto tempo cada job esperou na fila:
+
+    python -m benchmarks.jobs --followers 5000 --posts 50
+"""
+import argparse
+import logging
+import time
+
+from benchmarks import setup_django
+from benchmarks.stats import HEADER, format_row, summarize
+
+BATCH_SIZE = 5000
+
+
+def create_author(followers):
+    from follows.models import Follow
+    from users.models import User
+
+    author = User.objects.create(username='jobs-autor', email='jobs-autor@example.com')
+    for start in range(0, followers, BATCH_SIZE):
+        User.objects.bulk_create([
+            User(username=f'jobs{i}', email=f'jobs{i}@example.com')
+            for i in range(start, min(start + BATCH_SIZE, followers))
+        ])
+    Follow.objects.bulk_create(
+        [Follow(follower_id=pk, followed=author) for pk in User.objects.exclude(pk=author.pk).values_list('pk', flat=True)],
+        batch_size=BATCH_SIZE,
+    )
+    return author
+
+
+def create_posts(author, count):
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    client.force_authenticate(author)
+    path = reverse('posts:post-list-create')
+    latencies = []
+    started = time.perf_counter()
+    for i in range(count):
+        request_started = time.perf_counter()
+        response = client.post(path, {'content': f'post {i}'}, format='json', secure=True)
+        latencies.append(time.perf_counter() - request_started)
+        assert response.status_code == 201, response.status_code
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def drain():
+    """Esvazia a fila no mesmo laço do `run_jobs`; devolve (duração por lote, espera na fila)."""
+    from jobs import queue
+
+    durations, waits = [], []
+    started = time.perf_counter()
+    while True:
+        func, jobs = queue.claim('benchmark')
+        if func is None:
+            break
+        batch_started = time.perf_counter()
+        queue.run(func, jobs)
+        durations.append(time.perf_counter() - batch_started)
+        waits += [(job.started_at - job.run_at).total_seconds() for job in jobs]
+    elapsed = time.perf_counter() - started
+    return summarize(durations, elapsed), summarize(waits, elapsed)
+
+
+def run(args):
+    from django.test.utils import override_settings
+
+    from posts.models import TimelineEntry
+
+    started = time.perf_counter()
+    author = create_author(args.followers)
+    print(f"autor com {args.followers} seguidores criado em {time.perf_counter() - started:.1f}s")
+
+    print(HEADER)
+    with override_settings(JOBS_ALWAYS_EAGER=True):
+        print(format_row('POST post (fan-out inline)', create_posts(author, args.posts)))
+
+    with override_settings(JOBS_ALWAYS_EAGER=False):
+        print(format_row('POST post (fila de jobs)', create_posts(author, args.posts)))
+        worker, waits = drain()
+    print(format_row('worker: fan-out por post', worker))
+    print(format_row('worker: espera na fila', waits))
+
+    entries = TimelineEntry.objects.filter(post__user=author).count()
+    expected = 2 * args.posts * (args.followers + 1)
+    print(f"\n{entries} entradas de timeline ({expected} esperadas)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do fan-out na requisição x na fila de jobs.")
+    parser.add_argument('--followers', type=int, default=5000)
+    parser.add_argument('--posts', type=int, default=50, help="Posts criados por cenário")
+    args = parser.parse_args(argv)
+
+    setup_django()
+    logging.disable(logging.WARNING)
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        run(args)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""
+Vazão do login com muitos usuários: fluxo antigo x fluxo atual.
+
+O fluxo antigo (`authenticate` por username e, se falhar, busca por
+`email__iexact` seguida de um segundo `authenticate`) varre a tabela de
+usuários e calcula o hash até duas vezes. O atual resolve o usuário em uma
+query pelos índices em LOWER(username)/LOWER(email) e confere a senha uma vez.
+
+Cria um banco de teste com `--users` usuários (todos com o mesmo hash,
+calculado uma vez só) e mede cada fluxo com logins por username, por email,
+com senha errada e com usuário inexistente; por fim mede o endpoint
+`/api/auth/login/` pelo test client:
+
+    python -m benchmarks.login --users 100000 --requests 200
+
+Com `--fast-hasher` as senhas usam MD5, e o que sobra no tempo é a busca do
+usuário (o hash padrão, PBKDF2, domina qualquer outro custo).
+"""
+import argparse
+import logging
+import random
+import time
+
+from benchmarks import setup_django
+from benchmarks.stats import HEADER, format_row, summarize
+
+PASSWORD = 'bench-password'
+USERNAME_PREFIX = 'login'
+BATCH_SIZE = 5000
+
+
+def create_users(count):
+    from django.contrib.auth.hashers import make_password
+
+    from users.models import User
+
+    password = make_password(PASSWORD)
+    for start in range(0, count, BATCH_SIZE):
+        User.objects.bulk_create([
+            User(
+                username=f'{USERNAME_PREFIX}{i}',
+                email=f'{USERNAME_PREFIX}{i}@example.com',
+                password=password,
+            )
+            for i in range(start, min(start + BATCH_SIZE, count))
+        ])
+
+
+def legacy_login(identifier, password):
+    """O `login_view` antes dos índices em LOWER(): até duas buscas e dois hashes."""
+    from django.contrib.auth import authenticate
+
+    from users.models import User
+
+    user = authenticate(username=identifier, password=password)
+    if user is None:
+        try:
+            user_obj = User.objects.get(email__iexact=identifier)
+            user = authenticate(username=user_obj.username, password=password)
+        except User.DoesNotExist:
+            pass
+    return user
+
+
+def current_login(identifier, password):
+    """O fluxo do `login_view` atual: uma query e no máximo um hash."""
+    from users.models import User
+
+    user = User.objects.get_by_login(identifier)
+    if user is None:
+        User().set_password(password)
+        return None
+    return user if user.check_password(password) else None
+
+
+def cases():
+    """Gera (identificador, senha) de cada caso a partir de um usuário sorteado."""
+    return {
+        'username': lambda i: (f'{USERNAME_PREFIX}{i}', PASSWORD),
+        'email': lambda i: (f'{USERNAME_PREFIX.upper()}{i}@Example.com', PASSWORD),
+        'senha errada': lambda i: (f'{USERNAME_PREFIX}{i}', 'senha-errada'),
+        'inexistente': lambda i: (f'ninguem{i}@example.com', PASSWORD),
+    }
+
+
+def measure(func, make_args, users, requests, rng):
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(requests):
+        args = make_args(rng.randrange(users))
+        request_started = time.perf_counter()
+        func(*args)
+        latencies.append(time.perf_counter() - request_started)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def measure_endpoint(make_args, users, requests, rng):
+    from django.test import Client
+    from django.urls import reverse
+
+    client = Client()
+    path = reverse('users:login')
+    statuses = set()
+
+    def post(identifier, password):
+        response = client.post(
+            path, {'username': identifier, 'password': password},
+            content_type='application/json', secure=True,
+        )
+        statuses.add(response.status_code)
+
+    summary = measure(post, make_args, users, requests, rng)
+    return summary, statuses
+
+
+def explain():
+    """Planos da busca antiga por email e da busca atual."""
+    from users.models import User
+
+    value = f'{USERNAME_PREFIX}1@example.com'
+    legacy = User.objects.filter(email__iexact=value)
+    current = User.objects.with_lower().filter(email_lower=value).order_by()
+    print("\nPlano da busca antiga (email__iexact):")
+    print(legacy.explain())
+    print("\nPlano da busca atual (LOWER(email)):")
+    print(current.explain())
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    create_users(args.users)
+    print(f"{args.users} usuários criados em {time.perf_counter() - started:.1f}s")
+
+    print(HEADER)
+    for name, make_args in cases().items():
+        for label, func in (('antigo', legacy_login), ('atual', current_login)):
+            summary = measure(func, make_args, args.users, args.requests, rng)
+            print(format_row(f'{label:<6} {name}', summary))
+
+    for name, make_args in cases().items():
+        summary, statuses = measure_endpoint(make_args, args.users, args.requests, rng)
+        codes = ' '.join(str(code) for code in sorted(statuses))
+        print(format_row(f'POST login {name}', summary) + f"  ({codes})")
+
+    explain()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do login com muitos usuários.")
+    parser.add_argument('--users', type=int, default=100_000)
+    parser.add_argument('--requests', type=int, default=100, help="Logins medidos por cenário")
+    parser.add_argument('--fast-hasher', action='store_true', help="Usa MD5 para medir só a busca")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    setup_django()
+    # Os 401 esperados gerariam um warning por requisição
+    logging.disable(logging.WARNING)
+    from django.db import connection
+    from django.test.utils import override_settings, setup_test_environment
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        if args.fast_hasher:
+            with override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']):
+                run(args)
+        else:
+            run(args)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Linhas de notificação por post viral e custo da entrega em lote.
+
+Cria um banco de teste com um autor, um post e `--likers` usuários que curtem
+o post um a um (cada like agenda um job, como na view). A cada `--read-every`
+likes o worker esvazia a fila e o autor marca tudo como lido, como faria ao
+abrir a caixa de entrada. Mostra quantas linhas de notificação o post gerou
+(uma por leitura, não uma por like), a vazão do worker e a latência da caixa
+de entrada e da contagem de não lidas pelo test client:
+
+    python -m benchmarks.notifications --likers 10000 --read-every 1000
+"""
+import argparse
+import logging
+import time
+
+from benchmarks import setup_django
+from benchmarks.stats import HEADER, format_row, summarize
+
+BATCH_SIZE = 5000
+
+
+def create_users(count):
+    from users.models import User
+
+    owner = User.objects.create(username='notif-autor', email='notif-autor@example.com')
+    for start in range(0, count, BATCH_SIZE):
+        User.objects.bulk_create([
+            User(username=f'notif{i}', email=f'notif{i}@example.com')
+            for i in range(start, min(start + BATCH_SIZE, count))
+        ])
+    return owner, list(User.objects.exclude(pk=owner.pk).values_list('pk', flat=True))
+
+
+def drain():
+    """Esvazia a fila como o `run_jobs`; devolve a duração de cada lote."""
+    from jobs import queue
+
+    durations = []
+    while True:
+        func, jobs = queue.claim('benchmark')
+        if func is None:
+            return durations
+        started = time.perf_counter()
+        queue.run(func, jobs)
+        durations.append(time.perf_counter() - started)
+
+
+def measure(client, path, requests):
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(requests):
+        request_started = time.perf_counter()
+        response = client.get(path, secure=True)
+        latencies.append(time.perf_counter() - request_started)
+        assert response.status_code == 200, response.status_code
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def run(args):
+    from rest_framework.test import APIClient
+
+    from notifications import delivery
+    from notifications.models import Notification
+    from posts.models import Like, Post
+
+    started = time.perf_counter()
+    owner, liker_ids = create_users(args.likers)
+    post = Post.objects.create(user=owner, content='viral')
+    print(f"{args.likers} usuários criados em {time.perf_counter() - started:.1f}s")
+
+    like_times, batches = [], []
+    started = time.perf_counter()
+    for i, liker_id in enumerate(liker_ids, 1):
+        like_started = time.perf_counter()
+        Like.objects.create(user_id=liker_id, post=post)
+        like_times.append(time.perf_counter() - like_started)
+        if i % args.read_every == 0:
+            batches += drain()
+            delivery.mark_read(owner.pk)
+    batches += drain()
+    elapsed = time.perf_counter() - started
+
+    print(HEADER)
+    print(format_row('like (com o job)', summarize(like_times, elapsed)))
+    worker = summarize(batches, sum(batches))
+    print(format_row('worker: lote de entrega', worker))
+    print(f"    {args.likers / sum(batches):.0f} likes entregues/s pelo worker, em {len(batches)} lote(s)")
+
+    client = APIClient()
+    client.force_authenticate(owner)
+    print(format_row('GET caixa de entrada', measure(client, '/api/notifications/', args.requests)))
+    print(format_row('GET não lidas', measure(client, '/api/notifications/unread-count/', args.requests)))
+
+    rows = Notification.objects.filter(post=post).count()
+    total = sum(Notification.objects.filter(post=post).values_list('count', flat=True))
+    print(
+        f"\n{args.likers} likes viraram {rows} linha(s) de notificação ({total} interações somadas); "
+        f"uma linha por like seriam {args.likers}."
+    )
+    if total != args.likers:
+        raise SystemExit(f"Esperava {args.likers} interações somadas, encontrei {total}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark das notificações agrupadas.")
+    parser.add_argument('--likers', type=int, default=10_000)
+    parser.add_argument('--read-every', type=int, default=1000, help="Likes entre duas leituras do autor")
+    parser.add_argument('--requests', type=int, default=200, help="Requisições medidas por endpoint")
+    args = parser.parse_args(argv)
+
+    setup_django()
+    logging.disable(logging.WARNING)
+    from django.db import connection
+    from django.test.utils import override_settings, setup_test_environment
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        with override_settings(JOBS_ALWAYS_EAGER=False):
+            run(args)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,242 @@
+"""
+Conexões simultâneas e backpressure do push em tempo real (SSE) em um nó.
+
+Sobe a aplicação ASGI no próprio processo (sem rede: mede o trabalho do
+servidor) com um banco de teste, abre `--connections` streams de seguidores
+de um mesmo autor e mede:
+
+- o tempo até cada conexão receber o `ready` e a memória por conexão;
+- a latência de entrega de `--events` eventos publicados de outra thread (como
+  faz uma view depois do commit) a todas as conexões;
+- o mesmo com `--slow` conexões que não consomem nada: elas devem receber
+  `reset` com a fila limitada, sem atrasar quem publica nem os demais clientes.
+
+    python -m benchmarks.realtime --connections 2000 --events 200
+
+Os clientes rodam no mesmo event loop do servidor, então o teto de entregas
+por segundo inclui o trabalho deles; com `--interval` menor o loop satura e a
+latência passa a medir a fila, não o push.
+
+Usa o LocalBroker; com `--broker realtime.broker.RedisBroker` (e REDIS_URL)
+mede o caminho pelo Redis.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import threading
+import time
+import tracemalloc
+
+from benchmarks import setup_django
+from benchmarks.stats import HEADER, format_row, summarize
+
+PATH = '/api/realtime/stream/'
+BATCH_SIZE = 5000
+
+
+class Connection:
+    """Cliente ASGI mínimo de um stream SSE."""
+
+    def __init__(self, app, token, slow=False):
+        self.slow = slow
+        self.ready = asyncio.Event()
+        self.closed = asyncio.Event()
+        self.started = time.perf_counter()
+        self.connect_time = None
+        self.latencies = []
+        self.status = None
+        self.request_sent = False
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+            'scheme': 'https', 'path': PATH, 'raw_path': PATH.encode(), 'query_string': b'',
+            'headers': [(b'authorization', f'Bearer {token}'.encode())],
+            'server': ('testserver', 443), 'client': ('127.0.0.1', 0),
+        }
+        self.task = asyncio.ensure_future(app(scope, self.receive, self.send))
+
+    async def receive(self):
+        if not self.request_sent:
+            self.request_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await self.closed.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        if message['type'] == 'http.response.start':
+            self.status = message['status']
+            return
+        body = message.get('body', b'')
+        if not body.startswith(b'event:'):
+            return
+        if self.slow and self.ready.is_set():
+            # Cliente que parou de ler: o envio nunca termina
+            await self.closed.wait()
+            return
+
+        event_line, data_line = body.decode('utf-8').split('\n')[:2]
+        event_type = event_line[len('event: '):]
+        if event_type == 'ready':
+            self.connect_time = time.perf_counter() - self.started
+            self.ready.set()
+        elif event_type != 'reset':
+            self.latencies.append(time.perf_counter() - json.loads(data_line[len('data: '):])['sent'])
+
+    async def close(self):
+        self.closed.set()
+        await self.task
+
+
+def create_users(count):
+    from follows.models import Follow
+    from users.models import User
+
+    author = User.objects.create(username='rt-autor', email='rt-autor@example.com')
+    User.objects.bulk_create([
+        User(username=f'rt{i}', email=f'rt{i}@example.com') for i in range(count)
+    ], batch_size=BATCH_SIZE)
+    listeners = list(User.objects.exclude(pk=author.pk).order_by('id'))
+    Follow.objects.bulk_create(
+        [Follow(follower=user, followed=author) for user in listeners], batch_size=BATCH_SIZE
+    )
+    return author, listeners
+
+
+def resets_total():
+    """Resets do servidor: os clientes lentos não chegam a ler o frame."""
+    from social_api.metrics import registry
+
+    return registry.counters.get(('realtime_resets_total', ()), 0)
+
+
+def publish_events(author_id, count, interval):
+    """Publica de uma thread à parte e devolve quanto cada publish() levou."""
+    from realtime.broker import get_broker
+    from realtime.events import author_channel
+
+    broker = get_broker()
+    durations = []
+
+    def run():
+        for i in range(count):
+            started = time.perf_counter()
+            broker.publish(author_channel(author_id), 'post', {'post_id': i, 'sent': started})
+            durations.append(time.perf_counter() - started)
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread, durations
+
+
+async def wait_thread(thread):
+    while thread.is_alive():
+        await asyncio.sleep(0.01)
+
+
+async def run_round(app, label, author_id, tokens, slow, args):
+    from realtime.broker import get_broker
+
+    broker = get_broker()
+    tracemalloc.start()
+    baseline = tracemalloc.take_snapshot()
+
+    started = time.perf_counter()
+    connections = [Connection(app, token, slow=i < slow) for i, token in enumerate(tokens)]
+    await asyncio.wait_for(asyncio.gather(*(c.ready.wait() for c in connections)), args.timeout)
+    connect_elapsed = time.perf_counter() - started
+
+    used = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(baseline, 'filename'))
+    tracemalloc.stop()
+    print(format_row(f'{label}: conexão até ready', summarize(
+        [c.connect_time for c in connections], connect_elapsed
+    )))
+    print(f"    {broker.connection_count()} conexões abertas, ~{used / len(connections) / 1024:.1f} KiB por conexão")
+
+    resets_before = resets_total()
+    thread, durations = publish_events(author_id, args.events, args.interval)
+    published = time.perf_counter()
+    await wait_thread(thread)
+    fast = connections[slow:]
+    expected = args.events * len(fast)
+    deadline = time.perf_counter() + args.timeout
+    while sum(len(c.latencies) for c in fast) < expected and time.perf_counter() < deadline:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - published
+
+    latencies = [latency for c in fast for latency in c.latencies]
+    summary = summarize(latencies, elapsed)
+    print(format_row(f'{label}: entrega (por evento/conexão)', summary))
+    print(format_row(f'{label}: publish()', summarize(durations, elapsed)))
+    lost = expected - len(latencies)
+    resets = resets_total() - resets_before
+    print(
+        f"    {len(latencies) / elapsed:.0f} entregas/s, {lost} perdida(s) entre os clientes normais, "
+        f"{resets} reset(s) para {slow} cliente(s) lento(s)"
+    )
+
+    await asyncio.wait_for(asyncio.gather(*(c.close() for c in connections)), args.timeout)
+    print(f"    {broker.connection_count()} conexões abertas após fechar")
+    return summary, lost
+
+
+async def run(args, author_id, tokens):
+    from django.core.asgi import get_asgi_application
+
+    app = get_asgi_application()
+
+    print(HEADER)
+    failures = []
+    for label, slow in (('normal', 0), ('com lentos', args.slow)):
+        summary, lost = await run_round(app, label, author_id, tokens, slow, args)
+        if lost:
+            failures.append(f"{label}: {lost} evento(s) não entregue(s) a clientes normais")
+        if summary['p99_ms'] is not None and summary['p99_ms'] > args.target_p99_ms:
+            failures.append(f"{label}: p99 de entrega {summary['p99_ms']:.1f} ms > {args.target_p99_ms:.0f} ms")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do push em tempo real (SSE).")
+    parser.add_argument('--connections', type=int, default=2000)
+    parser.add_argument('--events', type=int, default=200, help="Eventos publicados por rodada")
+    parser.add_argument('--interval', type=float, default=0.1, help="Segundos entre eventos")
+    parser.add_argument('--slow', type=int, default=100, help="Clientes que não consomem, na 2ª rodada")
+    parser.add_argument('--queue-size', type=int, default=None, help="REALTIME_QUEUE_SIZE")
+    parser.add_argument('--broker', default='realtime.broker.LocalBroker')
+    parser.add_argument('--target-p99-ms', type=float, default=500.0, help="Alvo de p99 da entrega")
+    parser.add_argument('--timeout', type=float, default=60.0)
+    args = parser.parse_args(argv)
+
+    setup_django()
+    logging.disable(logging.WARNING)
+    from django.core.signals import request_finished, request_started
+    from django.db import close_old_connections, connection
+    from django.test.utils import override_settings, setup_test_environment
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    setup_test_environment()
+    # Como o test client: o banco de teste não pode ser fechado entre requisições
+    request_started.disconnect(close_old_connections)
+    request_finished.disconnect(close_old_connections)
+    overrides = {'REALTIME_BROKER': args.broker, 'REALTIME_MAX_CONNECTIONS': args.connections * 2}
+    if args.queue_size:
+        overrides['REALTIME_QUEUE_SIZE'] = args.queue_size
+
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        with override_settings(**overrides):
+            author, listeners = create_users(args.connections)
+            tokens = [str(AccessToken.for_user(user)) for user in listeners]
+            failures = asyncio.run(run(args, author.pk, tokens))
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    if failures:
+        print("Problemas:\n" + "\n".join(failures))
+        raise SystemExit(1)
+    print("Todos os eventos entregues dentro do alvo.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,231 @@
+"""
+Roda os cenários de `benchmarks/scenarios.py` e grava o resultado em JSON.
+
+Por padrão cria um banco de teste, gera os dados sintéticos nele e usa o
+test client do Django (sequencial, contando queries por requisição):
+
+    python -m benchmarks.run --users 500 --requests 100
+
+Com `--server`, mede um servidor já rodando sobre o banco configurado
+(populado antes com `python -m benchmarks.datagen`), com `--concurrency`
+clientes em paralelo; as queries vêm do header `Server-Timing`:
+
+    python -m benchmarks.run --server http://127.0.0.1:8000 --concurrency 16
+
+O JSON vai para `benchmarks/results/<commit>.json`; compare duas rodadas com
+`python -m benchmarks.compare antigo.json novo.json`.
+"""
+import argparse
+import json
+import logging
+import re
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks import datagen, setup_django
+from benchmarks.stats import HEADER, format_row, summarize
+
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+SERVER_TIMING_QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+class ClientTransport:
+    """Requisições pelo test client, contando as queries de cada uma."""
+
+    def __init__(self):
+        from django.test import Client
+
+        self.client = Client()
+
+    def request(self, method, path, body, token):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        data = json.dumps(body) if body is not None else None
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.generic(
+                method, path, data or '', content_type='application/json',
+                secure=True, headers=headers,
+            )
+        return response.status_code, len(queries)
+
+
+class HttpTransport:
+    """Requisições HTTP para um servidor rodando; as queries vêm do header Server-Timing."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, body, token):
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data, method=method, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+                return response.status, self.query_count(response.headers)
+        except urllib.error.HTTPError as error:
+            return error.code, self.query_count(error.headers)
+
+    def query_count(self, headers):
+        match = SERVER_TIMING_QUERIES.search(headers.get('Server-Timing', ''))
+        return int(match.group(1)) if match else None
+
+
+def call(transport, scenario, context):
+    token = context[scenario.auth] if scenario.auth else None
+    return transport.request(
+        scenario.method, scenario.path(context), scenario.get_body(context), token
+    )
+
+
+def measure(transport, scenario, context, iterations):
+    """Executa `iterations` vezes (com setup/teardown fora da medição)."""
+    latencies = []
+    queries = []
+    statuses = Counter()
+
+    for _ in range(iterations):
+        if scenario.setup:
+            call(transport, scenario.setup, context)
+
+        started = time.perf_counter()
+        status, query_count = call(transport, scenario, context)
+        latencies.append(time.perf_counter() - started)
+
+        statuses[status] += 1
+        if query_count is not None:
+            queries.append(query_count)
+
+        if scenario.teardown:
+            call(transport, scenario.teardown, context)
+
+    return latencies, queries, statuses
+
+
+def run_scenario(transport_factory, scenario, context, iterations, concurrency):
+    # Aquecimento: caches, conexões e imports fora da medição
+    measure(transport_factory(), scenario, context, 1)
+
+    started = time.perf_counter()
+    if concurrency == 1:
+        results = [measure(transport_factory(), scenario, context, iterations)]
+    else:
+        per_worker = max(1, iterations // concurrency)
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(
+                lambda _: measure(transport_factory(), scenario, context, per_worker),
+                range(concurrency),
+            ))
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for batch, _, _ in results for latency in batch]
+    queries = [count for _, batch, _ in results for count in batch]
+    statuses = sum((statuses for _, _, statuses in results), Counter())
+
+    summary = summarize(latencies, elapsed)
+    summary['queries_avg'] = sum(queries) / len(queries) if queries else None
+    summary['queries_max'] = max(queries, default=None)
+    summary['status'] = {str(code): count for code, count in sorted(statuses.items())}
+    return summary
+
+
+def run_all(transport_factory, context, args):
+    from benchmarks.scenarios import SCENARIOS
+
+    results = {}
+    print(HEADER + f" {'queries':>8}  status")
+    for scenario in SCENARIOS:
+        if args.only and not any(name in scenario.name for name in args.only):
+            continue
+        summary = run_scenario(transport_factory, scenario, context, args.requests, args.concurrency)
+        results[scenario.name] = summary
+
+        queries = '-' if summary['queries_avg'] is None else f"{summary['queries_avg']:.1f}"
+        statuses = ' '.join(f'{code}x{count}' for code, count in summary['status'].items())
+        print(format_row(scenario.name, summary) + f" {queries:>8}  {statuses}")
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de todas as rotas da API.")
+    datagen.add_arguments(parser)
+    parser.add_argument('--requests', type=int, default=50, help="Requisições medidas por cenário")
+    parser.add_argument('--server', help="URL de um servidor rodando (em vez do test client)")
+    parser.add_argument('--concurrency', type=int, default=1, help="Clientes paralelos (só com --server)")
+    parser.add_argument('--only', action='append', help="Roda só cenários cujo nome contém o texto")
+    parser.add_argument('--output', help="Arquivo JSON de saída")
+    args = parser.parse_args(argv)
+
+    setup_django()
+    # Logs de requisição e das views só atrapalhariam a tabela
+    logging.disable(logging.INFO)
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    from benchmarks.scenarios import build_context, uncovered_urls
+
+    commit = git_commit()
+    run_id = f'{commit}-{int(time.time())}'
+
+    if args.server:
+        context = build_context(run_id)
+        results = run_all(lambda: HttpTransport(args.server), context, args)
+    else:
+        args.concurrency = 1
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            datagen.generate(**datagen.get_params(args))
+            context = build_context(run_id)
+            results = run_all(ClientTransport, context, args)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    uncovered = uncovered_urls()
+    if uncovered:
+        print("Rotas sem cenário: " + ', '.join(uncovered), file=sys.stderr)
+
+    report = {
+        'meta': {
+            'commit': commit,
+            'date': datetime.now(timezone.utc).isoformat(),
+            'mode': 'server' if args.server else 'client',
+            'server': args.server,
+            'database': connection.vendor,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'data': datagen.get_params(args),
+            'uncovered': uncovered,
+        },
+        'results': results,
+    }
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f'{commit}.json'
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False) + '\n')
+    print(f"Resultado salvo em {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""
+Cenários do benchmark: uma requisição medida por rota de `social_api/urls.py`.
+
+Rotas de escrita têm `setup`/`teardown` (requisições não medidas) que deixam
+o banco como estava, para que cada iteração meça o mesmo trabalho.
+"""
+import itertools
+from urllib.parse import urlencode
+
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+
+from benchmarks.datagen import ADMIN_USERNAME, PASSWORD, USERNAME_PREFIX
+
+BULK_SIZE = 10
+
+_counter = itertools.count()
+
+
+class Scenario:
+    def __init__(self, url_name, method='GET', kwargs=None, body=None, auth='token',
+                 setup=None, teardown=None, query=None):
+        self.url_name = url_name
+        self.method = method
+        # {kwarg da URL: chave do contexto}
+        self.kwargs = kwargs or {}
+        # query string: dict fixo ou função (contexto) -> dict
+        self.query = query
+        # dict fixo ou função (contexto) -> dict
+        self.body = body
+        # chave do token no contexto, ou None para requisição anônima
+        self.auth = auth
+        self.setup = setup
+        self.teardown = teardown
+
+    @property
+    def name(self):
+        return f'{self.method} {self.url_name}'
+
+    def path(self, context):
+        path = reverse(self.url_name, kwargs={
+            name: context[key] for name, key in self.kwargs.items()
+        })
+        query = self.query(context) if callable(self.query) else self.query
+        return f'{path}?{urlencode(query)}' if query else path
+
+    def get_body(self, context):
+        return self.body(context) if callable(self.body) else self.body
+
+
+def _login_body(context):
+    return {'username': context['username'], 'password': PASSWORD}
+
+
+def _register_body(context):
+    n = next(_counter)
+    name = f"{context['run_id']}-{n}"
+    return {
+        'username': f'reg{name}',
+        'email': f'reg{name}@example.com',
+        'password': 'Senha-forte-123',
+        'password2': 'Senha-forte-123',
+    }
+
+
+def _bulk_follow(action):
+    return lambda context: {'action': action, 'user_ids': context['bulk_user_ids']}
+
+
+def _bulk_like(action):
+    return lambda context: {'action': action, 'post_ids': context['bulk_post_ids']}
+
+
+POST = {'pk': 'post_id'}
+OTHER_USER = {'user_id': 'other_user_id'}
+
+# Leituras primeiro: as escritas que acumulam dados (posts, comentários,
+# cadastros) não devem alterar o que as leituras medem
+SCENARIOS = [
+    Scenario('api-root', auth=None),
+    Scenario('posts:post-list-create'),
+    Scenario('posts:post-detail', kwargs=POST),
+    Scenario('posts:post-trending'),
+    Scenario('posts:post-delta', query=lambda context: {'since': context['post_id']}),
+    Scenario('posts:comment-list', kwargs=POST),
+    Scenario('posts:like-list', kwargs=POST),
+    Scenario('follows:following_list'),
+    Scenario('follows:followers_list'),
+    Scenario('follows:suggestions'),
+    Scenario('search:search', query={'q': 'post'}),
+    Scenario('users:user-list'),
+    Scenario('users:profile-update'),
+    Scenario('cache-stats', auth='admin_token'),
+    Scenario('metrics', auth='admin_token'),
+
+    Scenario('users:login', 'POST', body=_login_body, auth=None),
+    Scenario('token_obtain_pair', 'POST', body=_login_body, auth=None),
+    Scenario('token_refresh', 'POST', body=lambda context: {'refresh': context['refresh']}, auth=None),
+
+    Scenario(
+        'posts:post-like', 'POST', kwargs=POST,
+        teardown=Scenario('posts:post-unlike', 'DELETE', kwargs=POST),
+    ),
+    Scenario(
+        'posts:post-unlike', 'DELETE', kwargs=POST,
+        setup=Scenario('posts:post-like', 'POST', kwargs=POST),
+    ),
+    Scenario(
+        'posts:post-like-bulk', 'POST', body=_bulk_like('like'),
+        teardown=Scenario('posts:post-like-bulk', 'POST', body=_bulk_like('unlike')),
+    ),
+    Scenario(
+        'follows:follow_user', 'POST', kwargs=OTHER_USER,
+        teardown=Scenario('follows:unfollow_user', 'DELETE', kwargs=OTHER_USER),
+    ),
+    Scenario(
+        'follows:unfollow_user', 'DELETE', kwargs=OTHER_USER,
+        setup=Scenario('follows:follow_user', 'POST', kwargs=OTHER_USER),
+    ),
+    Scenario(
+        'follows:bulk_follow', 'POST', body=_bulk_follow('follow'),
+        teardown=Scenario('follows:bulk_follow', 'POST', body=_bulk_follow('unfollow')),
+    ),
+    Scenario('users:profile-update', 'PATCH', body={'bio': 'Bio do benchmark'}),
+    Scenario('posts:post-comment', 'POST', kwargs=POST, body={'content': 'Comentário do benchmark'}),
+    Scenario('posts:post-list-create', 'POST', body={'content': 'Post do benchmark'}),
+    Scenario('users:register', 'POST', body=_register_body, auth=None),
+]
+
+
+def url_names(resolver=None, namespace=''):
+    """Nomes (com namespace) de todas as rotas da API, exceto o admin."""
+    resolver = resolver or get_resolver()
+    names = []
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace == 'admin':
+                continue
+            prefix = f'{namespace}{pattern.namespace}:' if pattern.namespace else namespace
+            names += url_names(pattern, prefix)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            names.append(f'{namespace}{pattern.name}')
+    return names
+
+
+def uncovered_urls():
+    """Rotas sem cenário, para o relatório avisar quando uma URL nova ficar de fora."""
+    covered = {scenario.url_name for scenario in SCENARIOS}
+    return sorted(set(url_names()) - covered)
+
+
+def build_context(run_id):
+    """Escolhe usuário, posts e alvos usados pelos cenários a partir dos dados gerados."""
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    from follows.models import Follow
+    from posts.models import Like, Post
+    from users.models import User
+
+    bench_users = User.objects.filter(
+        username__startswith=USERNAME_PREFIX
+    ).exclude(username=ADMIN_USERNAME)
+
+    # O usuário que mais segue gente tem o feed mais pesado
+    viewer = bench_users.order_by('-following_count', 'id').first()
+    if viewer is None:
+        raise RuntimeError("Sem dados de benchmark: rode `python -m benchmarks.datagen` antes.")
+    admin = User.objects.get(username=ADMIN_USERNAME)
+
+    followed_ids = Follow.objects.filter(follower=viewer).values('followed_id')
+    post = Post.objects.filter(user_id__in=followed_ids).order_by('-likes_count', '-id').first()
+    post = post or Post.objects.order_by('-likes_count', '-id').first()
+
+    not_followed = bench_users.exclude(id=viewer.id).exclude(id__in=followed_ids).order_by('id')
+    not_liked = Post.objects.exclude(
+        id__in=Like.objects.filter(user=viewer).values('post_id')
+    ).exclude(id=post.id).order_by('-id')
+
+    refresh = RefreshToken.for_user(viewer)
+    return {
+        'run_id': run_id,
+        'username': viewer.username,
+        'token': str(refresh.access_token),
+        'refresh': str(refresh),
+        'admin_token': str(RefreshToken.for_user(admin).access_token),
+        'post_id': post.id,
+        'other_user_id': not_followed.values_list('id', flat=True).first(),
+        'bulk_user_ids': list(not_followed.values_list('id', flat=True)[1:BULK_SIZE + 1]),
+        'bulk_post_ids': list(not_liked.values_list('id', flat=True)[:BULK_SIZE]),
+    }
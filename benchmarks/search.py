@@ -0,0 +1,210 @@
+"""
+Latência da busca (`/api/search/`) sobre um volume grande de posts.
+
+Cria um banco de teste com `--posts` posts (1 milhão por padrão) escritos com
+um vocabulário sintético de frequência Zipf e mede cada tipo de consulta no
+backend (só a busca no índice) e no endpoint (busca, carga dos posts e
+serialização). Sai com 1 se algum cenário passar de `--target-p99-ms` no
+backend ou de `--target-endpoint-p99-ms` no endpoint:
+
+    python -m benchmarks.search --posts 1000000 --requests 200
+
+Com `--baseline`, mede também as mesmas consultas com `icontains` (sem
+índice), para comparação.
+"""
+import argparse
+import logging
+import random
+import sys
+import time
+
+from benchmarks import setup_django
+from benchmarks.stats import HEADER, format_row, summarize
+
+BATCH_SIZE = 5000
+SYLLABLES = ['ba', 'ca', 'da', 'fe', 'go', 'la', 'me', 'no', 'pi', 'ra', 'sa', 'te', 'vi', 'zu', 'lo', 'mar']
+
+
+def vocabulary(size, rng):
+    """Palavras sintéticas distintas, da mais para a menos frequente."""
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    words = sorted(words)
+    rng.shuffle(words)
+    return words
+
+
+def zipf_weights(size, alpha=1.0):
+    total = 0.0
+    cum_weights = []
+    for rank in range(size):
+        total += 1 / (rank + 1) ** alpha
+        cum_weights.append(total)
+    return cum_weights
+
+
+def generate(posts, users, words, rng, stdout=sys.stdout):
+    from posts.models import Post
+    from users.models import User
+
+    cum_weights = zipf_weights(len(words))
+    User.objects.bulk_create([
+        User(
+            username=f'busca{i}',
+            email=f'busca{i}@example.com',
+            first_name=rng.choice(words[:500]).title(),
+            last_name=rng.choice(words[:500]).title(),
+            bio=' '.join(rng.choices(words, cum_weights=cum_weights, k=8)),
+        )
+        for i in range(users)
+    ], batch_size=BATCH_SIZE)
+    user_ids = list(User.objects.values_list('id', flat=True))
+
+    started = time.perf_counter()
+    for start in range(0, posts, BATCH_SIZE):
+        Post.objects.bulk_create([
+            Post(
+                user_id=rng.choice(user_ids),
+                content=' '.join(rng.choices(words, cum_weights=cum_weights, k=rng.randint(6, 24))),
+            )
+            for _ in range(min(BATCH_SIZE, posts - start))
+        ])
+        if (start // BATCH_SIZE) % 40 == 0:
+            stdout.write(f"\r{start + BATCH_SIZE} posts")
+            stdout.flush()
+    stdout.write(f"\r{posts} posts e {users} usuários em {time.perf_counter() - started:.0f}s\n")
+
+
+def queries(words, rng):
+    """{cenário: função que sorteia os parâmetros de uma busca}."""
+    common = words[:20]
+    middle = words[200:2000]
+    rare = words[-2000:]
+    return {
+        'termo comum': lambda: {'q': rng.choice(common), 'type': 'posts', 'prefix': 'false'},
+        'termo médio': lambda: {'q': rng.choice(middle), 'type': 'posts', 'prefix': 'false'},
+        'termo raro': lambda: {'q': rng.choice(rare), 'type': 'posts', 'prefix': 'false'},
+        'dois termos': lambda: {'q': f'{rng.choice(common)} {rng.choice(middle)}', 'type': 'posts', 'prefix': 'false'},
+        'prefixo (3 letras)': lambda: {'q': rng.choice(middle)[:3], 'type': 'posts'},
+        'typeahead usuários': lambda: {'q': rng.choice(words[:500])[:4], 'type': 'users'},
+        'posts e usuários': lambda: {'q': rng.choice(middle)},
+    }
+
+
+def measure(func, make_params, requests):
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(requests):
+        params = make_params()
+        request_started = time.perf_counter()
+        func(params)
+        latencies.append(time.perf_counter() - request_started)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def backend_call(backend):
+    from django.conf import settings
+
+    from search.backends import parse_terms
+
+    def call(params):
+        terms = parse_terms(params['q'])
+        prefix = params.get('prefix', 'true') != 'false'
+        kinds = [params['type']] if 'type' in params else ['posts', 'users']
+        for kind in kinds:
+            getattr(backend, kind)(terms, prefix, settings.SEARCH_DEFAULT_LIMIT)
+    return call
+
+
+def endpoint_call(client, token):
+    from django.urls import reverse
+
+    path = reverse('search:search')
+
+    def call(params):
+        response = client.get(path, params, secure=True, headers={'Authorization': f'Bearer {token}'})
+        assert response.status_code == 200, response.content
+    return call
+
+
+def run(args):
+    from django.db import connection
+    from django.test import Client
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    from search.backends import FallbackBackend, get_backend
+    from users.models import User
+
+    rng = random.Random(args.seed)
+    words = vocabulary(args.vocabulary, rng)
+    generate(args.posts, args.users, words, rng)
+
+    if connection.vendor == 'sqlite':
+        # Junta os segmentos do índice FTS5 gerados pela carga em lote
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO search_post_fts(search_post_fts) VALUES ('optimize')")
+            cursor.execute("INSERT INTO search_user_fts(search_user_fts) VALUES ('optimize')")
+
+    backend = get_backend()
+    token = str(RefreshToken.for_user(User.objects.order_by('id').first()).access_token)
+    client = Client()
+    print(f"backend: {type(backend).__name__}")
+    print(HEADER)
+
+    failures = []
+    for name, make_params in queries(words, rng).items():
+        for label, func, target in (
+            ('backend', backend_call(backend), args.target_p99_ms),
+            ('endpoint', endpoint_call(client, token), args.target_endpoint_p99_ms),
+        ):
+            summary = measure(func, make_params, args.requests)
+            print(format_row(f'{label:<8} {name}', summary))
+            if summary['p99_ms'] > target:
+                failures.append(f"{label} {name}: p99 {summary['p99_ms']:.1f} ms > {target:.0f} ms")
+
+        if args.baseline:
+            summary = measure(backend_call(FallbackBackend()), make_params, max(1, args.requests // 20))
+            print(format_row(f'icontains {name}', summary))
+
+    if failures:
+        print("Acima do alvo:\n" + "\n".join(failures), file=sys.stderr)
+        return 1
+    print(
+        f"Todos os cenários dentro dos alvos (p99 <= {args.target_p99_ms:.0f} ms no backend, "
+        f"<= {args.target_endpoint_p99_ms:.0f} ms no endpoint)."
+    )
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark da busca textual.")
+    parser.add_argument('--posts', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=10_000)
+    parser.add_argument('--vocabulary', type=int, default=20_000, help="Palavras distintas")
+    parser.add_argument('--requests', type=int, default=100, help="Buscas medidas por cenário")
+    parser.add_argument('--target-p99-ms', type=float, default=50.0, help="Alvo de p99 da busca no índice")
+    parser.add_argument(
+        '--target-endpoint-p99-ms', type=float, default=250.0,
+        help="Alvo de p99 do endpoint (inclui carregar e serializar os resultados)",
+    )
+    parser.add_argument('--baseline', action='store_true', help="Mede também com icontains")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    setup_django()
+    logging.disable(logging.INFO)
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        code = run(args)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+    sys.exit(code)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+"""Estatísticas usadas pelos relatórios de benchmark."""
+import math
+
+
+def percentile(samples, pct):
+    """Percentil `pct` (0-100) de `samples` pelo método nearest-rank."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(latencies, elapsed):
+    """Resumo de uma rodada: vazão e latências (em ms) a partir de segundos."""
+    latencies_ms = [latency * 1000 for latency in latencies]
+    return {
+        'requests': len(latencies_ms),
+        'rps': len(latencies_ms) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies_ms, 50),
+        'p95_ms': percentile(latencies_ms, 95),
+        'p99_ms': percentile(latencies_ms, 99),
+        'max_ms': max(latencies_ms, default=None),
+    }
+
+
+def format_row(label, summary):
+    def ms(value):
+        return '-' if value is None else f'{value:.1f}'
+
+    return (
+        f"{label:<32} {summary['requests']:>7} {summary['rps']:>9.1f} "
+        f"{ms(summary['p50_ms']):>8} {ms(summary['p95_ms']):>8} {ms(summary['p99_ms']):>8}"
+    )
+
+
+HEADER = f"{'cenário':<32} {'reqs':>7} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
@@ -0,0 +1,136 @@
+"""
+Memória de pico de uma lista inteira: resposta montada x `?stream=1`.
+
+Cria um banco de teste com um autor seguido por `--items` usuários e com
+`--items` posts na timeline dele, e pede as duas listas inteiras pela mesma
+view: com a paginação desligada (o caminho do DRF, que monta a lista de
+objetos, os dicts e os bytes da resposta antes de enviar) e com `?stream=1`
+(social_api/streaming.py, blocos de STREAM_CHUNK_SIZE). O pico de memória
+vem do tracemalloc, em uma rodada separada da que mede o tempo (o
+tracemalloc deixa tudo mais lento):
+
+    python -m benchmarks.streaming --items 100000
+"""
+import argparse
+import logging
+import time
+import tracemalloc
+
+from benchmarks import setup_django
+
+BATCH_SIZE = 5000
+
+
+def create_data(count):
+    from follows.models import Follow
+    from posts.models import Post, TimelineEntry
+    from users.models import User
+
+    author = User.objects.create(username='stream-autor', email='stream-autor@example.com')
+    for start in range(0, count, BATCH_SIZE):
+        User.objects.bulk_create([
+            User(username=f'stream{i}', email=f'stream{i}@example.com', bio='Seguidor de teste ' * 3)
+            for i in range(start, min(start + BATCH_SIZE, count))
+        ])
+        posts = Post.objects.bulk_create([
+            Post(user=author, content=f'Post {i} do benchmark de streaming ' * 2)
+            for i in range(start, min(start + BATCH_SIZE, count))
+        ])
+        TimelineEntry.objects.bulk_create([
+            TimelineEntry(user=author, post=post, created_at=post.created_at) for post in posts
+        ])
+    Follow.objects.bulk_create(
+        [Follow(follower_id=pk, followed=author) for pk in User.objects.exclude(pk=author.pk).values_list('pk', flat=True)],
+        batch_size=BATCH_SIZE,
+    )
+    return author
+
+
+def buffered(view_class):
+    """A mesma view sem paginação (e sem a ETag, que é calculada sobre a página)."""
+    class Buffered(view_class):
+        pagination_class = None
+
+        def get(self, request, *args, **kwargs):
+            return self.list(request, *args, **kwargs)
+
+    return Buffered.as_view()
+
+
+def fetch(view, request, stream):
+    """Executa a view e consome a resposta como um servidor faria; devolve os bytes enviados."""
+    response = view(request)
+    assert response.status_code == 200, response.status_code
+    if stream:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    response.render()
+    return len(response.content)
+
+
+def measure(view, request_for, stream):
+    started = time.perf_counter()
+    size = fetch(view, request_for(stream), stream)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    try:
+        fetch(view, request_for(stream), stream)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return elapsed, peak, size
+
+
+def run(args):
+    from django.conf import settings
+    from rest_framework.test import APIRequestFactory, force_authenticate
+
+    from follows.views import FollowersListView
+    from posts.views import PostListCreateView
+
+    started = time.perf_counter()
+    author = create_data(args.items)
+    print(f"{args.items} seguidores e {args.items} posts criados em {time.perf_counter() - started:.1f}s")
+    print(f"STREAM_CHUNK_SIZE={settings.STREAM_CHUNK_SIZE}\n")
+
+    factory = APIRequestFactory()
+    print(f"{'lista':<12} {'modo':<18} {'tempo s':>8} {'pico MB':>9} {'resposta MB':>12}")
+    for label, view_class, path in [
+        ('seguidores', FollowersListView, '/api/follows/followers/'),
+        ('feed', PostListCreateView, '/api/posts/'),
+    ]:
+        def request_for(stream):
+            request = factory.get(path, {'stream': '1'} if stream else {})
+            force_authenticate(request, user=author)
+            return request
+
+        modes = [
+            ('resposta montada', buffered(view_class), False),
+            ('stream', view_class.as_view(), True),
+        ]
+        for mode, view, stream in modes:
+            elapsed, peak, size = measure(view, request_for, stream)
+            print(f"{label:<12} {mode:<18} {elapsed:>8.2f} {peak / 2**20:>9.1f} {size / 2**20:>12.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de memória das listas em streaming.")
+    parser.add_argument('--items', type=int, default=100_000, help="Seguidores e posts na lista")
+    args = parser.parse_args(argv)
+
+    setup_django()
+    logging.disable(logging.WARNING)
+    from django.db import connection
+    from django.test.utils import override_settings, setup_test_environment
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        with override_settings(STREAM_MAX_ITEMS=args.items):
+            run(args)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
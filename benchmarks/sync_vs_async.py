@@ -0,0 +1,98 @@
+"""
+Compara vazão e latência (p50/p99) do deploy WSGI síncrono com o ASGI async.
+
+Suba os dois servidores apontando para o mesmo banco e rode:
+
+    gunicorn social_api.wsgi -w 4 -b 127.0.0.1:8000
+    gunicorn social_api.asgi:application -k uvicorn_worker.UvicornWorker -w 4 -b 127.0.0.1:8001
+
+    python -m benchmarks.sync_vs_async \\
+        --sync-url http://127.0.0.1:8000 --async-url http://127.0.0.1:8001 \\
+        --token <access token> --concurrency 64 --duration 30
+
+Cada endpoint é exercitado pelo mesmo número fixo de clientes concorrentes
+(threads fazendo requisições em sequência) durante `--duration` segundos.
+"""
+import argparse
+import json
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.stats import HEADER, format_row, summarize
+
+DEFAULT_PATHS = [
+    '/api/posts/',
+    '/api/follows/following/',
+    '/api/follows/followers/',
+]
+
+
+def worker(url, token, deadline):
+    """Faz requisições em sequência até o prazo; devolve (latências, erros)."""
+    latencies = []
+    errors = 0
+    request = urllib.request.Request(url, headers={'Authorization': f'Bearer {token}'})
+
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+        except (urllib.error.URLError, TimeoutError):
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - started)
+
+    return latencies, errors
+
+
+def run(url, token, concurrency, duration):
+    # Aquece conexões e caches antes de medir
+    worker(url, token, time.perf_counter() + min(2.0, duration / 10))
+
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(worker, url, token, deadline) for _ in range(concurrency)]
+        results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for batch, _ in results for latency in batch]
+    summary = summarize(latencies, elapsed)
+    summary['errors'] = sum(errors for _, errors in results)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sync-url', required=True, help="Base do servidor WSGI")
+    parser.add_argument('--async-url', required=True, help="Base do servidor ASGI")
+    parser.add_argument('--token', required=True, help="Access token JWT de um usuário com feed")
+    parser.add_argument('--path', action='append', dest='paths', help="Endpoint a medir (repetível)")
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=20.0, help="Segundos por cenário")
+    parser.add_argument('--json', action='store_true', help="Imprime o resultado em JSON")
+    args = parser.parse_args(argv)
+
+    report = []
+    for path in args.paths or DEFAULT_PATHS:
+        for mode, base in (('sync', args.sync_url), ('async', args.async_url)):
+            summary = run(base.rstrip('/') + path, args.token, args.concurrency, args.duration)
+            report.append({'path': path, 'mode': mode, 'concurrency': args.concurrency, **summary})
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"concorrência: {args.concurrency}, {args.duration:.0f}s por cenário")
+    print(HEADER)
+    for row in report:
+        label = f"{row['mode']:<5} {row['path']}"
+        suffix = f"  ({row['errors']} erros)" if row['errors'] else ''
+        print(format_row(label, row) + suffix)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from follows import suggestions
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Recalcula as sugestões de quem seguir (amigos de amigos e populares) de cada usuário."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--size', type=int, default=settings.SUGGESTIONS_SIZE)
+        parser.add_argument(
+            '--user',
+            type=int,
+            action='append',
+            dest='user_ids',
+            help="ID de um usuário específico (pode ser repetido).",
+        )
+
+    def handle(self, *args, **options):
+        size = options['size']
+        users = User.objects.filter(is_active=True).order_by('id')
+        if options['user_ids']:
+            users = users.filter(id__in=options['user_ids'])
+
+        popular = suggestions.popular_ids(size * 5)
+        cache.set(suggestions.POPULAR_KEY, popular, settings.SUGGESTIONS_POPULAR_TTL)
+        excluded = set(User.objects.filter(is_active=False).values_list('id', flat=True))
+
+        total_users = 0
+        total_rows = 0
+        last_id = 0
+        while True:
+            batch = list(users.filter(id__gt=last_id).values_list('id', flat=True)[:options['batch_size']])
+            if not batch:
+                break
+            last_id = batch[-1]
+            total_rows += suggestions.compute(batch, size, popular, excluded)
+            total_users += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{total_rows} sugestão(ões) para {total_users} usuário(s)."
+        ))
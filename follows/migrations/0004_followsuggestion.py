@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-17 20:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('follows', '0003_follow_follow_follower_created_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FollowSuggestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField()),
+                ('mutual_count', models.PositiveIntegerField(default=0)),
+                ('reason', models.CharField(choices=[('mutual', 'Seguido por quem você segue'), ('popular', 'Popular')], max_length=10)),
+                ('suggested', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='follow_suggestions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'position'], name='suggestion_user_position_idx')],
+                'unique_together': {('user', 'suggested')},
+            },
+        ),
+    ]
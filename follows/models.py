@@ -8,6 +8,35 @@ class Follow(models.Model):
 
     class Meta:
         unique_together = ('follower', 'followed')
+        indexes = [
+            models.Index(fields=['follower', '-created_at', '-id'], name='follow_follower_created_idx'),
+            models.Index(fields=['followed', '-created_at', '-id'], name='follow_followed_created_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.follower} -> {self.followed}"
\ No newline at end of file
+        return f"{self.follower} -> {self.followed}"
+
+class FollowSuggestion(models.Model):
+    """Sugestão pré-calculada de quem seguir (ver follows/suggestions.py)."""
+    REASON_MUTUAL = 'mutual'
+    REASON_POPULAR = 'popular'
+    REASON_CHOICES = [
+        (REASON_MUTUAL, 'Seguido por quem você segue'),
+        (REASON_POPULAR, 'Popular'),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='follow_suggestions')
+    suggested = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    position = models.PositiveSmallIntegerField()
+    # Quantos dos usuários seguidos por `user` seguem `suggested`
+    mutual_count = models.PositiveIntegerField(default=0)
+    reason = models.CharField(max_length=10, choices=REASON_CHOICES)
+
+    class Meta:
+        unique_together = ('user', 'suggested')
+        indexes = [
+            models.Index(fields=['user', 'position'], name='suggestion_user_position_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} -> {self.suggested_id} ({self.reason})"
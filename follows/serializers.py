@@ -1,20 +1,18 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
+from users.serializers import UserSerializer
 from .models import Follow
 
 User = get_user_model()
 
 class FollowSerializer(serializers.ModelSerializer):
-    follower = serializers.SerializerMethodField(read_only=True)
-    followed = serializers.SerializerMethodField(read_only=True)
-
-    def get_follower(self, obj):
-        from users.serializers import UserSerializer
-        return UserSerializer(obj.follower).data
-
-    def get_followed(self, obj):
-        from users.serializers import UserSerializer
-        return UserSerializer(obj.followed).data
+    """
+    Serializer de Follow. Os usuários aninhados usam os contadores
+    desnormalizados; em listas use select_related('follower', 'followed').
+    """
+    follower = UserSerializer(read_only=True)
+    followed = UserSerializer(read_only=True)
 
     class Meta:
         model = Follow
@@ -31,4 +29,18 @@ class FollowSerializer(serializers.ModelSerializer):
         return attrs
 
     def create(self, validated_data):
-        return Follow.objects.create(**validated_data)
\ No newline at end of file
+        return Follow.objects.create(**validated_data)
+
+
+class BulkFollowSerializer(serializers.Serializer):
+    """Entrada de POST /api/follows/bulk/"""
+    action = serializers.ChoiceField(choices=['follow', 'unfollow'])
+    user_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.BULK_MAX_ITEMS,
+    )
+
+    def validate_user_ids(self, value):
+        # Remove duplicados mantendo a ordem enviada
+        return list(dict.fromkeys(value))
@@ -0,0 +1,12 @@
+"""Invalidação dos cards dos usuários quando um follow muda os contadores."""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from social_api import cache
+from .models import Follow
+
+
+@receiver([post_save, post_delete], sender=Follow)
+def invalidate_follow_users(sender, instance, **kwargs):
+    cache.bump_on_commit('user', instance.follower_id)
+    cache.bump_on_commit('user', instance.followed_id)
@@ -0,0 +1,117 @@
+"""
+Sugestões de quem seguir a partir do grafo de follows.
+
+Os candidatos de um usuário são os amigos de amigos (seguidos por quem ele
+segue), ordenados pelo número de conexões em comum; se faltarem, a lista é
+completada com os usuários mais seguidos. O cálculo é offline
+(`compute_suggestions`): os usuários são processados em lotes, carregando de
+uma vez as listas de adjacência do lote e do segundo nível e contando os
+candidatos com `Counter` sobre as listas encadeadas, sem uma query por
+usuário. As TOP-N de cada um ficam em FollowSuggestion e o endpoint só lê
+essas linhas.
+"""
+import heapq
+from collections import Counter, defaultdict
+from itertools import chain, islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from social_api import cache
+from .models import Follow, FollowSuggestion
+
+User = get_user_model()
+
+IN_BATCH_SIZE = 1000
+POPULAR_KEY = 'suggestions:popular'
+
+
+def _chunks(values, size):
+    values = iter(values)
+    while chunk := list(islice(values, size)):
+        yield chunk
+
+
+def adjacency(user_ids):
+    """{usuário: [ids que ele segue]} de vários usuários, em poucas queries."""
+    following = defaultdict(list)
+    for chunk in _chunks(user_ids, IN_BATCH_SIZE):
+        pairs = Follow.objects.filter(follower_id__in=chunk).values_list('follower_id', 'followed_id')
+        for follower_id, followed_id in pairs.iterator(chunk_size=IN_BATCH_SIZE * 10):
+            following[follower_id].append(followed_id)
+    return following
+
+
+def popular_ids(limit):
+    return list(
+        User.objects.filter(is_active=True).order_by('-followers_count', 'id')
+        .values_list('id', flat=True)[:limit]
+    )
+
+
+def get_popular_ids():
+    """Usuários mais seguidos (reserva para quem ainda não tem sugestões calculadas)."""
+    return cache.get_or_set(
+        'suggestions', POPULAR_KEY,
+        lambda: popular_ids(settings.SUGGESTIONS_SIZE * 5),
+        settings.SUGGESTIONS_POPULAR_TTL,
+    )
+
+
+def for_user(user):
+    """Sugestões gravadas de `user`, sem quem ele passou a seguir depois do cálculo."""
+    return FollowSuggestion.objects.filter(
+        user=user, suggested__is_active=True
+    ).exclude(
+        suggested_id__in=Follow.objects.filter(follower=user).values('followed_id')
+    ).order_by('position')[:settings.SUGGESTIONS_SIZE]
+
+
+def rank_candidates(user_id, following, second_hop, popular, excluded, size):
+    """[(id sugerido, conexões em comum)] de um usuário, amigos de amigos primeiro."""
+    counts = Counter(chain.from_iterable(second_hop.get(mid, ()) for mid in following))
+    for skip in chain(following, (user_id,)):
+        counts.pop(skip, None)
+
+    # Empates pelo menor id, para o resultado não depender da ordem das queries
+    ranked = heapq.nlargest(
+        size,
+        (item for item in counts.items() if item[0] not in excluded),
+        key=lambda item: (item[1], -item[0]),
+    )
+
+    if len(ranked) < size:
+        chosen = {candidate for candidate, _ in ranked}
+        following = set(following)
+        for candidate in popular:
+            if len(ranked) >= size:
+                break
+            if candidate != user_id and candidate not in following and candidate not in chosen:
+                ranked.append((candidate, 0))
+    return ranked
+
+
+def compute(user_ids, size, popular, excluded):
+    """Recalcula e grava as sugestões de um lote de usuários; devolve quantas linhas gravou."""
+    following = adjacency(user_ids)
+    second_hop = adjacency(set(chain.from_iterable(following.values())))
+
+    rows = []
+    for user_id in user_ids:
+        ranked = rank_candidates(user_id, following.get(user_id, ()), second_hop, popular, excluded, size)
+        rows += [
+            FollowSuggestion(
+                user_id=user_id,
+                suggested_id=candidate,
+                position=position,
+                mutual_count=mutual,
+                reason=FollowSuggestion.REASON_MUTUAL if mutual else FollowSuggestion.REASON_POPULAR,
+            )
+            for position, (candidate, mutual) in enumerate(ranked)
+        ]
+
+    with transaction.atomic():
+        FollowSuggestion.objects.filter(user_id__in=user_ids).delete()
+        FollowSuggestion.objects.bulk_create(rows, batch_size=IN_BATCH_SIZE)
+    return len(rows)
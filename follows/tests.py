@@ -1,3 +1,171 @@
-from django.test import TestCase
+import io
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from follows import views
+from follows.models import Follow
+from users.models import User
+
+
+def api_client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class QueryCountTest(TestCase):
+    """Seguindo e seguidores: uma query com 2 e com 15 usuários na página"""
+    sizes = (2, 15)
+
+    def setUp(self):
+        cache.clear()
+        self.viewer = User.objects.create(username='leitor', email='leitor@example.com')
+        self.client = api_client(self.viewer)
+        self.items = 0
+
+    def grow(self, size):
+        """Cada item é um usuário que segue o leitor e é seguido por ele."""
+        while self.items < size:
+            user = User.objects.create(username=f'usuario{self.items}', email=f'usuario{self.items}@example.com')
+            self.client.post(f'/api/follows/users/{user.pk}/follow/')
+            api_client(user).post(f'/api/follows/users/{self.viewer.pk}/follow/')
+            self.items += 1
+
+    def assertConstantQueries(self, path, num):
+        for size in self.sizes:
+            self.grow(size)
+            cache.clear()
+            with self.subTest(items=size):
+                with self.assertNumQueries(num):
+                    response = self.client.get(path)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.json()['results']), size)
+
+    def test_following(self):
+        self.assertConstantQueries('/api/follows/following/', 1)
+
+    def test_followers(self):
+        self.assertConstantQueries('/api/follows/followers/', 1)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class FollowTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='leitor', email='leitor@example.com')
+        self.client = api_client(self.user)
+
+    def counters(self, user):
+        user.refresh_from_db()
+        return user.followers_count, user.following_count
+
+    def test_follow_unfollow_counters(self):
+        target = User.objects.create(username='alvo', email='alvo@example.com')
+        self.assertEqual(self.client.post(f'/api/follows/users/{target.pk}/follow/').status_code, 201)
+        self.assertEqual(self.client.post(f'/api/follows/users/{target.pk}/follow/').status_code, 200)
+        self.assertEqual((self.counters(target), self.counters(self.user)), ((1, 0), (0, 1)))
+        self.assertEqual(self.client.delete(f'/api/follows/users/{target.pk}/unfollow/').status_code, 200)
+        self.assertEqual(self.client.delete(f'/api/follows/users/{target.pk}/unfollow/').status_code, 404)
+        self.assertEqual((self.counters(target), self.counters(self.user)), ((0, 0), (0, 0)))
+
+    def test_inactive_user_cannot_be_followed(self):
+        inactive = User.objects.create(username='inativo', email='inativo@example.com', is_active=False)
+        response = self.client.post(f'/api/follows/users/{inactive.pk}/follow/')
+        # Mesma resposta de um usuário que não existe
+        missing = self.client.post(f'/api/follows/users/{inactive.pk + 1}/follow/')
+        self.assertEqual((response.status_code, response.json()), (missing.status_code, missing.json()))
+        self.assertFalse(Follow.objects.filter(followed=inactive).exists())
+        inactive.refresh_from_db()
+        self.assertEqual(inactive.followers_count, 0)
+
+    def test_concurrent_bulk_follow_not_counted_twice(self):
+        """Um follow gravado entre a leitura e o INSERT não soma de novo nos contadores."""
+        targets = [User.objects.create(username=f'alvo{i}', email=f'alvo{i}@example.com') for i in range(2)]
+
+        def concurrent_insert(objs, returning):
+            # Outra requisição segue o primeiro alvo e faz commit antes do nosso INSERT
+            Follow.objects.create(follower=self.user, followed=targets[0])
+            views.update_follow_counters(self.user.pk, targets[0].pk, 1)
+            return insert_ignoring_conflicts(objs, returning)
+
+        insert_ignoring_conflicts = views.insert_ignoring_conflicts
+        with mock.patch.object(views, 'insert_ignoring_conflicts', concurrent_insert):
+            response = self.client.post(
+                '/api/follows/bulk/', {'action': 'follow', 'user_ids': [user.pk for user in targets]}, format='json'
+            )
+
+        self.assertEqual(response.json()['changed'], 1)
+        self.assertEqual(response.json()['results'][0]['status'], 'already_following')
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.following_count, 2)
+        for target in targets:
+            target.refresh_from_db()
+            self.assertEqual(target.followers_count, 1)
+
+    def test_concurrent_bulk_unfollow_not_counted_twice(self):
+        """Um follow apagado entre a leitura e o DELETE não desconta de novo nos contadores."""
+        targets = [User.objects.create(username=f'alvo{i}', email=f'alvo{i}@example.com') for i in range(2)]
+        user_ids = [target.pk for target in targets]
+        self.client.post('/api/follows/bulk/', {'action': 'follow', 'user_ids': user_ids}, format='json')
+
+        def concurrent_delete(queryset, returning):
+            # Outra requisição deixa de seguir o primeiro alvo e faz commit antes do nosso DELETE
+            Follow.objects.filter(follower=self.user, followed=targets[0]).delete()
+            views.update_follow_counters(self.user.pk, targets[0].pk, -1)
+            return delete_returning(queryset, returning)
+
+        delete_returning = views.delete_returning
+        with mock.patch.object(views, 'delete_returning', concurrent_delete):
+            response = self.client.post('/api/follows/bulk/', {'action': 'unfollow', 'user_ids': user_ids}, format='json')
+
+        self.assertEqual(response.json()['changed'], 1)
+        self.assertEqual([item['status'] for item in response.json()['results']], ['not_following', 'unfollowed'])
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.following_count, 0)
+        for target in targets:
+            target.refresh_from_db()
+            self.assertEqual(target.followers_count, 0)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, SUGGESTIONS_SIZE=3)
+class SuggestionTest(TestCase):
+    """Amigos de amigos primeiro, completados pelos populares; nunca quem já é seguido nem o próprio usuário"""
+
+    def setUp(self):
+        cache.clear()
+        names = ['eu', 'ana', 'bruno', 'carla', 'davi', 'inativo', 'popular']
+        self.users = {name: User.objects.create(username=name, email=f'{name}@example.com') for name in names}
+        User.objects.filter(pk=self.users['inativo'].pk).update(is_active=False)
+        edges = [('eu', 'ana'), ('eu', 'bruno'), ('ana', 'carla'), ('ana', 'davi'), ('ana', 'inativo'),
+                 ('bruno', 'carla'), ('bruno', 'eu')]
+        for follower, followed in edges:
+            Follow.objects.create(follower=self.users[follower], followed=self.users[followed])
+        User.objects.filter(pk=self.users['popular'].pk).update(followers_count=100)
+        User.objects.filter(pk=self.users['eu'].pk).update(followers_count=50)
+
+    def suggested(self, user):
+        results = api_client(user).get('/api/follows/suggestions/').json()['results']
+        return [(item['user']['username'], item['mutual_count'], item['reason']) for item in results]
+
+    def test_friends_of_friends_then_popular(self):
+        call_command('compute_suggestions', stdout=io.StringIO())
+        self.assertEqual(self.suggested(self.users['eu']), [
+            ('carla', 2, 'mutual'), ('davi', 1, 'mutual'), ('popular', 0, 'popular'),
+        ])
+
+        # Seguido depois do cálculo: sai da lista sem recalcular
+        api_client(self.users['eu']).post(f"/api/follows/users/{self.users['carla'].pk}/follow/")
+        self.assertEqual([name for name, _, _ in self.suggested(self.users['eu'])], ['davi', 'popular'])
+
+    def test_popular_fallback_without_computed_suggestions(self):
+        # Bruno ainda não tem sugestões: recebe os mais seguidos, menos ele mesmo e quem já segue ("eu")
+        names = [name for name, _, _ in self.suggested(self.users['bruno'])]
+        self.assertEqual(names[0], 'popular')
+        self.assertNotIn('bruno', names)
+        self.assertNotIn('eu', names)
+        self.assertNotIn('inativo', names)
+        self.assertEqual(len(names), 3)
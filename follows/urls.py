@@ -1,4 +1,5 @@
 from django.urls import path
+from social_api.async_views import read_view
 from . import views
 
 app_name = "follows"
@@ -6,6 +7,8 @@ app_name = "follows"
 urlpatterns = [
     path('users/<int:user_id>/follow/', views.FollowUserView.as_view(), name='follow_user'),
     path('users/<int:user_id>/unfollow/', views.UnfollowUserView.as_view(), name='unfollow_user'),
-    path('following/', views.FollowingListView.as_view(), name='following_list'),
-    path('followers/', views.FollowersListView.as_view(), name='followers_list'),
+    path('bulk/', views.BulkFollowView.as_view(), name='bulk_follow'),
+    path('following/', read_view(views.FollowingListView), name='following_list'),
+    path('followers/', read_view(views.FollowersListView), name='followers_list'),
+    path('suggestions/', views.SuggestionListView.as_view(), name='suggestions'),
 ]
\ No newline at end of file
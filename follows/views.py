@@ -1,13 +1,32 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
 from users.models import User
-from users.serializers import UserSerializer
+from users.serializers import UserSerializer, get_user_cards
 from posts.models import Post, Comment
 from posts.serializers import CommentSerializer
-from .models import Follow
+from notifications import delivery as notifications
+from posts import timeline
+from social_api import cache, conditional
+from social_api.async_views import AsyncListMixin
+from social_api.conditional import conditional_get
+from social_api.db import delete_returning, insert_ignoring_conflicts
+from social_api.streaming import StreamingListMixin
+from . import suggestions
+from .models import Follow, FollowSuggestion
+from .serializers import BulkFollowSerializer
+
+
+def update_follow_counters(follower_id, followed_id, delta):
+    """Atualiza atomicamente following_count/followers_count dos dois usuários."""
+    User.objects.filter(pk=follower_id).update(following_count=F('following_count') + delta)
+    User.objects.filter(pk=followed_id).update(followers_count=F('followers_count') + delta)
 
 
 class FollowUserView(generics.GenericAPIView):
@@ -16,7 +35,7 @@ class FollowUserView(generics.GenericAPIView):
 
     def post(self, request, user_id):
         try:
-            target_user = get_object_or_404(User, id=user_id)
+            target_user = get_object_or_404(User, id=user_id, is_active=True)
 
             if request.user == target_user:
                 return Response(
@@ -24,12 +43,16 @@ class FollowUserView(generics.GenericAPIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            follow, created = Follow.objects.get_or_create(
-                follower=request.user,
-                followed=target_user
-            )
+            with transaction.atomic():
+                follow, created = Follow.objects.get_or_create(
+                    follower=request.user,
+                    followed=target_user
+                )
+                if created:
+                    update_follow_counters(request.user.id, target_user.id, 1)
 
             if created:
+                timeline.backfill_author(request.user, target_user.id)
                 return Response(
                     {'message': 'Agora você segue este usuário'},
                     status=status.HTTP_201_CREATED
@@ -50,12 +73,16 @@ class UnfollowUserView(generics.GenericAPIView):
     def delete(self, request, user_id):
         target_user = get_object_or_404(User, id=user_id)
 
-        deleted, _ = Follow.objects.filter(
-            follower=request.user,
-            followed=target_user
-        ).delete()
+        with transaction.atomic():
+            deleted, _ = Follow.objects.filter(
+                follower=request.user,
+                followed=target_user
+            ).delete()
+            if deleted:
+                update_follow_counters(request.user.id, target_user.id, -1)
 
         if deleted:
+            timeline.prune_author(request.user, target_user.id)
             return Response({'message': 'Você deixou de seguir este usuário'})
 
         return Response(
@@ -64,41 +91,178 @@ class UnfollowUserView(generics.GenericAPIView):
         )
 
 
-class FollowingListView(generics.ListAPIView):
+class BulkFollowView(generics.GenericAPIView):
+    """Segue ou deixa de seguir vários usuários em uma requisição"""
+    permission_classes = [IsAuthenticated]
+    serializer_class = BulkFollowSerializer
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        action = serializer.validated_data['action']
+        user_ids = serializer.validated_data['user_ids']
+
+        if action == 'follow':
+            results, changed = self.follow(request.user, user_ids)
+            timeline.backfill_authors(request.user, changed)
+            # bulk_create não dispara o post_save que notifica os seguidos
+            notifications.follows_created(request.user.id, changed)
+        else:
+            results, changed = self.unfollow(request.user, user_ids)
+            timeline.prune_authors(request.user, changed)
+
+        # bulk_create e os DELETE/update() diretos não disparam signals: invalida os cards aqui
+        if changed:
+            cache.bump_on_commit('user', request.user.id)
+            for user_id in changed:
+                cache.bump_on_commit('user', user_id)
+
+        return Response({
+            'results': [{'user_id': user_id, 'status': results[user_id]} for user_id in user_ids],
+            'changed': len(changed),
+        })
+
+    @transaction.atomic
+    def follow(self, user, user_ids):
+        existing = set(User.objects.filter(
+            id__in=user_ids, is_active=True
+        ).values_list('id', flat=True))
+        already = set(Follow.objects.filter(
+            follower=user, followed_id__in=user_ids
+        ).values_list('followed_id', flat=True))
+
+        results = {}
+        for user_id in user_ids:
+            if user_id == user.id:
+                results[user_id] = 'self'
+            elif user_id not in existing:
+                results[user_id] = 'not_found'
+            elif user_id in already:
+                results[user_id] = 'already_following'
+            else:
+                results[user_id] = 'followed'
+
+        followed = [user_id for user_id, result in results.items() if result == 'followed']
+        # Os contadores somam só as linhas inseridas: um follow gravado por
+        # uma requisição concorrente depois da leitura acima não conta duas vezes
+        created = insert_ignoring_conflicts(
+            [Follow(follower=user, followed_id=user_id) for user_id in followed], 'followed'
+        )
+        for user_id in set(followed) - set(created):
+            results[user_id] = 'already_following'
+        if created:
+            User.objects.filter(id__in=created).update(followers_count=F('followers_count') + 1)
+            User.objects.filter(pk=user.id).update(following_count=F('following_count') + len(created))
+        return results, created
+
+    @transaction.atomic
+    def unfollow(self, user, user_ids):
+        # Só os follows que este DELETE apagou: um unfollow concorrente dos
+        # mesmos não desconta duas vezes
+        removed = delete_returning(Follow.objects.filter(follower=user, followed_id__in=user_ids), 'followed')
+        if removed:
+            User.objects.filter(id__in=removed).update(followers_count=F('followers_count') - 1)
+            User.objects.filter(pk=user.id).update(following_count=F('following_count') - len(removed))
+
+        removed_set = set(removed)
+        results = {
+            user_id: 'unfollowed' if user_id in removed_set else 'not_following'
+            for user_id in user_ids
+        }
+        return results, removed
+
+
+class FollowingListView(StreamingListMixin, AsyncListMixin, generics.ListAPIView):
     """Lista usuários que o usuário atual segue"""
     permission_classes = [IsAuthenticated]
     serializer_class = UserSerializer
+    keyset_ordering = ('-followed_at', '-id')
 
     def get_queryset(self):
-        following_ids = Follow.objects.filter(
-            follower=self.request.user
-        ).values_list('followed_id', flat=True)
-
-        return User.objects.filter(id__in=following_ids)
+        # Ordena pela data do follow, mais recentes primeiro
+        return User.objects.filter(
+            followers__follower=self.request.user
+        ).annotate(
+            followed_at=F('followers__created_at')
+        ).order_by('-followed_at', '-id')
 
 
-class FollowersListView(generics.ListAPIView):
+class FollowersListView(StreamingListMixin, AsyncListMixin, generics.ListAPIView):
     """Lista seguidores do usuário atual"""
     permission_classes = [IsAuthenticated]
     serializer_class = UserSerializer
+    keyset_ordering = ('-followed_at', '-id')
 
     def get_queryset(self):
-        follower_ids = Follow.objects.filter(
-            followed=self.request.user
-        ).values_list('follower_id', flat=True)
+        return User.objects.filter(
+            following__followed=self.request.user
+        ).annotate(
+            followed_at=F('following__created_at')
+        ).order_by('-followed_at', '-id')
+
+
+class SuggestionListView(generics.GenericAPIView):
+    """
+    Sugestões de quem seguir, pré-calculadas por `compute_suggestions`.
+    Quem ainda não tem sugestões recebe os usuários mais seguidos.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        user = request.user
+        followed_ids = Follow.objects.filter(follower=user).values('followed_id')
 
-        return User.objects.filter(id__in=follower_ids)
+        rows = list(suggestions.for_user(user).select_related('suggested'))
+        if rows:
+            items = [(row.suggested, row.mutual_count, row.reason) for row in rows]
+        else:
+            popular_ids = [pk for pk in suggestions.get_popular_ids() if pk != user.id]
+            popular = User.objects.filter(is_active=True).exclude(
+                id__in=followed_ids
+            ).in_bulk(popular_ids)
+            items = [
+                (popular[pk], 0, FollowSuggestion.REASON_POPULAR)
+                for pk in popular_ids if pk in popular
+            ][:settings.SUGGESTIONS_SIZE]
 
+        cards = get_user_cards([suggested for suggested, _, _ in items])
+        return Response({'results': [
+            {'user': cards[suggested.pk], 'mutual_count': mutual, 'reason': reason}
+            for suggested, mutual, reason in items
+        ]})
 
-class CommentListView(generics.ListAPIView):
+
+class CommentListView(StreamingListMixin, AsyncListMixin, generics.ListAPIView):
     """Lista comentários de um post"""
     permission_classes = [IsAuthenticated]
     serializer_class = CommentSerializer
 
-    def get_queryset(self):
-        post_id = self.kwargs.get('pk')
-        get_object_or_404(Post, pk=post_id)
+    @conditional_get
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    @conditional_get
+    async def aget(self, request, *args, **kwargs):
+        return await super().aget(request, *args, **kwargs)
+
+    def get_etag(self, request):
+        # Comentários não são editados: a versão do post muda a cada comentário criado ou apagado
+        pk = self.kwargs.get('pk')
+        page = self.paginator.prepare_page(Comment.objects.filter(post_id=pk), request, self)
+        return conditional.page_etag(
+            None, request, page.values_list('id', 'user_id'), 'comments', pk, cache.get_version('post', pk)
+        )
+
+    def list(self, request, *args, **kwargs):
+        get_object_or_404(Post, pk=self.kwargs.get('pk'))
+        return super().list(request, *args, **kwargs)
 
+    async def alist(self, request, *args, **kwargs):
+        if not await Post.objects.filter(pk=self.kwargs.get('pk')).aexists():
+            raise Http404
+        return await super().alist(request, *args, **kwargs)
+
+    def get_queryset(self):
         return Comment.objects.filter(
-            post_id=post_id
-        ).select_related('user').order_by('-created_at')
\ No newline at end of file
+            post_id=self.kwargs.get('pk')
+        ).select_related('user').order_by('-created_at', '-id')
\ No newline at end of file
@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class ImageAsset(models.Model):
+    """
+    Imagem enviada pelo usuário: o original no storage e, depois que o worker
+    as gera, as variantes em cada largura e formato (ver images/pipeline.py).
+    """
+    POST = 'post'
+    AVATAR = 'avatar'
+    KIND_CHOICES = [
+        (POST, 'Imagem de post'),
+        (AVATAR, 'Foto de perfil'),
+    ]
+    PENDING = 'pending'
+    READY = 'ready'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Gerando variantes'),
+        (READY, 'Pronta'),
+        (FAILED, 'Falhou'),
+    ]
+
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='images')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    # Nome do arquivo original no storage padrão (STORAGES['default'])
+    original = models.CharField(max_length=255)
+    # Dimensões como a imagem é exibida (orientação do EXIF aplicada)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    # {'width', 'height', 'src', 'srcset': {formato: "url 320w, ..."}} quando pronta
+    variants = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.kind} image {self.pk} of {self.owner_id} ({self.status})"
@@ -0,0 +1,81 @@
+"""
+Upload de imagens e variantes responsivas.
+
+`POST /api/images/` grava o original no storage padrão (STORAGES['default']:
+disco local em desenvolvimento e nos testes, um bucket em produção) e agenda
+`tasks.generate_variants`, que codifica cada largura de IMAGES_POST_WIDTHS (ou
+IMAGES_AVATAR_SIZES, quadradas) em cada formato de IMAGES_FORMATS usando o
+pool de processos de processing.py. O cliente envia o id da imagem como
+`image_id` do post ou `profile_picture_id` do perfil; as variantes são
+copiadas para a linha do post/usuário, então o feed as serializa sem consulta
+extra, e o `srcset` deixa o navegador baixar só a largura de que precisa.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from jobs.queue import enqueue
+from . import tasks
+from .models import ImageAsset
+
+# Formatos aceitos no upload (nomes do Pillow) -> extensão do original
+UPLOAD_FORMATS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp', 'GIF': 'gif', 'AVIF': 'avif'}
+
+
+def sizes_for(asset):
+    """(largura, quadrada) das variantes do asset, sem ampliar o original."""
+    if asset.kind == ImageAsset.AVATAR:
+        side = min(asset.width, asset.height)
+        sizes = sorted({min(size, side) for size in settings.IMAGES_AVATAR_SIZES})
+        return [(size, True) for size in sizes]
+    widths = sorted({min(width, asset.width) for width in settings.IMAGES_POST_WIDTHS})
+    return [(width, False) for width in widths]
+
+
+def variant_name(asset, width, fmt):
+    folder = asset.original.rsplit('/', 1)[0]
+    return f'{folder}/{width}.{fmt}'
+
+
+def ingest(owner, upload, kind, fmt, width, height):
+    """Grava o original e agenda as variantes; devolve o ImageAsset (pronto se a fila for síncrona)."""
+    name = default_storage.save(f'images/{uuid.uuid4().hex}/original.{UPLOAD_FORMATS[fmt]}', upload)
+    asset = ImageAsset.objects.create(owner=owner, kind=kind, original=name, width=width, height=height)
+    enqueue(tasks.generate_variants, key=f'image-variants:{asset.pk}', asset_id=asset.pk)
+    if settings.JOBS_ALWAYS_EAGER:
+        asset.refresh_from_db()
+    return asset
+
+
+def build_variants(asset, encoded):
+    """Objeto `variants` a partir dos nomes gravados: {largura: {formato: nome}}."""
+    srcset = {}
+    for fmt in settings.IMAGES_FORMATS:
+        srcset[fmt] = ', '.join(
+            f'{default_storage.url(names[fmt])} {width}w' for width, names in encoded.items()
+        )
+    widths = list(encoded)
+    # `src` para quem ignora o srcset: a largura do meio no formato mais compatível (o último)
+    fallback = list(settings.IMAGES_FORMATS)[-1]
+    return {
+        'width': asset.width,
+        'height': asset.height,
+        'src': default_storage.url(encoded[widths[len(widths) // 2]][fallback]),
+        'srcset': srcset,
+    }
+
+
+def attach(asset):
+    """
+    `variants` do asset para copiar no post ou usuário que passa a usá-lo.
+    Trava a linha: se o worker terminar ao mesmo tempo, ou ele vê o novo
+    post/usuário ao propagar as variantes ou este vê as variantes prontas.
+    Chamar dentro de uma transação.
+    """
+    return ImageAsset.objects.select_for_update().values_list('variants', flat=True).get(pk=asset.pk)
+
+
+def url_of(asset):
+    """URL do original, guardada em `Post.image`/`User.profile_picture` para clientes antigos."""
+    return default_storage.url(asset.original)
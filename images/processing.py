@@ -0,0 +1,106 @@
+"""
+Redimensionamento e codificação das variantes, sem nada de Django.
+
+Cada largura é decodificada uma vez e codificada em todos os formatos. No
+JPEG, `draft` faz o decodificador já entregar a imagem reduzida (1/2, 1/4 ou
+1/8), bem mais barato que decodificar tudo e reduzir depois. As larguras vão
+em paralelo para um pool de processos (a codificação em AVIF/WebP prende a
+CPU e segura o GIL); com `processes=0` tudo roda no próprio processo.
+"""
+import io
+import math
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from PIL import Image, ImageOps
+
+# Tag EXIF de orientação; 5 a 8 giram a imagem 90°
+ORIENTATION = 0x0112
+
+_pool = None
+_pool_size = 0
+_pool_lock = threading.Lock()
+
+
+class ImageError(Exception):
+    """Arquivo que não pôde ser lido como imagem."""
+
+
+def display_size(image):
+    """Largura e altura como a imagem é exibida, já com a orientação do EXIF."""
+    width, height = image.size
+    if image.getexif().get(ORIENTATION) in (5, 6, 7, 8):
+        return height, width
+    return width, height
+
+
+def resize(data, width, square):
+    """Imagem reduzida para `width` de largura (quadrada com `square`), em RGB ou RGBA."""
+    image = Image.open(io.BytesIO(data))
+    shown_width, shown_height = display_size(image)
+    scale = width / (min(shown_width, shown_height) if square else shown_width)
+    if scale < 1:
+        raw_width, raw_height = image.size
+        image.draft('RGB', (math.ceil(raw_width * scale), math.ceil(raw_height * scale)))
+    image = ImageOps.exif_transpose(image)
+
+    has_alpha = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+    if square:
+        return ImageOps.fit(image, (width, width), Image.Resampling.LANCZOS)
+    height = max(1, round(shown_height * width / shown_width))
+    return image.resize((width, height), Image.Resampling.LANCZOS)
+
+
+def encode(data, width, square, formats):
+    """`{formato: (bytes, largura, altura)}` da imagem em `width` para cada `formats` (formato -> qualidade)."""
+    try:
+        image = resize(data, width, square)
+        encoded = {}
+        for fmt, quality in formats.items():
+            output = io.BytesIO()
+            image.save(output, format=fmt.upper(), quality=quality)
+            encoded[fmt] = (output.getvalue(), image.width, image.height)
+        return encoded
+    except (OSError, ValueError, Image.DecompressionBombError) as exc:
+        raise ImageError(f'{type(exc).__name__}: {exc}') from None
+
+
+def get_pool(processes):
+    global _pool, _pool_size
+    with _pool_lock:
+        if _pool is None or _pool_size != processes:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # `spawn`: um fork copiaria as threads e conexões abertas do processo pai
+            _pool = ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context('spawn'))
+            _pool_size = processes
+        return _pool
+
+
+def reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def encode_all(data, sizes, formats, processes):
+    """
+    `encode` para cada (largura, quadrada) de `sizes`, na mesma ordem. Um
+    processo do pool que morre (falta de memória, por exemplo) derruba o pool,
+    que é recriado na próxima chamada.
+    """
+    if not processes:
+        return [encode(data, width, square, formats) for width, square in sizes]
+
+    pool = get_pool(processes)
+    try:
+        futures = [pool.submit(encode, data, width, square, formats) for width, square in sizes]
+        return [future.result() for future in futures]
+    except BrokenProcessPool:
+        reset_pool()
+        raise
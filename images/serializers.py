@@ -0,0 +1,89 @@
+from django.conf import settings
+from PIL import Image
+from rest_framework import serializers
+
+from . import pipeline
+from .models import ImageAsset
+from .pipeline import UPLOAD_FORMATS
+from .processing import display_size
+
+
+class ImageUploadSerializer(serializers.Serializer):
+    """Entrada de POST /api/images/ (multipart): `file` e `kind` (`post` ou `avatar`)."""
+    file = serializers.FileField()
+    kind = serializers.ChoiceField(choices=ImageAsset.KIND_CHOICES, default=ImageAsset.POST)
+
+    def validate_file(self, upload):
+        if upload.size > settings.IMAGES_MAX_UPLOAD_BYTES:
+            raise serializers.ValidationError(
+                f"Arquivo maior que {settings.IMAGES_MAX_UPLOAD_BYTES // (1024 * 1024)} MB."
+            )
+        return upload
+
+    def validate(self, attrs):
+        """Lê só o cabeçalho (formato e dimensões), sem decodificar a imagem."""
+        upload = attrs['file']
+        try:
+            image = Image.open(upload)
+            fmt = image.format
+            width, height = display_size(image)
+        except (OSError, ValueError, Image.DecompressionBombError):
+            raise serializers.ValidationError({'file': "Arquivo não é uma imagem válida."})
+        if fmt not in UPLOAD_FORMATS:
+            raise serializers.ValidationError(
+                {'file': f"Formato {fmt} não suportado; use {', '.join(UPLOAD_FORMATS)}."}
+            )
+        if width * height > settings.IMAGES_MAX_PIXELS:
+            raise serializers.ValidationError(
+                {'file': f"Imagem com mais de {settings.IMAGES_MAX_PIXELS} pixels."}
+            )
+        upload.seek(0)
+        return {**attrs, 'fmt': fmt, 'width': width, 'height': height}
+
+
+class ImageAssetSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ImageAsset
+        fields = ['id', 'kind', 'status', 'width', 'height', 'variants', 'created_at']
+        read_only_fields = fields
+
+
+class ImageAssetField(serializers.PrimaryKeyRelatedField):
+    """
+    Id de uma imagem do próprio usuário, do tipo `kind`, para usar em um post
+    ou no perfil. Pode ainda estar gerando as variantes, mas não ter falhado.
+    """
+
+    def __init__(self, kind, **kwargs):
+        self.kind = kind
+        kwargs.setdefault('allow_null', True)
+        kwargs.setdefault('required', False)
+        super().__init__(**kwargs)
+
+    def get_queryset(self):
+        request = self.context.get('request')
+        if request is None or not request.user.is_authenticated:
+            return ImageAsset.objects.none()
+        return ImageAsset.objects.filter(owner=request.user, kind=self.kind).exclude(status=ImageAsset.FAILED)
+
+
+def resolve_image(attrs, instance, url_field, asset_field, variants_field):
+    """
+    Ajusta os `attrs` de um serializer com imagem: o asset define a URL (a do
+    original) e uma URL nova enviada sem asset descarta o asset e as variantes.
+    """
+    if asset_field in attrs:
+        asset = attrs[asset_field]
+        attrs[url_field] = pipeline.url_of(asset) if asset else None
+        attrs[variants_field] = None
+    elif url_field in attrs and (instance is None or attrs[url_field] != getattr(instance, url_field)):
+        attrs[asset_field] = None
+        attrs[variants_field] = None
+    return attrs
+
+
+def attach_variants(validated_data, asset_field, variants_field):
+    """Copia as variantes já prontas do asset escolhido; chamar dentro da transação do save."""
+    asset = validated_data.get(asset_field)
+    if asset is not None:
+        validated_data[variants_field] = pipeline.attach(asset)
@@ -0,0 +1,58 @@
+"""Geração das variantes pelo worker (ver images/pipeline.py)."""
+import logging
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from jobs.queue import task
+from posts.models import Post
+from . import pipeline, processing
+from .models import ImageAsset
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+
+@task()
+def generate_variants(asset_id):
+    """Codifica e grava as variantes e as copia para os posts/usuários que já usam a imagem."""
+    asset = ImageAsset.objects.filter(pk=asset_id, status=ImageAsset.PENDING).first()
+    if asset is None:
+        return
+
+    with default_storage.open(asset.original) as original:
+        data = original.read()
+    sizes = pipeline.sizes_for(asset)
+    try:
+        results = processing.encode_all(data, sizes, settings.IMAGES_FORMATS, settings.IMAGES_PROCESSES)
+    except processing.ImageError as exc:
+        # Arquivo corrompido: tentar de novo não adianta
+        logger.warning("Imagem %s inválida: %s", asset_id, exc)
+        ImageAsset.objects.filter(pk=asset_id).update(status=ImageAsset.FAILED)
+        return
+
+    encoded = {}
+    for (width, _square), formats in zip(sizes, results):
+        encoded[width] = {}
+        for fmt, (content, _width, _height) in formats.items():
+            # Nomes fixos: uma retentativa sobrescreve em vez de acumular arquivos
+            name = pipeline.variant_name(asset, width, fmt)
+            default_storage.delete(name)
+            encoded[width][fmt] = default_storage.save(name, ContentFile(content))
+    variants = pipeline.build_variants(asset, encoded)
+
+    # O UPDATE trava a linha como o `pipeline.attach`: um post criado agora ou
+    # já está commitado (e aparece abaixo) ou espera e lê as variantes prontas
+    ImageAsset.objects.filter(pk=asset_id).update(
+        status=ImageAsset.READY, variants=variants
+    )
+    # save() e não update(): os signals invalidam o cache dos posts e cards
+    for post in Post.objects.filter(image_asset_id=asset_id):
+        post.image_variants = variants
+        post.save(update_fields=['image_variants'])
+    for user in User.objects.filter(profile_picture_asset_id=asset_id):
+        user.profile_picture_variants = variants
+        user.save(update_fields=['profile_picture_variants'])
@@ -0,0 +1,92 @@
+import io
+import tempfile
+from pathlib import Path
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from posts.models import Post
+from users.models import User
+from .models import ImageAsset
+
+
+def api_client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def image_file(width, height, fmt='JPEG', name='foto.jpg'):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), (200, 40, 40)).save(buffer, fmt)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+@override_settings(
+    SECURE_SSL_REDIRECT=False,
+    JOBS_ALWAYS_EAGER=True,
+    IMAGES_PROCESSES=0,
+    IMAGES_POST_WIDTHS=[40, 80, 400],
+    IMAGES_AVATAR_SIZES=[16, 32],
+    IMAGES_FORMATS={'avif': 55, 'webp': 80},
+    MEDIA_URL='/media/',
+)
+class ImageUploadTest(TestCase):
+    """Upload com a fila síncrona e o disco local: variantes prontas na resposta"""
+
+    def setUp(self):
+        cache.clear()
+        media_root = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(self.settings(
+            MEDIA_ROOT=media_root,
+            STORAGES={
+                'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+                'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+            },
+        ))
+        self.media_root = Path(media_root)
+        self.user = User.objects.create(username='autor', email='autor@example.com')
+        self.client = api_client(self.user)
+
+    def upload(self, upload, kind='post'):
+        return self.client.post('/api/images/', {'file': upload, 'kind': kind}, format='multipart')
+
+    def test_post_image_has_srcset_per_format(self):
+        response = self.upload(image_file(200, 100))
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual((data['status'], data['width'], data['height']), (ImageAsset.READY, 200, 100))
+
+        variants = data['variants']
+        self.assertEqual(list(variants['srcset']), ['avif', 'webp'])
+        # Sem ampliar: 400 vira a largura do original
+        for fmt, srcset in variants['srcset'].items():
+            entries = [entry.split(' ') for entry in srcset.split(', ')]
+            self.assertEqual([width for _, width in entries], ['40w', '80w', '200w'])
+            for url, _ in entries:
+                self.assertTrue(url.startswith('/media/images/') and url.endswith(f'.{fmt}'))
+                path = self.media_root / url.removeprefix('/media/')
+                with Image.open(path) as variant:
+                    self.assertEqual(variant.format.lower(), fmt)
+        self.assertTrue(variants['src'].endswith('/80.webp'))
+
+        # O post copia as variantes e as serializa
+        post = self.client.post('/api/posts/', {'content': 'Com foto', 'image_id': data['id']}, format='json')
+        self.assertEqual(post.status_code, 201)
+        self.assertEqual(Post.objects.get().image_variants, variants)
+
+    def test_avatar_variants_are_square(self):
+        data = self.upload(image_file(60, 30, 'PNG', 'avatar.png'), kind='avatar').json()
+        self.assertEqual([entry.split(' ')[1] for entry in data['variants']['srcset']['webp'].split(', ')],
+                         ['16w', '30w'])
+        url = data['variants']['srcset']['webp'].split(', ')[-1].split(' ')[0]
+        with Image.open(self.media_root / url.removeprefix('/media/')) as variant:
+            self.assertEqual(variant.size, (30, 30))
+
+    def test_rejects_non_images(self):
+        response = self.upload(SimpleUploadedFile('nota.txt', b'not an image'))
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ImageAsset.objects.exists())
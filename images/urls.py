@@ -0,0 +1,10 @@
+from django.urls import path
+
+from .views import ImageDetailView, ImageUploadView
+
+app_name = "images"
+
+urlpatterns = [
+    path("", ImageUploadView.as_view(), name="image-upload"),
+    path("<int:pk>/", ImageDetailView.as_view(), name="image-detail"),
+]
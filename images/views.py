@@ -0,0 +1,38 @@
+from rest_framework import generics, status
+from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from . import pipeline
+from .models import ImageAsset
+from .serializers import ImageAssetSerializer, ImageUploadSerializer
+
+
+class ImageUploadView(generics.GenericAPIView):
+    """
+    Recebe uma imagem e agenda as variantes. Responde 201 se elas já estão
+    prontas (fila síncrona) ou 202 enquanto o worker as gera; o id já pode ir
+    no post ou no perfil e as variantes aparecem lá quando ficarem prontas.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser, FormParser]
+    serializer_class = ImageUploadSerializer
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        asset = pipeline.ingest(
+            request.user, data['file'], data['kind'], data['fmt'], data['width'], data['height']
+        )
+        code = status.HTTP_202_ACCEPTED if asset.status == ImageAsset.PENDING else status.HTTP_201_CREATED
+        return Response(ImageAssetSerializer(asset).data, status=code)
+
+
+class ImageDetailView(generics.RetrieveAPIView):
+    """Estado e variantes de uma imagem do próprio usuário"""
+    permission_classes = [IsAuthenticated]
+    serializer_class = ImageAssetSerializer
+
+    def get_queryset(self):
+        return ImageAsset.objects.filter(owner=self.request.user)
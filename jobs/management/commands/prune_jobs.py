@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from jobs import queue
+
+
+class Command(BaseCommand):
+    help = (
+        "Remove os jobs concluídos há mais de JOBS_KEEP_DONE_SECONDS "
+        "(liberando as chaves de idempotência). Rode periodicamente."
+    )
+
+    def handle(self, *args, **options):
+        deleted = queue.prune()
+        self.stdout.write(self.style.SUCCESS(f"{deleted} job(s) removido(s)."))
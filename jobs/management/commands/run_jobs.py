@@ -0,0 +1,61 @@
+import os
+import signal
+import socket
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from jobs import queue
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker da fila de jobs: executa as tarefas enfileiradas até receber "
+        "SIGTERM/SIGINT (termina o lote em andamento antes de sair)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Esvazia a fila e sai (útil em cron/scheduler e em testes)",
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=None,
+            help="Espera entre consultas com a fila vazia (padrão: JOBS_POLL_SECONDS)",
+        )
+
+    def handle(self, *args, **options):
+        sleep = options['sleep'] if options['sleep'] is not None else settings.JOBS_POLL_SECONDS
+        worker_id = f'{socket.gethostname()}:{os.getpid()}'[:100]
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        processed = failed = 0
+        last_check = 0.0
+        while not self.stopping:
+            # Worker de longa duração: descarta conexões que caíram ou passaram do CONN_MAX_AGE
+            close_old_connections()
+            if time.monotonic() - last_check >= settings.JOBS_LOCK_TIMEOUT_SECONDS / 10:
+                queue.requeue_stale()
+                last_check = time.monotonic()
+
+            func, jobs = queue.claim(worker_id)
+            if func is not None:
+                if queue.run(func, jobs):
+                    processed += len(jobs)
+                else:
+                    failed += len(jobs)
+            elif not jobs:
+                if options['once']:
+                    break
+                time.sleep(sleep)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{processed} job(s) executado(s), {failed} com erro."
+        ))
+
+    def stop(self, signum, frame):
+        self.stopping = True
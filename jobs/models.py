@@ -0,0 +1,40 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """Tarefa em segundo plano na fila do banco (ver jobs/queue.py)."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Na fila'),
+        (RUNNING, 'Executando'),
+        (DONE, 'Concluída'),
+        (FAILED, 'Falhou'),
+    ]
+
+    # Caminho da função (`posts.tasks.fan_out`)
+    name = models.CharField(max_length=200)
+    kwargs = models.JSONField(default=dict)
+    # Chave de idempotência: um segundo enqueue com a mesma chave é ignorado
+    key = models.CharField(max_length=200, unique=True, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField()
+    run_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='job_status_run_idx'),
+            models.Index(fields=['status', 'finished_at'], name='job_status_finished_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
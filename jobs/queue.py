@@ -0,0 +1,256 @@
+"""
+Fila de tarefas em segundo plano no próprio banco.
+
+Efeitos colaterais que não precisam acontecer antes da resposta (fan-out da
+timeline, aquecimento de cache...) são funções decoradas com `@task` e
+enfileiradas com `enqueue`. O job é uma linha gravada na mesma transação da
+escrita que o originou: se ela for desfeita, o job também é, e o worker nunca
+enxerga um id que ainda não foi commitado. O comando `run_jobs` consome a
+fila (SELECT ... FOR UPDATE SKIP LOCKED no PostgreSQL, então vários workers
+podem rodar juntos).
+
+- Retentativas: uma exceção reagenda o job com espera exponencial
+  (JOBS_RETRY_DELAY_SECONDS, dobrando a cada tentativa) até `max_attempts`;
+  depois disso ele fica como `failed` para inspeção.
+- Idempotência: `enqueue(..., key=...)` ignora uma chave já enfileirada ou
+  executada (enquanto o job não for removido por `prune_jobs`; jobs sem chave
+  são apagados assim que concluem, já que não há o que deduplicar). Um job
+  `failed` não prende a chave: o próximo enqueue com ela o substitui. A tarefa roda
+  na mesma transação que a marca como concluída, então um worker que cai no
+  meio não deixa efeito pela metade; o job volta para a fila depois de
+  JOBS_LOCK_TIMEOUT_SECONDS.
+- Lotes: uma tarefa com `batch_size > 1` recebe a lista de kwargs de até
+  `batch_size` jobs pendentes de uma vez.
+
+Com JOBS_ALWAYS_EAGER (padrão com DEBUG) as tarefas rodam na hora, dentro do
+`enqueue`, como se não houvesse fila: útil em desenvolvimento e nos testes.
+"""
+import json
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Min
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from social_api import metrics
+from social_api.db import insert_ignoring_conflicts
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+
+def task(max_attempts=None, batch_size=1):
+    """
+    Registra uma função como tarefa. Com `batch_size > 1` ela recebe uma lista
+    de kwargs (um por job) em vez dos kwargs de um job só.
+    """
+    def decorator(func):
+        func.job_name = f'{func.__module__}.{func.__name__}'
+        func.max_attempts = max_attempts
+        func.batch_size = batch_size
+        return func
+    return decorator
+
+
+def count(name, help_text, amount=1, **labels):
+    metrics.registry.increment(f'jobs_{name}', help_text, amount, **labels)
+
+
+def call(func, items):
+    if func.batch_size > 1:
+        func(items)
+    else:
+        for kwargs in items:
+            func(**kwargs)
+
+
+def enqueue(func, key=None, delay=None, **kwargs):
+    """
+    Enfileira `func(**kwargs)` (kwargs serializáveis em JSON). Com `key`, um
+    job pendente ou concluído com a mesma chave faz deste um no-op; um que
+    falhou é trocado por este. `delay` (segundos) adia a execução.
+    """
+    if settings.JOBS_ALWAYS_EAGER:
+        call(func, [kwargs])
+        return
+
+    now = timezone.now()
+    job = Job(
+        name=func.job_name,
+        kwargs=kwargs,
+        key=key,
+        max_attempts=func.max_attempts or settings.JOBS_MAX_ATTEMPTS,
+        run_at=now + timedelta(seconds=delay) if delay else now,
+        created_at=now,
+    )
+    if key is None:
+        job.save()
+    elif not insert_ignoring_conflicts([job], 'id'):
+        # Chave ocupada: só um job falho dá lugar ao novo (o DELETE só vem no conflito)
+        if not Job.objects.filter(key=key, status=Job.FAILED).delete()[0]:
+            return
+        insert_ignoring_conflicts([job], 'id')
+    count('enqueued_total', "Jobs enfileirados por tarefa", task=func.job_name)
+
+
+def enqueue_many(func, items):
+    """Enfileira um job por kwargs de `items` em um INSERT só (sem chave nem atraso)."""
+    items = list(items)
+    if not items:
+        return
+    if settings.JOBS_ALWAYS_EAGER:
+        call(func, items)
+        return
+
+    now = timezone.now()
+    max_attempts = func.max_attempts or settings.JOBS_MAX_ATTEMPTS
+    Job.objects.bulk_create([
+        Job(name=func.job_name, kwargs=kwargs, max_attempts=max_attempts, run_at=now, created_at=now)
+        for kwargs in items
+    ])
+    count('enqueued_total', "Jobs enfileirados por tarefa", len(items), task=func.job_name)
+
+
+def claim(worker_id, now=None):
+    """
+    Reserva o próximo lote: o job pendente mais antigo e, se a tarefa aceita
+    lotes, outros pendentes da mesma tarefa. Devolve (função, jobs) ou (None, []).
+    """
+    now = timezone.now() if now is None else now
+    with transaction.atomic():
+        due = Job.objects.select_for_update(skip_locked=True).filter(
+            status=Job.QUEUED, run_at__lte=now
+        ).order_by('run_at', 'id')
+        head = due.first()
+        if head is None:
+            return None, []
+
+        try:
+            func = import_string(head.name)
+        except ImportError:
+            logger.error("Tarefa %s não encontrada; job %s marcado como falho", head.name, head.pk)
+            Job.objects.filter(pk=head.pk).update(
+                status=Job.FAILED, finished_at=now, last_error=f"Tarefa {head.name} não encontrada"
+            )
+            return None, [head]
+
+        jobs = [head]
+        batch_size = getattr(func, 'batch_size', 1)
+        if batch_size > 1:
+            jobs += list(due.filter(name=head.name).exclude(pk=head.pk)[:batch_size - 1])
+
+        Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status=Job.RUNNING, attempts=F('attempts') + 1, started_at=now, locked_by=worker_id
+        )
+        for job in jobs:
+            job.attempts += 1
+            job.started_at = now
+    return func, jobs
+
+
+def retry_delay(attempts):
+    return settings.JOBS_RETRY_DELAY_SECONDS * 2 ** (attempts - 1)
+
+
+def run(func, jobs):
+    """Executa um lote reservado por `claim`; devolve True se deu certo."""
+    started = time.perf_counter()
+    ids = [job.pk for job in jobs]
+    try:
+        # Efeitos da tarefa e a marca de concluído entram juntos (ou nenhum)
+        with transaction.atomic():
+            call(func, [job.kwargs for job in jobs])
+            finished = Job.objects.filter(pk__in=ids)
+            finished.filter(key__isnull=True).delete()
+            finished.update(status=Job.DONE, finished_at=timezone.now(), last_error='')
+        status = 'done'
+    except Exception as exc:
+        logger.exception("Job %s falhou (ids %s)", func.job_name, ids)
+        status = fail(jobs, exc)
+
+    elapsed = time.perf_counter() - started
+    count('processed_total', "Jobs processados por tarefa e resultado", len(jobs), task=func.job_name, status=status)
+    logger.info(json.dumps({
+        'job': func.job_name,
+        'jobs': len(jobs),
+        'status': status,
+        'attempt': max(job.attempts for job in jobs),
+        # Da hora prevista até começar a rodar: o atraso da fila
+        'wait_ms': round(max((job.started_at - job.run_at).total_seconds() for job in jobs) * 1000, 2),
+        'run_ms': round(elapsed * 1000, 2),
+    }))
+    return status == 'done'
+
+
+def fail(jobs, exc):
+    """Reagenda os jobs do lote ou, sem tentativas restantes, marca como falhos."""
+    now = timezone.now()
+    error = f'{type(exc).__name__}: {exc}'[:2000]
+    status = 'retry'
+    for job in jobs:
+        if job.attempts >= job.max_attempts:
+            Job.objects.filter(pk=job.pk).update(status=Job.FAILED, finished_at=now, last_error=error)
+            status = 'failed'
+        else:
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.QUEUED,
+                run_at=now + timedelta(seconds=retry_delay(job.attempts)),
+                last_error=error,
+            )
+    return status
+
+
+def requeue_stale(now=None):
+    """Devolve à fila os jobs de workers que morreram no meio (sem tentativas, falham)."""
+    now = timezone.now() if now is None else now
+    stale = Job.objects.filter(
+        status=Job.RUNNING,
+        started_at__lt=now - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT_SECONDS),
+    )
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, finished_at=now, last_error="Worker interrompido"
+    )
+    requeued = stale.update(status=Job.QUEUED, run_at=now)
+    return requeued + failed
+
+
+def prune(now=None):
+    """Remove os jobs concluídos há mais de JOBS_KEEP_DONE_SECONDS (libera as chaves)."""
+    now = timezone.now() if now is None else now
+    deleted, _ = Job.objects.filter(
+        status=Job.DONE,
+        finished_at__lt=now - timedelta(seconds=settings.JOBS_KEEP_DONE_SECONDS),
+    ).delete()
+    return deleted
+
+
+def metric_lines():
+    """
+    Profundidade da fila e atraso do job pendente mais antigo, lidos do banco
+    a cada coleta: valem para a fila inteira, não só para este processo.
+    """
+    now = timezone.now()
+    rows = Job.objects.filter(
+        status__in=[Job.QUEUED, Job.RUNNING, Job.FAILED]
+    ).values('name', 'status').annotate(total=Count('id'), oldest=Min('run_at')).order_by('name', 'status')
+
+    lines = [
+        '# HELP social_api_jobs Jobs na fila por tarefa e estado',
+        '# TYPE social_api_jobs gauge',
+    ]
+    lag = {}
+    for row in rows:
+        lines.append(f'social_api_jobs{{task="{row["name"]}",status="{row["status"]}"}} {row["total"]}')
+        if row['status'] == Job.QUEUED:
+            lag[row['name']] = max(0.0, (now - row['oldest']).total_seconds())
+
+    lines += [
+        '# HELP social_api_jobs_lag_seconds Há quanto tempo o job pendente mais antigo deveria ter rodado',
+        '# TYPE social_api_jobs_lag_seconds gauge',
+    ]
+    lines += [f'social_api_jobs_lag_seconds{{task="{name}"}} {seconds}' for name, seconds in sorted(lag.items())]
+    return lines
@@ -0,0 +1,92 @@
+import io
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from . import queue
+from .models import Job
+
+# Chamadas das tarefas de teste abaixo, na ordem em que aconteceram
+calls = []
+
+
+@queue.task()
+def record(value):
+    calls.append(value)
+
+
+@queue.task(max_attempts=2)
+def explode(value):
+    raise ValueError(value)
+
+
+@queue.task(batch_size=3)
+def record_batch(items):
+    calls.append(sorted(item['value'] for item in items))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, JOBS_ALWAYS_EAGER=False, JOBS_RETRY_DELAY_SECONDS=10)
+class QueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def run_jobs(self):
+        call_command('run_jobs', '--once', stdout=io.StringIO())
+
+    def test_enqueue_dedupes_by_key(self):
+        queue.enqueue(record, key='record:1', value=1)
+        queue.enqueue(record, key='record:1', value=2)
+        self.assertEqual(list(Job.objects.values_list('kwargs', flat=True)), [{'value': 1}])
+
+        self.run_jobs()
+        self.assertEqual(calls, [1])
+        # Concluído e ainda não removido pelo prune_jobs: continua bloqueando a chave
+        queue.enqueue(record, key='record:1', value=3)
+        self.run_jobs()
+        self.assertEqual(calls, [1])
+
+    def test_retry_then_failed(self):
+        queue.enqueue(explode, key='explode:1', value='boom')
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            self.run_jobs()
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertEqual(job.last_error, 'ValueError: boom')
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=5))
+
+        # Ainda na espera: o worker não pega o job
+        self.assertEqual(queue.claim('test'), (None, []))
+
+        func, jobs = queue.claim('test', now=job.run_at)
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            self.assertFalse(queue.run(func, jobs))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_enqueue_replaces_failed_job_with_same_key(self):
+        queue.enqueue(record, key='record:1', value=1)
+        Job.objects.update(status=Job.FAILED, attempts=5, last_error='ValueError: boom')
+
+        queue.enqueue(record, key='record:1', value=2)
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts, job.kwargs), (Job.QUEUED, 0, {'value': 2}))
+        self.run_jobs()
+        self.assertEqual(calls, [2])
+
+    def test_run_jobs_claims_batches(self):
+        queue.enqueue_many(record_batch, [{'value': value} for value in range(5)])
+        queue.enqueue(record, value='single')
+
+        func, jobs = queue.claim('test')
+        self.assertIs(func, record_batch)
+        self.assertEqual([job.kwargs['value'] for job in jobs], [0, 1, 2])
+        self.assertEqual(Job.objects.filter(status=Job.RUNNING, locked_by='test').count(), 3)
+        self.assertTrue(queue.run(func, jobs))
+
+        self.run_jobs()
+        self.assertEqual(calls, [[0, 1, 2], [3, 4], 'single'])
+        # Sem chave: apagados assim que concluem
+        self.assertFalse(Job.objects.exists())
@@ -0,0 +1,74 @@
+"""
+Geração e leitura das notificações.
+
+Cada like, comentário ou follow vira um job (`notifications.tasks.deliver`,
+ver jobs/queue.py) em vez de uma notificação gravada na requisição. O worker
+pega os pendentes em lote, agrupa por (destinatário, grupo) e soma cada grupo
+na linha ainda não lida daquele grupo, criando-a se não houver: um post que
+recebe mil likes entre duas visitas do autor à caixa de entrada ocupa uma
+linha, não mil. Marcar como lida fecha a linha; a próxima interação abre outra.
+
+A contagem de não lidas é cacheada com a versão `notifications` do usuário
+(ver social_api/cache.py), trocada a cada entrega e a cada leitura.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from jobs.queue import enqueue, enqueue_many
+from social_api import cache
+from . import tasks
+from .models import Notification
+
+
+def event(recipient_id, verb, actor_id, post_id=None):
+    return {'recipient_id': recipient_id, 'verb': verb, 'actor_id': actor_id, 'post_id': post_id}
+
+
+def notify(recipient_id, verb, actor_id, post_id=None):
+    """Agenda a notificação (nada acontece se alguém interage com o próprio conteúdo)."""
+    if recipient_id != actor_id:
+        enqueue(tasks.deliver, **event(recipient_id, verb, actor_id, post_id))
+
+
+def likes_created(user_id, owners):
+    """Likes em lote: `owners` é {post_id: autor do post}."""
+    enqueue_many(tasks.deliver, [
+        event(owner_id, Notification.LIKE, user_id, post_id)
+        for post_id, owner_id in owners.items() if owner_id != user_id
+    ])
+
+
+def follows_created(user_id, followed_ids):
+    enqueue_many(tasks.deliver, [
+        event(followed_id, Notification.FOLLOW, user_id) for followed_id in followed_ids if followed_id != user_id
+    ])
+
+
+def unread_count(user_id):
+    version = cache.get_version('notifications', user_id)
+    return cache.get_or_set(
+        'notifications', f'unread:{user_id}:{version}',
+        lambda: Notification.objects.filter(recipient_id=user_id, read_at__isnull=True).count(),
+    )
+
+
+def mark_read(user_id, ids=None):
+    """Marca como lidas as notificações `ids` do usuário (todas, sem `ids`); devolve quantas."""
+    unread = Notification.objects.filter(recipient_id=user_id, read_at__isnull=True)
+    if ids is not None:
+        unread = unread.filter(pk__in=ids)
+    updated = unread.update(read_at=timezone.now())
+    if updated:
+        cache.bump_on_commit('notifications', user_id)
+    return updated
+
+
+def prune(now=None):
+    """Remove as notificações lidas há mais de NOTIFICATIONS_KEEP_DAYS dias."""
+    now = timezone.now() if now is None else now
+    deleted, _ = Notification.objects.filter(
+        read_at__lt=now - timedelta(days=settings.NOTIFICATIONS_KEEP_DAYS)
+    ).delete()
+    return deleted
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from notifications import delivery
+
+
+class Command(BaseCommand):
+    help = (
+        "Remove as notificações lidas há mais de NOTIFICATIONS_KEEP_DAYS dias. "
+        "Rode periodicamente."
+    )
+
+    def handle(self, *args, **options):
+        deleted = delivery.prune()
+        self.stdout.write(self.style.SUCCESS(f"{deleted} notificação(ões) removida(s)."))
@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+from posts.models import Post
+
+
+class Notification(models.Model):
+    """
+    Uma linha por grupo de interações ainda não lidas (ver notifications/delivery.py):
+    "Ana, Bruno e mais 40 pessoas curtiram seu post" é um registro só.
+    """
+    LIKE = 'like'
+    COMMENT = 'comment'
+    FOLLOW = 'follow'
+    VERB_CHOICES = [
+        (LIKE, 'Curtida'),
+        (COMMENT, 'Comentário'),
+        (FOLLOW, 'Novo seguidor'),
+    ]
+
+    recipient = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='notifications')
+    verb = models.CharField(max_length=10, choices=VERB_CHOICES)
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    # Interações não lidas com o mesmo grupo (`like:<post>`, `follow`...) somam nesta linha
+    group = models.CharField(max_length=50)
+    # Pessoas diferentes no grupo (ver notifications/tasks.py)
+    count = models.PositiveIntegerField(default=1)
+    # Autores mais recentes, do mais novo para o mais antigo (até NOTIFICATIONS_ACTORS)
+    actor_ids = models.JSONField(default=list)
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(default=timezone.now)
+    read_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            # Também é o índice da contagem de não lidas
+            models.UniqueConstraint(
+                fields=['recipient', 'group'],
+                condition=Q(read_at__isnull=True),
+                name='notification_unread_group_uniq',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['recipient', '-updated_at', '-id'], name='notification_inbox_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.verb} x{self.count} for {self.recipient_id}"
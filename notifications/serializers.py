@@ -0,0 +1,61 @@
+from django.conf import settings
+from rest_framework import serializers
+
+from users.serializers import get_user_cards_by_id
+from .models import Notification
+
+
+class NotificationListSerializer(serializers.ListSerializer):
+    """Busca os cards de todos os autores da página em uma ida ao cache."""
+
+    def to_representation(self, data):
+        notifications = list(data.all() if hasattr(data, 'all') else data)
+        self.context['user_cards'] = get_user_cards_by_id(
+            actor_id for notification in notifications for actor_id in notification.actor_ids
+        )
+        return super().to_representation(notifications)
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    """
+    Um grupo de interações: `actors` traz os mais recentes e `others` quantas
+    pessoas a mais o grupo tem ("Ana, Bruno e mais 40 pessoas...").
+    """
+    actors = serializers.SerializerMethodField()
+    others = serializers.SerializerMethodField()
+    read = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Notification
+        list_serializer_class = NotificationListSerializer
+        fields = ['id', 'verb', 'post_id', 'count', 'actors', 'others', 'read', 'created_at', 'updated_at']
+        read_only_fields = fields
+
+    def get_actors(self, notification):
+        cards = self.context.get('user_cards')
+        if cards is None:
+            cards = get_user_cards_by_id(notification.actor_ids)
+        # Autores que apagaram a conta somem da lista, mas continuam em `count`
+        return [cards[actor_id] for actor_id in notification.actor_ids if actor_id in cards]
+
+    def get_others(self, notification):
+        return max(0, notification.count - len(notification.actor_ids))
+
+    def get_read(self, notification):
+        return notification.read_at is not None
+
+
+class MarkReadSerializer(serializers.Serializer):
+    """Entrada de POST /api/notifications/read/: `ids` ou `all`."""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        allow_empty=False,
+        max_length=settings.BULK_MAX_ITEMS,
+    )
+    all = serializers.BooleanField(required=False, default=False)
+
+    def validate(self, attrs):
+        if not attrs['all'] and 'ids' not in attrs:
+            raise serializers.ValidationError("Informe `ids` ou `all: true`.")
+        return attrs
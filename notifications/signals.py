@@ -0,0 +1,26 @@
+"""Agenda as notificações de likes, comentários e follows criados um a um."""
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from follows.models import Follow
+from posts.models import Comment, Like
+from . import delivery
+from .models import Notification
+
+
+@receiver(post_save, sender=Like)
+def notify_like(sender, instance, created, **kwargs):
+    if created:
+        delivery.notify(instance.post.user_id, Notification.LIKE, instance.user_id, instance.post_id)
+
+
+@receiver(post_save, sender=Comment)
+def notify_comment(sender, instance, created, **kwargs):
+    if created:
+        delivery.notify(instance.post.user_id, Notification.COMMENT, instance.user_id, instance.post_id)
+
+
+@receiver(post_save, sender=Follow)
+def notify_follow(sender, instance, created, **kwargs):
+    if created:
+        delivery.notify(instance.followed_id, Notification.FOLLOW, instance.follower_id)
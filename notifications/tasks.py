@@ -0,0 +1,85 @@
+"""Entrega das notificações em lote pelo worker (ver notifications/delivery.py)."""
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from jobs.queue import task
+from posts.models import Post
+from social_api import cache
+from .models import Notification
+
+User = get_user_model()
+
+
+def group_for(verb, post_id):
+    return f'{verb}:{post_id}' if post_id else verb
+
+
+def merge_actors(actor_ids, new_ids):
+    """Autores mais recentes primeiro, sem repetição, limitados a NOTIFICATIONS_ACTORS."""
+    merged = list(dict.fromkeys([*reversed(new_ids), *actor_ids]))
+    return merged[:settings.NOTIFICATIONS_ACTORS]
+
+
+@task(batch_size=500)
+@transaction.atomic
+def deliver(events):
+    """Soma os autores novos (na ordem em que aconteceram) nas linhas não lidas de cada grupo."""
+    # Post ou destinatário apagados depois do evento: não há o que notificar
+    post_ids = {item['post_id'] for item in events if item['post_id']}
+    live_posts = set(Post.objects.filter(pk__in=post_ids).values_list('pk', flat=True))
+    live_users = set(User.objects.filter(
+        pk__in={item['recipient_id'] for item in events}
+    ).values_list('pk', flat=True))
+
+    groups = defaultdict(list)
+    for item in events:
+        if item['recipient_id'] in live_users and (not item['post_id'] or item['post_id'] in live_posts):
+            groups[(item['recipient_id'], group_for(item['verb'], item['post_id']))].append(item)
+    if not groups:
+        return
+
+    now = timezone.now()
+    recipients = {recipient_id for recipient_id, _ in groups}
+    existing = {
+        (notification.recipient_id, notification.group): notification
+        for notification in Notification.objects.select_for_update().filter(
+            recipient_id__in=recipients,
+            group__in={group for _, group in groups},
+            read_at__isnull=True,
+        )
+    }
+
+    changed, created = [], []
+    for key, items in groups.items():
+        actor_ids = [item['actor_id'] for item in items]
+        notification = existing.get(key)
+        if notification is None:
+            created.append(Notification(
+                recipient_id=key[0],
+                verb=items[0]['verb'],
+                post_id=items[0]['post_id'],
+                group=key[1],
+                count=len(set(actor_ids)),
+                actor_ids=merge_actors([], actor_ids),
+                created_at=now,
+                updated_at=now,
+            ))
+        else:
+            # `count` é de pessoas: quem já está no grupo (curtiu, descurtiu e curtiu
+            # de novo) não soma outra vez. Só os autores guardados em `actor_ids`
+            # são reconhecidos; um mais antigo que eles volta a contar
+            notification.count += len(set(actor_ids) - set(notification.actor_ids))
+            notification.actor_ids = merge_actors(notification.actor_ids, actor_ids)
+            notification.updated_at = now
+            changed.append(notification)
+
+    # Dois workers criando o mesmo grupo ao mesmo tempo: a restrição única falha
+    # e o lote volta para a fila, onde a nova tentativa encontra a linha
+    Notification.objects.bulk_create(created)
+    Notification.objects.bulk_update(changed, ['count', 'actor_ids', 'updated_at'])
+    for recipient_id in recipients:
+        cache.bump_on_commit('notifications', recipient_id)
@@ -0,0 +1,102 @@
+import io
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from jobs import queue
+from jobs.models import Job
+from posts.models import Post
+from users.models import User
+from . import tasks
+from .models import Notification
+
+
+def api_client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, JOBS_ALWAYS_EAGER=False, NOTIFICATIONS_ACTORS=3)
+class CoalescingTest(TestCase):
+    """Interações entre duas leituras somam em uma linha, entregues em lote pelo worker"""
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create(username='dono', email='dono@example.com')
+        self.post = Post.objects.create(user=self.owner, content='Post')
+        self.likers = [User.objects.create(username=f'fa{i}', email=f'fa{i}@example.com') for i in range(4)]
+
+    def like(self, user):
+        api_client(user).post(f'/api/posts/{self.post.pk}/like/')
+
+    def unlike(self, user):
+        api_client(user).delete(f'/api/posts/{self.post.pk}/unlike/')
+
+    def run_jobs(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('run_jobs', '--once', stdout=io.StringIO())
+
+    def inbox(self):
+        return api_client(self.owner).get('/api/notifications/').json()['results']
+
+    def test_likes_between_reads_share_a_row(self):
+        for liker in self.likers:
+            self.like(liker)
+        self.run_jobs()
+        [notification] = self.inbox()
+        self.assertEqual((notification['verb'], notification['count'], notification['others']), ('like', 4, 1))
+        self.assertEqual([actor['id'] for actor in notification['actors']],
+                         [liker.pk for liker in reversed(self.likers[1:])])
+
+        # Depois da leitura, o próximo like abre outra linha
+        api_client(self.owner).post('/api/notifications/read/', {'all': True}, format='json')
+        self.unlike(self.likers[0])
+        self.like(self.likers[0])
+        self.run_jobs()
+        self.assertEqual([(item['count'], item['read']) for item in self.inbox()], [(1, False), (4, True)])
+        self.assertEqual(api_client(self.owner).get('/api/notifications/unread-count/').json(), {'unread': 1})
+
+    def test_like_unlike_like_counts_the_actor_once(self):
+        liker, other = self.likers[:2]
+        # No mesmo lote
+        self.like(liker)
+        self.unlike(liker)
+        self.like(liker)
+        self.run_jobs()
+        self.assertEqual(Notification.objects.get().count, 1)
+
+        # Em lotes separados, com outra pessoa no meio
+        self.like(other)
+        self.run_jobs()
+        self.unlike(liker)
+        self.like(liker)
+        self.run_jobs()
+        notification = Notification.objects.get()
+        self.assertEqual(notification.count, 2)
+        self.assertEqual(notification.actor_ids, [liker.pk, other.pk])
+
+    def test_delivered_in_one_batch(self):
+        for liker in self.likers[:3]:
+            self.like(liker)
+        api_client(self.likers[3]).post(f'/api/follows/users/{self.owner.pk}/follow/')
+
+        func, jobs = queue.claim('test')
+        self.assertIs(func, tasks.deliver)
+        self.assertEqual(len(jobs), 4)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(queue.run(func, jobs))
+        self.assertFalse(Job.objects.exists())
+        self.assertEqual(
+            sorted(Notification.objects.values_list('verb', 'count')),
+            [(Notification.FOLLOW, 1), (Notification.LIKE, 3)],
+        )
+
+    def test_own_and_deleted_content_not_notified(self):
+        api_client(self.owner).post(f'/api/posts/{self.post.pk}/like/')
+        self.like(self.likers[0])
+        self.post.delete()
+        self.run_jobs()
+        self.assertFalse(Notification.objects.exists())
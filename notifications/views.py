@@ -0,0 +1,41 @@
+from rest_framework import generics
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from . import delivery
+from .models import Notification
+from .serializers import MarkReadSerializer, NotificationSerializer
+
+
+class NotificationListView(generics.ListAPIView):
+    """Caixa de entrada do usuário, grupos atualizados mais recentemente primeiro"""
+    permission_classes = [IsAuthenticated]
+    serializer_class = NotificationSerializer
+    keyset_ordering = ('-updated_at', '-id')
+
+    def get_queryset(self):
+        queryset = Notification.objects.filter(recipient=self.request.user)
+        if self.request.query_params.get('unread') in ('1', 'true'):
+            queryset = queryset.filter(read_at__isnull=True)
+        return queryset.order_by('-updated_at', '-id')
+
+
+class UnreadCountView(generics.GenericAPIView):
+    """Quantidade de notificações não lidas (do cache, sem consulta na maioria das vezes)"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response({'unread': delivery.unread_count(request.user.pk)})
+
+
+class MarkReadView(generics.GenericAPIView):
+    """Marca como lidas as notificações `ids` ou, com `all`, todas"""
+    permission_classes = [IsAuthenticated]
+    serializer_class = MarkReadSerializer
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = None if serializer.validated_data['all'] else serializer.validated_data['ids']
+        updated = delivery.mark_read(request.user.pk, ids)
+        return Response({'updated': updated, 'unread': delivery.unread_count(request.user.pk)})
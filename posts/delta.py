@@ -0,0 +1,96 @@
+"""
+Polling incremental do feed: o que mudou desde um instante (`since`).
+
+Em vez de buscar o feed inteiro a cada poucos segundos, o cliente manda o
+cursor da resposta anterior e recebe só os posts novos no feed, os ids dos
+posts apagados (PostTombstone) e os contadores dos posts do feed com likes ou
+comentários novos (Post.activity_at). Cada parte é uma varredura de intervalo
+em um índice de data, com custo proporcional ao que mudou.
+
+Um post entra no feed quando sua TimelineEntry é gravada (`inserted_at`),
+não quando foi criado: o fan-out feito pela fila de jobs, mesmo atrasado por
+um backlog, retentativas ou worker parado, aparece no polling seguinte. O
+cursor devolvido fica DELTA_OVERLAP_SECONDS antes do instante da consulta,
+para não perder escritas commitadas logo depois da leitura: um item pode vir
+em duas respostas seguidas e o cliente junta por id. Cursores mais antigos
+que DELTA_MAX_AGE_SECONDS (o tempo que os tombstones são guardados) ou
+mudanças acima dos limites pedem `reset`, isto é, recarregar o feed.
+"""
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from follows.models import Follow
+from . import timeline
+from .models import Post, PostTombstone, TimelineEntry
+
+
+def parse_since(value):
+    """
+    Instante de `since`: cursor de uma resposta anterior (ISO 8601) ou id do
+    post mais novo que o cliente tem. None se o post não existe mais.
+    Levanta ValueError se o valor for inválido.
+    """
+    if value.isdigit():
+        return Post.objects.filter(pk=value).values_list('created_at', flat=True).first()
+
+    since = parse_datetime(value)
+    if since is None:
+        raise ValueError(value)
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since, dt_timezone.utc)
+    return since
+
+
+def format_cursor(instant):
+    return instant.astimezone(dt_timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def next_cursor(now):
+    return format_cursor(now - timedelta(seconds=settings.DELTA_OVERLAP_SECONDS))
+
+
+def is_expired(since, now):
+    return since is None or since < now - timedelta(seconds=settings.DELTA_MAX_AGE_SECONDS)
+
+
+def new_posts(user, since, celebrity_ids):
+    """
+    Posts que entraram no feed de `user` a partir de `since`, mais novos
+    primeiro: entradas da timeline gravadas desde então e, dos autores
+    populares (lidos sem fan-out), os posts criados desde então.
+    """
+    entered = Q(id__in=TimelineEntry.objects.filter(user=user, inserted_at__gte=since).values('post_id'))
+    if celebrity_ids:
+        entered |= Q(user_id__in=celebrity_ids, created_at__gte=since)
+    return timeline.feed_queryset(user, celebrity_ids).filter(entered).order_by('-feed_at', '-id')
+
+
+def deleted_ids(user, since, limit):
+    """Ids dos posts apagados desde `since` cujos autores são `user` ou quem ele segue."""
+    return PostTombstone.objects.filter(deleted_at__gte=since).filter(
+        Q(author_id=user.pk)
+        | Q(author_id__in=Follow.objects.filter(follower=user).values('followed_id'))
+    ).order_by('-deleted_at').values_list('post_id', flat=True)[:limit]
+
+
+def changed_counters(user, since, celebrity_ids, limit):
+    """Contadores dos posts do feed de `user` com likes ou comentários desde `since`."""
+    in_feed = Q(Exists(TimelineEntry.objects.filter(user=user, post_id=OuterRef('pk'))))
+    if celebrity_ids:
+        in_feed |= Q(user_id__in=celebrity_ids)
+    return Post.objects.filter(activity_at__gte=since).filter(in_feed).order_by(
+        '-activity_at'
+    ).values('id', 'likes_count', 'comments_count')[:limit]
+
+
+def prune(now=None):
+    """Remove os tombstones que nenhum cursor válido ainda pode pedir."""
+    now = timezone.now() if now is None else now
+    deleted, _ = PostTombstone.objects.filter(
+        deleted_at__lt=now - timedelta(seconds=settings.DELTA_MAX_AGE_SECONDS)
+    ).delete()
+    return deleted
@@ -0,0 +1,106 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from follows import suggestions
+from follows.views import CommentListView, FollowersListView, FollowingListView
+from jobs.models import Job
+from notifications.models import Notification
+from posts import delta, trending
+from posts.models import TimelineEntry
+from posts.views import LikeListView, PostListCreateView
+from social_api.pagination import KeysetPagination
+from users.views import UserListView
+
+User = get_user_model()
+
+# (nome, view, kwargs da URL, índice que o plano deve usar)
+CHECKS = [
+    ('feed', PostListCreateView, {}, 'timeline_user_created_idx'),
+    ('comments', CommentListView, {'pk': 1}, 'comment_post_created_idx'),
+    ('likes', LikeListView, {'pk': 1}, 'like_post_created_idx'),
+    ('following', FollowingListView, {}, 'follow_follower_created_idx'),
+    ('followers', FollowersListView, {}, 'follow_followed_created_idx'),
+    ('users', UserListView, {}, 'user_joined_idx'),
+]
+
+# Queries fora das listagens paginadas: (nome, queryset, índice esperado)
+QUERY_CHECKS = [
+    ('trending', trending.top_queryset, 'postscore_rank_idx'),
+    ('suggestions', lambda: suggestions.for_user(User(pk=1)), 'suggestion_user_position_idx'),
+    ('delta (posts novos)', lambda: TimelineEntry.objects.filter(
+        user_id=1, inserted_at__gte=timezone.now()
+    ).values('post_id'), 'timeline_user_inserted_idx'),
+    ('delta (apagados)', lambda: delta.deleted_ids(User(pk=1), timezone.now(), 100), 'tombstone_deleted_idx'),
+    ('delta (contadores)', lambda: delta.changed_counters(User(pk=1), timezone.now(), [], 100), 'post_activity_idx'),
+    ('jobs (próximo da fila)', lambda: Job.objects.filter(
+        status=Job.QUEUED, run_at__lte=timezone.now()
+    ).order_by('run_at', 'id')[:1], 'job_status_run_idx'),
+    ('notificações', lambda: Notification.objects.filter(recipient_id=1).order_by('-updated_at', '-id')[:20],
+     'notification_inbox_idx'),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Roda EXPLAIN nas queries paginadas das views de listagem e falha se "
+        "algum plano não usar o índice esperado ou usar OFFSET."
+    )
+
+    def handle(self, *args, **options):
+        user = User(pk=1, username='explain')
+        failures = []
+
+        for name, view_class, kwargs, index in CHECKS:
+            for position in (None, self.sample_position(view_class)):
+                queryset = self.page_queryset(view_class, kwargs, user, position)
+                sql = str(queryset.query)
+                plan = queryset.explain()
+
+                label = f"{name} ({'cursor' if position else 'primeira página'})"
+                if index not in plan:
+                    failures.append(f"{label}: índice {index} não usado")
+                elif 'OFFSET' in sql.upper():
+                    failures.append(f"{label}: query usa OFFSET")
+                else:
+                    self.stdout.write(f"OK   {label}: {index}")
+
+                if options['verbosity'] > 1:
+                    self.stdout.write(plan)
+
+        for name, get_queryset, index in QUERY_CHECKS:
+            plan = get_queryset().explain()
+            if index not in plan:
+                failures.append(f"{name}: índice {index} não usado")
+            else:
+                self.stdout.write(f"OK   {name}: {index}")
+            if options['verbosity'] > 1:
+                self.stdout.write(plan)
+
+        if failures:
+            raise CommandError("Planos de query sem índice:\n" + "\n".join(failures))
+        self.stdout.write(self.style.SUCCESS("Todos os planos usam os índices esperados."))
+
+    def page_queryset(self, view_class, kwargs, user, position):
+        """Reproduz a queryset que a view pagina, sem executá-la."""
+        request = Request(APIRequestFactory().get('/'))
+        request.user = user
+
+        view = view_class()
+        view.setup(request, **kwargs)
+        view.request = request
+        view.format_kwarg = None
+
+        queryset = view.get_queryset()
+        paginator = KeysetPagination()
+        paginator.ordering = paginator.get_ordering(view)
+        return paginator.get_page_queryset(queryset, position)
+
+    def sample_position(self, view_class):
+        paginator = KeysetPagination()
+        return [
+            1 if field.lstrip('-') == 'id' else '2025-01-01T00:00:00+00:00'
+            for field in paginator.get_ordering(view_class)
+        ]
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts import delta
+
+
+class Command(BaseCommand):
+    help = (
+        "Remove os registros de posts apagados mais antigos que "
+        "DELTA_MAX_AGE_SECONDS (usados pelo polling do feed). Rode periodicamente."
+    )
+
+    def handle(self, *args, **options):
+        deleted = delta.prune()
+        self.stdout.write(self.style.SUCCESS(f"{deleted} tombstone(s) removido(s)."))
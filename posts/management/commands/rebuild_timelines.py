@@ -0,0 +1,31 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Reconstrói as timelines materializadas a partir dos posts e follows existentes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            action='append',
+            dest='user_ids',
+            help="ID de um usuário específico (pode ser repetido).",
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(is_active=True).order_by('id')
+        if options['user_ids']:
+            users = users.filter(id__in=options['user_ids'])
+
+        total = 0
+        for user in users.iterator(chunk_size=500):
+            timeline.rebuild_timeline(user)
+            total += 1
+
+        self.stdout.write(self.style.SUCCESS(f"{total} timeline(s) reconstruída(s)."))
@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from follows.models import Follow
+from posts.models import Comment, Like, Post
+
+User = get_user_model()
+
+
+def count_subquery(model, field):
+    """COUNT(*) correlacionado de `model` onde `field` aponta para a linha externa."""
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')}).order_by().values(field)
+        .annotate(total=Count('id')).values('total')
+    ), 0)
+
+
+class Command(BaseCommand):
+    help = "Recalcula contadores desnormalizados de posts e usuários que divergiram."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Apenas informa quantos registros divergem, sem corrigir.",
+        )
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        self.dry_run = options['dry_run']
+
+        fixed_posts = self.reconcile(Post, {
+            'likes_count': count_subquery(Like, 'post'),
+            'comments_count': count_subquery(Comment, 'post'),
+        })
+        fixed_users = self.reconcile(User, {
+            'followers_count': count_subquery(Follow, 'followed'),
+            'following_count': count_subquery(Follow, 'follower'),
+        })
+
+        verb = "divergente(s)" if self.dry_run else "corrigido(s)"
+        self.stdout.write(self.style.SUCCESS(
+            f"{fixed_posts} post(s) e {fixed_users} usuário(s) {verb}."
+        ))
+
+    def reconcile(self, model, counters):
+        """Percorre `model` em lotes por id e corrige as linhas com contador divergente."""
+        fixed = 0
+        last_id = 0
+
+        while True:
+            batch_ids = list(
+                model.objects.filter(pk__gt=last_id).order_by('pk')
+                .values_list('pk', flat=True)[:self.batch_size]
+            )
+            if not batch_ids:
+                return fixed
+            last_id = batch_ids[-1]
+
+            real = {f'real_{field}': expression for field, expression in counters.items()}
+            queryset = model.objects.filter(pk__in=batch_ids).annotate(**real)
+            drifted_ids = [
+                row['pk'] for row in queryset.values('pk', *counters, *real)
+                if any(row[field] != row[f'real_{field}'] for field in counters)
+            ]
+            if not drifted_ids:
+                continue
+
+            fixed += len(drifted_ids)
+            if not self.dry_run:
+                with transaction.atomic():
+                    model.objects.filter(pk__in=drifted_ids).update(**counters)
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = (
+        "Atualiza a lista de posts em alta no cache e remove da tabela de "
+        "pontuação os posts sem interações recentes. Rode periodicamente."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help="Recalcula todas as pontuações a partir dos likes e comentários da janela.",
+        )
+
+    def handle(self, *args, **options):
+        now = time.time()
+        if options['rebuild']:
+            scored = trending.rebuild(now)
+            self.stdout.write(f"{scored} post(s) pontuado(s).")
+        else:
+            pruned = trending.prune(now)
+            self.stdout.write(f"{pruned} post(s) sem interações recentes removido(s).")
+
+        top = trending.refresh_top()
+        self.stdout.write(self.style.SUCCESS(f"{len(top)} post(s) em alta no cache."))
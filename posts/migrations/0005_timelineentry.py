@@ -0,0 +1,48 @@
+# Generated by Django 5.2.8 on 2026-10-17 19:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_timelines(apps, schema_editor):
+    """Materializa as timelines a partir dos posts e follows já existentes."""
+    Post = apps.get_model('posts', 'Post')
+    Follow = apps.get_model('follows', 'Follow')
+    TimelineEntry = apps.get_model('posts', 'TimelineEntry')
+
+    batch = []
+    for post in Post.objects.only('id', 'user_id', 'created_at').iterator(chunk_size=1000):
+        follower_ids = Follow.objects.filter(followed_id=post.user_id).values_list('follower_id', flat=True)
+        for user_id in [post.user_id, *follower_ids]:
+            batch.append(TimelineEntry(user_id=user_id, post_id=post.id, created_at=post.created_at))
+        if len(batch) >= 1000:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_alter_post_content_alter_post_image'),
+        ('follows', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='posts.post')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-created_at'], name='timeline_user_created_idx')],
+                'unique_together': {('user', 'post')},
+            },
+        ),
+        migrations.RunPython(populate_timelines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-17 20:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_comment_comment_post_created_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostScore',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='score', serialize=False, to='posts.post')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-rank'], name='postscore_rank_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-17 21:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('images', '0001_initial'),
+        ('posts', '0009_post_activity_posttombstone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_asset',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='images.imageasset'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_variants',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:44
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def populate_inserted_at(apps, schema_editor):
+    # Entradas antigas contam como gravadas junto com o post, não agora
+    TimelineEntry = apps.get_model('posts', 'TimelineEntry')
+    TimelineEntry.objects.update(inserted_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_post_image_asset_post_image_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timelineentry',
+            name='inserted_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(populate_inserted_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', 'inserted_at'], name='timeline_user_inserted_idx'),
+        ),
+    ]
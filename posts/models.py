@@ -1,12 +1,29 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 class Post(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='posts')
     content = models.TextField(blank=True)
     image = models.URLField(max_length=500, blank=True, null=True)
+    # Imagem enviada por /api/images/ e cópia das variantes dela (o feed não faz JOIN)
+    image_asset = models.ForeignKey(
+        'images.ImageAsset', on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    image_variants = models.JSONField(null=True, blank=True)
+    # Contadores desnormalizados, atualizados com F() a cada like/comentário
+    likes_count = models.IntegerField(default=0)
+    comments_count = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Última mudança nos contadores (ver posts/delta.py)
+    activity_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='post_user_created_idx'),
+            models.Index(fields=['activity_at'], name='post_activity_idx'),
+        ]
 
     def __str__(self):
         return f"Post by {self.user} at {self.created_at}"
@@ -18,6 +35,9 @@ class Like(models.Model):
 
     class Meta:
         unique_together = ('user', 'post')
+        indexes = [
+            models.Index(fields=['post', '-created_at', '-id'], name='like_post_created_idx'),
+        ]
 
 class Comment(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -25,5 +45,62 @@ class Comment(models.Model):
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', '-created_at', '-id'], name='comment_post_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"Comment by {self.user} on {self.post.id}"
+
+class TimelineEntry(models.Model):
+    """Entrada materializada da timeline de um usuário (fan-out on write)."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='timeline_entries')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='timeline_entries')
+    # Cópia de post.created_at para ordenar sem JOIN
+    created_at = models.DateTimeField()
+    # Quando a entrada foi gravada: o polling do feed (posts/delta.py) vê um
+    # fan-out que a fila de jobs fez bem depois do post
+    inserted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='timeline_user_created_idx'),
+            models.Index(fields=['user', 'inserted_at'], name='timeline_user_inserted_idx'),
+        ]
+
+    def __str__(self):
+        return f"Timeline of {self.user_id}: post {self.post_id}"
+
+class PostScore(models.Model):
+    """
+    Pontuação de trending de um post (likes e comentários com decaimento
+    exponencial), em escala logarítmica para poder ser indexada: ver posts/trending.py.
+    """
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, primary_key=True, related_name='score')
+    rank = models.FloatField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-rank'], name='postscore_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"Score of post {self.post_id}: {self.rank}"
+
+
+class PostTombstone(models.Model):
+    """Post apagado recentemente, para o polling do feed avisar os clientes (ver posts/delta.py)."""
+    # Sem FK: o post (e às vezes o autor) já não existe
+    post_id = models.BigIntegerField(primary_key=True)
+    author_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['deleted_at'], name='tombstone_deleted_idx'),
+        ]
+
     def __str__(self):
-        return f"Comment by {self.user} on {self.post.id}"
\ No newline at end of file
+        return f"Tombstone of post {self.post_id}"
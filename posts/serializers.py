@@ -1,11 +1,17 @@
-from typing import Any, Dict
+from typing import Any, Dict, List
+from django.conf import settings
+from django.db import transaction
 from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 from .models import Post, Like, Comment
-from users.serializers import UserSerializer
+from images.models import ImageAsset
+from images.serializers import ImageAssetField, attach_variants, resolve_image
+from social_api import metrics
+from social_api.serializers import DynamicFieldsMixin
+from users.serializers import UserCardField, UserSerializer, get_user_cards
 
 
-class LikeSerializer(serializers.ModelSerializer):
+class LikeSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer de Like (somente leitura do usuário)."""
     user = UserSerializer(read_only=True)
 
@@ -15,7 +21,7 @@ class LikeSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer de Comment (id, usuário e timestamps somente leitura)."""
     user = UserSerializer(read_only=True)
 
@@ -25,50 +31,81 @@ class CommentSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'user', 'created_at']
 
 
-class PostSerializer(serializers.ModelSerializer):
-    """Serializer de Post com nested serializers para likes e comments."""
-    user = UserSerializer(read_only=True)
+class PostListSerializer(serializers.ListSerializer):
+    """Busca os cards de todos os autores da página em uma ida ao cache."""
+
+    def to_representation(self, data):
+        with metrics.timer('serialize'):
+            posts = list(data.all() if hasattr(data, 'all') else data)
+            self.context['user_cards'] = get_user_cards(post.user for post in posts)
+            return super().to_representation(posts)
+
+
+class PostSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """
+    Serializer compacto de Post para o feed: contadores, `liked_by_me` e os
+    comentários mais recentes. As listas completas de likes e comments só
+    entram com `?expand=likes,comments`.
+    """
+    user = UserCardField()
     likes = LikeSerializer(many=True, read_only=True)
     comments = CommentSerializer(many=True, read_only=True)
-    likes_count = serializers.SerializerMethodField()
-    comments_count = serializers.SerializerMethodField()
+    likes_count = serializers.IntegerField(read_only=True)
+    comments_count = serializers.IntegerField(read_only=True)
+    liked_by_me = serializers.SerializerMethodField()
+    recent_comments = serializers.SerializerMethodField()
     # Agora image é URLField
     image = serializers.URLField(required=False, allow_blank=True, allow_null=True)
+    # Imagem enviada por /api/images/; `image` passa a ser a URL do original
+    image_id = ImageAssetField(kind=ImageAsset.POST, source='image_asset', write_only=True)
+    # {'width', 'height', 'src', 'srcset': {formato: ...}}; null enquanto as variantes não ficam prontas
+    image_variants = serializers.JSONField(read_only=True)
 
     class Meta:
         model = Post
         fields = [
-            'id', 'user', 'content', 'image',
+            'id', 'user', 'content', 'image', 'image_id', 'image_variants',
             'created_at', 'updated_at',
+            'likes_count', 'comments_count',
+            'liked_by_me', 'recent_comments',
             'likes', 'comments',
-            'likes_count', 'comments_count'
         ]
-        read_only_fields = ['id', 'user', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'user', 'created_at', 'updated_at', 'likes_count', 'comments_count']
+        expandable_fields = ['likes', 'comments']
+        list_serializer_class = PostListSerializer
         extra_kwargs = {
             'image': {'required': False, 'allow_null': True, 'allow_blank': True},
             'content': {'required': False, 'allow_null': True, 'allow_blank': True},
         }
 
-    def get_likes_count(self, obj: Post) -> int:
-        """
-        Retorna likes_count. Se a queryset foi anotada (ex: .annotate(likes_count=...))
-        usa o valor anotado para evitar consultas adicionais.
-        """
-        annotated = getattr(obj, 'likes_count', None)
+    def get_liked_by_me(self, obj: Post) -> bool:
+        """Usa a anotação `liked_by_me` da view; sem ela, consulta o like do usuário."""
+        annotated = getattr(obj, 'liked_by_me', None)
         if annotated is not None:
-            return int(annotated)
-        return obj.likes.count()
+            return bool(annotated)
 
-    def get_comments_count(self, obj: Post) -> int:
-        annotated = getattr(obj, 'comments_count', None)
-        if annotated is not None:
-            return int(annotated)
-        return obj.comments.count()
+        request = self.context.get('request')
+        if request is None or not request.user.is_authenticated or not obj.likes_count:
+            return False
+        return obj.likes.filter(user=request.user).exists()
+
+    def get_recent_comments(self, obj: Post) -> List[Dict[str, Any]]:
+        """Usa o prefetch `recent_comments` da view; sem ele, busca os N mais recentes."""
+        comments = getattr(obj, 'recent_comments', None)
+        if comments is None and not obj.comments_count:
+            comments = []
+        elif comments is None:
+            comments = obj.comments.select_related('user').order_by(
+                '-created_at', '-id'
+            )[:settings.FEED_RECENT_COMMENTS]
+        return CommentSerializer(comments, many=True).data
 
     def validate(self, attrs: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Validação: exige ao menos 'content' não vazio ou 'image' URL válida.
+        Validação: exige ao menos 'content' não vazio ou 'image' URL válida
+        (ou `image_id`, que a preenche).
         """
+        attrs = resolve_image(attrs, self.instance, 'image', 'image_asset', 'image_variants')
         content = attrs.get('content') or ''
         content_stripped = content.strip() if isinstance(content, str) else content
         image = attrs.get('image') or ''
@@ -79,4 +116,28 @@ class PostSerializer(serializers.ModelSerializer):
                 {"non_field_errors": [_("Content or image is required.")]},
                 code='required'
             )
-        return attrs
\ No newline at end of file
+        return attrs
+
+    @transaction.atomic
+    def create(self, validated_data):
+        attach_variants(validated_data, 'image_asset', 'image_variants')
+        return super().create(validated_data)
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        attach_variants(validated_data, 'image_asset', 'image_variants')
+        return super().update(instance, validated_data)
+
+
+class BulkLikeSerializer(serializers.Serializer):
+    """Entrada de POST /api/posts/likes/bulk/"""
+    action = serializers.ChoiceField(choices=['like', 'unlike'])
+    post_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.BULK_MAX_ITEMS,
+    )
+
+    def validate_post_ids(self, value):
+        # Remove duplicados mantendo a ordem enviada
+        return list(dict.fromkeys(value))
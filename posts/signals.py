@@ -0,0 +1,47 @@
+"""
+Invalidação do cache de posts quando posts, likes ou comentários mudam,
+pontuação de trending a cada like ou comentário novo (e a cada like desfeito)
+e tombstones dos posts apagados para o polling do feed.
+"""
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from social_api import cache
+from . import trending
+from .models import Comment, Like, Post, PostTombstone
+
+
+@receiver([post_save, post_delete], sender=Post)
+def invalidate_post(sender, instance, **kwargs):
+    cache.bump_on_commit('post', instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def record_tombstone(sender, instance, **kwargs):
+    PostTombstone.objects.create(post_id=instance.pk, author_id=instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=Like)
+@receiver([post_save, post_delete], sender=Comment)
+def invalidate_post_interactions(sender, instance, **kwargs):
+    cache.bump_on_commit('post', instance.post_id)
+
+
+@receiver(post_save, sender=Like)
+def score_like(sender, instance, created, **kwargs):
+    if created:
+        trending.record_on_commit([instance.post_id], settings.TRENDING_LIKE_WEIGHT)
+
+
+@receiver(post_delete, sender=Like)
+def unscore_like(sender, instance, origin=None, **kwargs):
+    # Só o unlike: em cascata (post ou conta apagados) seria um UPDATE por like
+    if getattr(origin, 'model', type(origin)) is Like:
+        trending.discount_on_commit([(instance.post_id, instance.created_at)], settings.TRENDING_LIKE_WEIGHT)
+
+
+@receiver(post_save, sender=Comment)
+def score_comment(sender, instance, created, **kwargs):
+    if created:
+        trending.record_on_commit([instance.post_id], settings.TRENDING_COMMENT_WEIGHT)
@@ -0,0 +1,13 @@
+"""Tarefas em segundo plano dos posts (ver jobs/queue.py)."""
+from jobs.queue import task
+from . import timeline
+from .models import Post
+
+
+@task()
+def fan_out(post_id):
+    """Copia o post para a timeline dos seguidores do autor."""
+    post = Post.objects.filter(pk=post_id).only('id', 'user_id', 'created_at').first()
+    # Apagado antes de o worker chegar nele: nada a distribuir
+    if post is not None:
+        timeline.fan_out_to_followers(post)
@@ -1,3 +1,471 @@
-from django.test import TestCase
+import io
+import json
+from base64 import urlsafe_b64encode
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from follows.models import Follow
+from posts import delta, trending, views
+from jobs.models import Job
+from posts.models import Like, Post, PostScore, TimelineEntry
+from social_api import cache as versioned_cache
+from users.models import User
+
+
+def make_cursor(position):
+    return urlsafe_b64encode(json.dumps(position).encode('utf-8')).decode('ascii')
+
+
+def api_client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class KeysetCursorTest(TestCase):
+    """Cursores adulterados viram 404, nunca 500"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='ana', email='ana@example.com', password='senha')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_invalid_values(self):
+        for path in ['/api/posts/', '/api/auth/list/', '/api/follows/following/']:
+            for position in [['abc', 1], [{'a': 1}, 1], ['2024-01-01T00:00:00', 'x'], [None, 1]]:
+                with self.subTest(path=path, position=position):
+                    response = self.client.get(path, {'cursor': make_cursor(position)})
+                    self.assertEqual(response.status_code, 404)
+
+    def test_valid_cursor(self):
+        response = self.client.get('/api/posts/', {'cursor': make_cursor(['2024-01-01T00:00:00+00:00', 5])})
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, JOBS_ALWAYS_EAGER=True)
+class QueryCountTest(TestCase):
+    """
+    Feed, comentários, curtidas e detalhe do post rodam o mesmo número de
+    queries com 2 e com 15 itens (cache frio nas duas medições).
+    """
+    sizes = (2, 15)
+
+    def setUp(self):
+        cache.clear()
+        self.viewer = User.objects.create(username='leitor', email='leitor@example.com')
+        self.client = api_client(self.viewer)
+        owner = User.objects.create(username='dono', email='dono@example.com')
+        self.post_id = api_client(owner).post('/api/posts/', {'content': 'Post do dono'}, format='json').json()['id']
+        self.items = 0
+
+    def grow(self, size):
+        """
+        Cada item é um autor seguido pelo leitor, com um post curtido pelo
+        leitor e comentado, que também curte e comenta o post do dono.
+        """
+        while self.items < size:
+            author = User.objects.create(username=f'autor{self.items}', email=f'autor{self.items}@example.com')
+            client = api_client(author)
+            self.client.post(f'/api/follows/users/{author.pk}/follow/')
+            post_id = client.post('/api/posts/', {'content': f'Post {self.items}'}, format='json').json()['id']
+            self.client.post(f'/api/posts/{post_id}/like/')
+            for target in (post_id, self.post_id):
+                client.post(f'/api/posts/{target}/comment/', {'content': 'Comentário'}, format='json')
+            client.post(f'/api/posts/{self.post_id}/like/')
+            self.items += 1
+
+    def assertConstantQueries(self, path, num, listing=True):
+        for size in self.sizes:
+            self.grow(size)
+            cache.clear()
+            with self.subTest(items=size):
+                with self.assertNumQueries(num):
+                    response = self.client.get(path)
+                self.assertEqual(response.status_code, 200)
+                if listing:
+                    self.assertEqual(len(response.json()['results']), size)
+
+    def test_feed(self):
+        # Celebridades seguidas (uma vez para a ETag e a página), ETag, página e comentários recentes
+        self.assertConstantQueries('/api/posts/', 4)
+
+    def test_comments(self):
+        self.assertConstantQueries(f'/api/posts/{self.post_id}/comments/', 3)
+
+    def test_likes(self):
+        self.assertConstantQueries(f'/api/posts/{self.post_id}/likes/', 2)
+
+    def test_post_detail(self):
+        self.assertConstantQueries(f'/api/posts/{self.post_id}/', 3, listing=False)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class BulkLikeCounterTest(TestCase):
+    def test_concurrent_like_not_counted_twice(self):
+        """Uma curtida gravada entre a leitura e o INSERT não soma de novo no contador."""
+        user = User.objects.create(username='leitor', email='leitor@example.com')
+        posts = [Post.objects.create(user=user, content=f'Post {i}') for i in range(2)]
+
+        def concurrent_insert(objs, returning):
+            # Outra requisição curte o primeiro post e faz commit antes do nosso INSERT
+            Like.objects.create(user=user, post=posts[0])
+            Post.objects.filter(pk=posts[0].pk).update(likes_count=1)
+            return insert_ignoring_conflicts(objs, returning)
+
+        insert_ignoring_conflicts = views.insert_ignoring_conflicts
+        with mock.patch.object(views, 'insert_ignoring_conflicts', concurrent_insert):
+            response = api_client(user).post(
+                '/api/posts/likes/bulk/', {'action': 'like', 'post_ids': [post.pk for post in posts]}, format='json'
+            )
+
+        self.assertEqual(response.json()['changed'], 1)
+        self.assertEqual(response.json()['results'][0]['status'], 'already_liked')
+        self.assertEqual(
+            list(Post.objects.filter(pk__in=[post.pk for post in posts]).order_by('pk').values_list('likes_count', flat=True)),
+            [1, 1],
+        )
+
+    def test_concurrent_unlike_not_counted_twice(self):
+        """Uma curtida apagada entre a leitura e o DELETE não desconta de novo no contador."""
+        user = User.objects.create(username='leitor', email='leitor@example.com')
+        client = api_client(user)
+        posts = [Post.objects.create(user=user, content=f'Post {i}') for i in range(2)]
+        post_ids = [post.pk for post in posts]
+        client.post('/api/posts/likes/bulk/', {'action': 'like', 'post_ids': post_ids}, format='json')
+        version = versioned_cache.get_version('post', posts[1].pk)
+
+        def concurrent_delete(queryset, *returning):
+            # Outra requisição descurte o primeiro post e faz commit antes do nosso DELETE
+            Like.objects.filter(user=user, post=posts[0]).delete()
+            Post.objects.filter(pk=posts[0].pk).update(likes_count=0)
+            return delete_returning(queryset, *returning)
+
+        delete_returning = views.delete_returning
+        with self.captureOnCommitCallbacks(execute=True):
+            with mock.patch.object(views, 'delete_returning', concurrent_delete):
+                response = client.post('/api/posts/likes/bulk/', {'action': 'unlike', 'post_ids': post_ids}, format='json')
+
+        self.assertEqual(response.json()['changed'], 1)
+        self.assertEqual([item['status'] for item in response.json()['results']], ['not_liked', 'unliked'])
+        self.assertEqual(
+            list(Post.objects.filter(pk__in=post_ids).order_by('pk').values_list('likes_count', flat=True)), [0, 0]
+        )
+        self.assertNotEqual(versioned_cache.get_version('post', posts[1].pk), version)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, JOBS_ALWAYS_EAGER=True)
+class ConditionalGetTest(TestCase):
+    """
+    If-None-Match com a ETag atual responde 304 sem serializar nada, com no
+    máximo as queries da ETag; likes e comentários trocam a ETag (as versões
+    do cache mudam no commit, daí o captureOnCommitCallbacks).
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='leitor', email='leitor@example.com')
+        self.client = api_client(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post_id = self.client.post('/api/posts/', {'content': 'Post'}, format='json').json()['id']
+            self.client.post(f'/api/posts/{self.post_id}/comment/', {'content': 'Comentário'}, format='json')
+
+    def assertNotModified(self, path, num):
+        """Devolve a ETag de `path` depois de conferir o 304 com `num` queries."""
+        etag = self.client.get(path)['ETag']
+        with self.assertNumQueries(num):
+            response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+        return etag
+
+    def assertModified(self, path, etag):
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        return response
+
+    def test_post_detail(self):
+        path = f'/api/posts/{self.post_id}/'
+        etag = self.assertNotModified(path, 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/posts/{self.post_id}/like/')
+        self.assertEqual(self.assertModified(path, etag).json()['likes_count'], 1)
+
+    def test_comments(self):
+        path = f'/api/posts/{self.post_id}/comments/'
+        etag = self.assertNotModified(path, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/posts/{self.post_id}/comment/', {'content': 'Outro'}, format='json')
+        self.assertEqual(len(self.assertModified(path, etag).json()['results']), 2)
+
+    def test_feed(self):
+        etag = self.assertNotModified('/api/posts/', 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/posts/{self.post_id}/like/')
+        etag = self.assertModified('/api/posts/', etag)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/posts/{self.post_id}/comment/', {'content': 'Outro'}, format='json')
+        self.assertEqual(self.assertModified('/api/posts/', etag).json()['results'][0]['comments_count'], 2)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, JOBS_ALWAYS_EAGER=False)
+class DeltaFanOutTest(TestCase):
+    def test_late_fan_out_reaches_delta(self):
+        """Um fan-out que a fila só fez bem depois do post ainda aparece no delta."""
+        author = User.objects.create(username='autor', email='autor@example.com')
+        follower = User.objects.create(username='leitor', email='leitor@example.com')
+        Follow.objects.create(follower=follower, followed=author)
+
+        post_id = api_client(author).post('/api/posts/', {'content': 'Post'}, format='json').json()['id']
+        # O post foi criado um minuto antes de o worker chegar ao job
+        Post.objects.filter(pk=post_id).update(created_at=timezone.now() - timedelta(minutes=1))
+        since = delta.format_cursor(timezone.now() - timedelta(seconds=10))
+        call_command('run_jobs', '--once', stdout=io.StringIO())
+
+        response = api_client(follower).get('/api/posts/delta/', {'since': since})
+        self.assertFalse(response.json()['reset'])
+        self.assertEqual([post['id'] for post in response.json()['posts']], [post_id])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, JOBS_ALWAYS_EAGER=True)
+class TimelineTest(TestCase):
+    """Fan-out na escrita, poda ao deixar de seguir, backfill ao seguir e celebridades na leitura"""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username='autor', email='autor@example.com')
+        self.followers = [
+            User.objects.create(username=f'seguidor{i}', email=f'seguidor{i}@example.com') for i in range(2)
+        ]
+        for follower in self.followers:
+            api_client(follower).post(f'/api/follows/users/{self.author.pk}/follow/')
+        self.outsider = User.objects.create(username='outro', email='outro@example.com')
+
+    def publish(self, content='Post'):
+        return api_client(self.author).post('/api/posts/', {'content': content}, format='json').json()['id']
+
+    def feed_ids(self, user):
+        return [post['id'] for post in api_client(user).get('/api/posts/').json()['results']]
+
+    def test_post_reaches_followers(self):
+        post_id = self.publish()
+        self.assertEqual(
+            set(TimelineEntry.objects.filter(post_id=post_id).values_list('user_id', flat=True)),
+            {self.author.pk, *(follower.pk for follower in self.followers)},
+        )
+        for user in [self.author, *self.followers]:
+            self.assertEqual(self.feed_ids(user), [post_id])
+        self.assertEqual(self.feed_ids(self.outsider), [])
+
+    @override_settings(JOBS_ALWAYS_EAGER=False)
+    def test_fan_out_runs_on_the_queue(self):
+        post_id = self.publish()
+        # Na requisição só a timeline do autor; a dos seguidores fica para o job
+        self.assertEqual(list(TimelineEntry.objects.filter(post_id=post_id).values_list('user_id', flat=True)),
+                         [self.author.pk])
+        self.assertEqual(Job.objects.get().key, f'fan-out:{post_id}')
+        self.assertEqual(self.feed_ids(self.followers[0]), [])
+
+        call_command('run_jobs', '--once', stdout=io.StringIO())
+        self.assertEqual(self.feed_ids(self.followers[0]), [post_id])
+
+    @override_settings(JOBS_ALWAYS_EAGER=False)
+    def test_fan_out_of_deleted_post(self):
+        post_id = self.publish()
+        api_client(self.author).delete(f'/api/posts/{post_id}/')
+        call_command('run_jobs', '--once', stdout=io.StringIO())
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(Job.objects.get().status, Job.DONE)
+
+    def test_unfollow_prunes(self):
+        post_id = self.publish()
+        follower = self.followers[0]
+        api_client(follower).delete(f'/api/follows/users/{self.author.pk}/unfollow/')
+        self.assertFalse(TimelineEntry.objects.filter(user=follower, post_id=post_id).exists())
+        self.assertEqual(self.feed_ids(follower), [])
+        self.assertEqual(self.feed_ids(self.followers[1]), [post_id])
+
+    @override_settings(TIMELINE_BACKFILL_LIMIT=2)
+    def test_follow_backfills_recent_posts(self):
+        post_ids = [self.publish(f'Post {i}') for i in range(3)]
+        api_client(self.outsider).post(f'/api/follows/users/{self.author.pk}/follow/')
+        # Só os TIMELINE_BACKFILL_LIMIT mais recentes, mais novos primeiro
+        self.assertEqual(self.feed_ids(self.outsider), post_ids[:0:-1])
+
+    @override_settings(TIMELINE_CELEBRITY_THRESHOLD=2)
+    def test_celebrity_merged_on_read(self):
+        follower = self.followers[0]
+        own_post = api_client(follower).post('/api/posts/', {'content': 'Meu post'}, format='json').json()['id']
+        post_id = self.publish()
+        # Autor com 2 seguidores é celebridade: sem fan-out, lido junto com a timeline
+        self.assertFalse(TimelineEntry.objects.filter(user=follower, post_id=post_id).exists())
+        self.assertEqual(self.feed_ids(follower), [post_id, own_post])
+        self.assertEqual(self.feed_ids(self.outsider), [])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, JOBS_ALWAYS_EAGER=True)
+class CounterTest(TestCase):
+    """Contadores desnormalizados atualizados com F() e corrigidos pelo reconcile_counters"""
+
+    def setUp(self):
+        self.author = User.objects.create(username='autor', email='autor@example.com')
+        self.reader = User.objects.create(username='leitor', email='leitor@example.com')
+        self.client = api_client(self.reader)
+        self.post = Post.objects.create(user=self.author, content='Post')
+
+    def counters(self):
+        self.post.refresh_from_db()
+        return self.post.likes_count, self.post.comments_count
+
+    def test_like_unlike_comment(self):
+        self.assertEqual(self.client.post(f'/api/posts/{self.post.pk}/like/').status_code, 201)
+        self.client.post(f'/api/posts/{self.post.pk}/like/')
+        self.assertEqual(self.counters(), (1, 0))
+        self.client.post(f'/api/posts/{self.post.pk}/comment/', {'content': 'Comentário'}, format='json')
+        self.assertEqual(self.counters(), (1, 1))
+        self.assertEqual(self.client.delete(f'/api/posts/{self.post.pk}/unlike/').status_code, 200)
+        self.assertEqual(self.client.delete(f'/api/posts/{self.post.pk}/unlike/').status_code, 404)
+        self.assertEqual(self.counters(), (0, 1))
+
+    def test_reconcile_counters(self):
+        Like.objects.create(user=self.reader, post=self.post)
+        Follow.objects.create(follower=self.reader, followed=self.author)
+        Post.objects.filter(pk=self.post.pk).update(likes_count=7, comments_count=3)
+        User.objects.filter(pk=self.author.pk).update(followers_count=5)
+
+        out = io.StringIO()
+        call_command('reconcile_counters', '--dry-run', stdout=out)
+        self.assertIn('1 post(s) e 2 usuário(s) divergente(s)', out.getvalue())
+        self.assertEqual(self.counters(), (7, 3))
+
+        out = io.StringIO()
+        call_command('reconcile_counters', '--batch-size', '1', stdout=out)
+        self.assertIn('1 post(s) e 2 usuário(s) corrigido(s)', out.getvalue())
+        self.assertEqual(self.counters(), (1, 0))
+        self.author.refresh_from_db()
+        self.reader.refresh_from_db()
+        self.assertEqual((self.author.followers_count, self.reader.following_count), (1, 1))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class CacheInvalidationTest(TestCase):
+    """Editar o post ou o autor troca a versão e o detalhe em cache deixa de ser servido"""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username='autor', email='autor@example.com')
+        self.client = api_client(self.author)
+        self.post = Post.objects.create(user=self.author, content='Original')
+
+    def detail(self):
+        return self.client.get(f'/api/posts/{self.post.pk}/').json()
+
+    def test_edit_post(self):
+        self.assertEqual(self.detail()['content'], 'Original')
+        version = versioned_cache.get_version('post', self.post.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f'/api/posts/{self.post.pk}/', {'content': 'Editado'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(versioned_cache.get_version('post', self.post.pk), version)
+        self.assertEqual(self.detail()['content'], 'Editado')
+
+    def test_edit_author(self):
+        self.assertEqual(self.detail()['user']['first_name'], '')
+        post_version = versioned_cache.get_version('post', self.post.pk)
+        user_version = versioned_cache.get_version('user', self.author.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch('/api/auth/profile/', {'first_name': 'Ana'}, format='json')
+        self.assertNotEqual(versioned_cache.get_version('user', self.author.pk), user_version)
+        # O post em si não muda; o card do autor vem do cache de cards, com a versão nova
+        self.assertEqual(versioned_cache.get_version('post', self.post.pk), post_version)
+        self.assertEqual(self.detail()['user']['first_name'], 'Ana')
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, TRENDING_HALF_LIFE_HOURS=1.0, TRENDING_LIKE_WEIGHT=1.0,
+                   TRENDING_COMMENT_WEIGHT=3.0)
+class TrendingTest(TestCase):
+    """Pontuação com decaimento, ordem do ranking e like desfeito"""
+    hour = 3600
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username='autor', email='autor@example.com')
+        self.readers = [User.objects.create(username=f'leitor{i}', email=f'leitor{i}@example.com') for i in range(3)]
+        self.posts = [Post.objects.create(user=self.author, content=f'Post {i}') for i in range(3)]
+
+    def score(self, post, now=None):
+        return trending.current_score(PostScore.objects.get(post=post).rank, now)
+
+    def age_likes(self, hours):
+        Like.objects.update(created_at=timezone.now() - timedelta(hours=hours))
+
+    def test_decay(self):
+        now = timezone.now().timestamp()
+        trending.record([self.posts[0].pk], 1.0, now=now)
+        trending.record([self.posts[0].pk], 3.0, now=now + self.hour)
+        self.assertAlmostEqual(self.score(self.posts[0], now + self.hour), 3.5)
+        self.assertAlmostEqual(self.score(self.posts[0], now + 3 * self.hour), 3.5 / 4)
+
+    def test_ranking(self):
+        # Três likes de duas meias-vidas atrás (0,75) perdem para um comentário (3) e para um like de agora (1)
+        for reader in self.readers:
+            Like.objects.create(user=reader, post=self.posts[0])
+        self.age_likes(2)
+        Like.objects.create(user=self.readers[0], post=self.posts[1])
+        api_client(self.readers[0]).post(f'/api/posts/{self.posts[2].pk}/comment/', {'content': 'Oi'}, format='json')
+        self.assertEqual(trending.rebuild(), 3)
+
+        response = api_client(self.readers[0]).get('/api/posts/trending/').json()['results']
+        self.assertEqual([post['id'] for post in response], [self.posts[2].pk, self.posts[1].pk, self.posts[0].pk])
+        self.assertEqual([post['trending_score'] for post in response], [3.0, 1.0, 0.75])
+
+    def test_unlike_discounts_the_like(self):
+        client = api_client(self.readers[0])
+        post = self.posts[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            client.post(f'/api/posts/{post.pk}/like/')
+            api_client(self.readers[1]).post(f'/api/posts/{post.pk}/like/')
+        self.assertAlmostEqual(self.score(post), 2.0, places=3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            client.delete(f'/api/posts/{post.pk}/unlike/')
+        self.assertAlmostEqual(self.score(post), 1.0, places=3)
+
+        # Nunca fica negativa, mesmo descontando mais do que somou
+        trending.discount([(post.pk, timezone.now())], 5.0)
+        self.assertLess(self.score(post), 1e-6)
+
+    def test_bulk_unlike_discounts_the_decayed_value(self):
+        client = api_client(self.readers[0])
+        post_ids = [post.pk for post in self.posts[:2]]
+        client.post('/api/posts/likes/bulk/', {'action': 'like', 'post_ids': post_ids}, format='json')
+        self.age_likes(1)
+        Like.objects.create(user=self.readers[1], post=self.posts[0])
+        trending.rebuild()
+        self.assertAlmostEqual(self.score(self.posts[0]), 1.5, places=3)
+
+        # Cada like sai com o que vale agora (0,5 depois de uma meia-vida), não com o peso cheio
+        with self.captureOnCommitCallbacks(execute=True):
+            client.post('/api/posts/likes/bulk/', {'action': 'unlike', 'post_ids': post_ids}, format='json')
+        self.assertAlmostEqual(self.score(self.posts[0]), 1.0, places=3)
+        self.assertLess(self.score(self.posts[1]), 1e-3)
+
+    def test_deleted_post_drops_out(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            api_client(self.readers[0]).post(f'/api/posts/{self.posts[0].pk}/like/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.posts[0].delete()
+        self.assertFalse(PostScore.objects.exists())
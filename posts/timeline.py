@@ -0,0 +1,148 @@
+"""
+Timeline materializada (fan-out on write).
+
+Cada post novo é copiado para a timeline do autor na criação e para a de seus
+seguidores por um job (posts/tasks.py), e o feed passa a ler IDs já ordenados
+de TimelineEntry.
+Autores com muitos seguidores ("celebridades", acima de
+TIMELINE_CELEBRITY_THRESHOLD) não são distribuídos na escrita: seus posts são
+mesclados no feed na leitura (fan-out on read), limitando a amplificação.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+
+from follows.models import Follow
+from .models import Post, TimelineEntry
+
+User = get_user_model()
+
+FAN_OUT_BATCH_SIZE = 1000
+
+
+def is_celebrity(user_id) -> bool:
+    """Indica se o autor ultrapassou o limite de seguidores para fan-out."""
+    return User.objects.filter(
+        pk=user_id,
+        followers_count__gte=settings.TIMELINE_CELEBRITY_THRESHOLD
+    ).exists()
+
+
+def celebrity_ids_followed_by(user):
+    """IDs dos autores populares seguidos por `user` (lidos via fan-out on read)."""
+    return Follow.objects.filter(
+        follower=user,
+        followed__followers_count__gte=settings.TIMELINE_CELEBRITY_THRESHOLD
+    ).values_list('followed_id', flat=True)
+
+
+def add_to_author_timeline(post):
+    """Escreve o post na timeline do próprio autor (na requisição: ele o vê na hora)."""
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(user_id=post.user_id, post=post, created_at=post.created_at)],
+        ignore_conflicts=True,
+    )
+
+
+def fan_out_to_followers(post):
+    """Escreve o post na timeline dos seguidores, se o autor não for celebridade."""
+    if is_celebrity(post.user_id):
+        return
+
+    follower_ids = Follow.objects.filter(
+        followed_id=post.user_id
+    ).values_list('follower_id', flat=True)
+
+    entries = []
+    for follower_id in follower_ids.iterator(chunk_size=FAN_OUT_BATCH_SIZE):
+        entries.append(
+            TimelineEntry(user_id=follower_id, post=post, created_at=post.created_at)
+        )
+        if len(entries) >= FAN_OUT_BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(entries, ignore_conflicts=True)
+            entries = []
+
+    TimelineEntry.objects.bulk_create(entries, ignore_conflicts=True)
+
+
+def _copy_recent_posts(user, author_ids):
+    """Copia os TIMELINE_BACKFILL_LIMIT posts mais recentes de cada autor, em uma query."""
+    limit = settings.TIMELINE_BACKFILL_LIMIT
+    if len(author_ids) == 1:
+        recent_posts = Post.objects.filter(
+            user_id=author_ids[0]
+        ).order_by('-created_at').values_list('id', 'created_at')[:limit]
+    else:
+        recent_posts = Post.objects.filter(
+            user_id__in=author_ids
+        ).annotate(
+            position=Window(
+                RowNumber(),
+                partition_by=F('user_id'),
+                order_by=F('created_at').desc(),
+            )
+        ).filter(position__lte=limit).values_list('id', 'created_at')
+
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user=user, post_id=post_id, created_at=created_at)
+            for post_id, created_at in recent_posts
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def backfill_authors(user, author_ids):
+    """Copia os posts recentes dos autores para a timeline de `user` (após seguir)."""
+    regular_ids = list(User.objects.filter(
+        pk__in=author_ids,
+        followers_count__lt=settings.TIMELINE_CELEBRITY_THRESHOLD
+    ).values_list('pk', flat=True))
+
+    if regular_ids:
+        _copy_recent_posts(user, regular_ids)
+
+
+def backfill_author(user, author_id):
+    backfill_authors(user, [author_id])
+
+
+def prune_authors(user, author_ids):
+    """Remove os posts dos autores da timeline de `user` (após deixar de seguir)."""
+    TimelineEntry.objects.filter(user=user, post__user_id__in=author_ids).delete()
+
+
+def prune_author(user, author_id):
+    prune_authors(user, [author_id])
+
+
+def rebuild_timeline(user):
+    """Reconstrói a timeline de `user` a partir dos próprios posts e de quem ele segue."""
+    TimelineEntry.objects.filter(user=user).delete()
+    _copy_recent_posts(user, [user.id])
+
+    followed_ids = Follow.objects.filter(follower=user).values_list('followed_id', flat=True)
+    backfill_authors(user, list(followed_ids))
+
+
+def feed_queryset(user, celebrity_ids=None):
+    """
+    Posts do feed de `user`: timeline materializada + autores populares seguidos.
+
+    A queryset é anotada com `feed_at` (data usada na ordenação do feed). Sem
+    celebridades, a leitura parte do índice da timeline (user, -created_at) e
+    custa só o tamanho da página. `celebrity_ids` evita repetir a consulta
+    quando o chamador já a fez.
+    """
+    if celebrity_ids is None:
+        celebrity_ids = list(celebrity_ids_followed_by(user))
+    if not celebrity_ids:
+        return Post.objects.filter(
+            timeline_entries__user=user
+        ).annotate(feed_at=F('timeline_entries__created_at'))
+
+    return Post.objects.filter(
+        Q(id__in=TimelineEntry.objects.filter(user=user).values('post_id'))
+        | Q(user_id__in=celebrity_ids)
+    ).annotate(feed_at=F('created_at'))
@@ -0,0 +1,162 @@
+"""
+Posts em alta: likes e comentários com decaimento exponencial.
+
+Cada interação vale `peso * 2^(-idade / meia-vida)`. Como essa soma muda com
+o tempo, PostScore guarda `rank = λ·t + ln(soma decaída até t)`, com
+λ = ln 2 / meia-vida: o valor não envelhece e a ordem por `rank` é a ordem da
+pontuação em qualquer instante, então pode ser indexada. A pontuação atual
+de um post é `exp(rank - λ·agora)`.
+
+Cada like ou comentário novo soma na linha do post com um UPDATE, sem varrer
+posts; um like desfeito sai dela do mesmo jeito, com o valor decaído que tem
+no momento. O comando `refresh_trending` tira da tabela os posts sem interações
+recentes (ou recalcula tudo a partir de likes e comentários com `--rebuild`)
+e grava no cache a lista dos TRENDING_SIZE primeiros, que é o que o endpoint
+lê a cada requisição.
+"""
+import math
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache as django_cache
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Exp, Greatest, Ln
+
+from social_api import cache
+from .models import Comment, Like, PostScore
+
+CACHE_KEY = 'trending:top'
+EVENT_BATCH_SIZE = 5000
+# exp() abaixo disso é desprezível perto de qualquer peso (e no Postgres daria underflow)
+MIN_EXPONENT = -50.0
+
+
+def decay_rate():
+    """λ, por segundo."""
+    return math.log(2) / (settings.TRENDING_HALF_LIFE_HOURS * 3600)
+
+
+def rank_at(timestamp):
+    """`rank` de uma pontuação igual a 1 no instante `timestamp`."""
+    return decay_rate() * timestamp
+
+
+def current_score(rank, now=None):
+    return math.exp(rank - rank_at(time.time() if now is None else now))
+
+
+def _add(post_ids, amount, base):
+    """Soma `amount` (expressão, pode ser negativa) na pontuação em `base`, sem passar de ~0."""
+    current = Value(base, output_field=FloatField())
+    return PostScore.objects.filter(post_id__in=post_ids).update(
+        rank=current + Ln(Greatest(
+            Exp(Greatest(F('rank') - current, Value(MIN_EXPONENT))) + amount,
+            Value(math.exp(MIN_EXPONENT)),
+        ))
+    )
+
+
+def record(post_ids, weight, now=None):
+    """Soma uma interação de peso `weight`, feita agora, na pontuação dos posts."""
+    post_ids = set(post_ids)
+    if not post_ids:
+        return
+    base = rank_at(time.time() if now is None else now)
+
+    # Caso comum (um like/comentário em post que já pontua): um UPDATE só.
+    # Senão cria as linhas que faltam com pontuação ~0, ignorando as criadas em
+    # paralelo, e soma nelas
+    amount = Value(weight, output_field=FloatField())
+    if len(post_ids) > 1 or not _add(post_ids, amount, base):
+        PostScore.objects.bulk_create(
+            [PostScore(post_id=post_id, rank=base + MIN_EXPONENT) for post_id in post_ids],
+            ignore_conflicts=True,
+        )
+        _add(post_ids, amount, base)
+
+
+def record_on_commit(post_ids, weight):
+    """Pontua depois do commit, para não segurar o lock da linha do score na transação do like."""
+    post_ids = list(post_ids)
+    now = time.time()
+    transaction.on_commit(lambda: record(post_ids, weight, now))
+
+
+def discount(events, weight, now=None):
+    """
+    Tira da pontuação interações desfeitas: `events` é [(post_id, criada em)].
+    Cada uma sai com o valor decaído que tem agora, o mesmo que `rebuild`
+    deixaria de somar; posts sem linha ou já sem pontuação ficam como estão.
+    """
+    now = time.time() if now is None else now
+    rate = decay_rate()
+    amounts = defaultdict(float)
+    for post_id, created_at in events:
+        exponent = rate * (created_at.timestamp() - now)
+        if exponent > MIN_EXPONENT:
+            amounts[post_id] += weight * math.exp(exponent)
+    if not amounts:
+        return
+    amount = Case(
+        *[When(post_id=post_id, then=Value(-value)) for post_id, value in amounts.items()],
+        output_field=FloatField(),
+    )
+    _add(list(amounts), amount, rank_at(now))
+
+
+def discount_on_commit(events, weight):
+    """Como `record_on_commit`, para `discount`."""
+    events = list(events)
+    now = time.time()
+    transaction.on_commit(lambda: discount(events, weight, now))
+
+
+def window_start(now):
+    return now - settings.TRENDING_WINDOW_HOURS * 3600
+
+
+def prune(now=None):
+    """Remove posts cuja pontuação já é menor que a de uma interação feita no início da janela."""
+    now = time.time() if now is None else now
+    deleted, _ = PostScore.objects.filter(rank__lt=rank_at(window_start(now))).delete()
+    return deleted
+
+
+def rebuild(now=None):
+    """Recalcula a tabela a partir dos likes e comentários dentro da janela."""
+    now = time.time() if now is None else now
+    since = datetime.fromtimestamp(window_start(now), tz=timezone.utc)
+    rate = decay_rate()
+
+    scores = defaultdict(float)
+    for model, weight in ((Like, settings.TRENDING_LIKE_WEIGHT), (Comment, settings.TRENDING_COMMENT_WEIGHT)):
+        events = model.objects.filter(created_at__gte=since).values_list('post_id', 'created_at')
+        for post_id, created_at in events.iterator(chunk_size=EVENT_BATCH_SIZE):
+            scores[post_id] += weight * math.exp(rate * (created_at.timestamp() - now))
+
+    base = rank_at(now)
+    with transaction.atomic():
+        PostScore.objects.all().delete()
+        PostScore.objects.bulk_create(
+            [PostScore(post_id=post_id, rank=base + math.log(score)) for post_id, score in scores.items()],
+            batch_size=EVENT_BATCH_SIZE,
+        )
+    return len(scores)
+
+
+def top_queryset():
+    return PostScore.objects.order_by('-rank').values_list('post_id', 'rank')[:settings.TRENDING_SIZE]
+
+
+def refresh_top():
+    """Grava no cache a lista [(post_id, rank)] dos primeiros colocados."""
+    top = list(top_queryset())
+    django_cache.set(CACHE_KEY, top, settings.TRENDING_CACHE_TTL)
+    return top
+
+
+def get_top():
+    return cache.get_or_set('trending', CACHE_KEY, lambda: list(top_queryset()), settings.TRENDING_CACHE_TTL)
@@ -1,17 +1,25 @@
 from django.urls import path
-from .views import PostListCreateView, PostDetailView, PostInteractionView
+from .views import (
+    BulkLikeView, FeedDeltaView, LikeListView, PostListCreateView, PostDetailView, PostInteractionView,
+    TrendingPostListView,
+)
 from follows.views import CommentListView
+from social_api.async_views import read_view
 
 app_name = "posts"
 
 urlpatterns = [
     # CRUD de posts
-    path("", PostListCreateView.as_view(), name="post-list-create"),
-    path("<int:pk>/", PostDetailView.as_view(), name="post-detail"),
+    path("", read_view(PostListCreateView), name="post-list-create"),
+    path("<int:pk>/", read_view(PostDetailView), name="post-detail"),
+    path("likes/bulk/", BulkLikeView.as_view(), name="post-like-bulk"),
+    path("trending/", TrendingPostListView.as_view(), name="post-trending"),
+    path("delta/", FeedDeltaView.as_view(), name="post-delta"),
 
     # Interações
     path("<int:pk>/like/", PostInteractionView.as_view(), name="post-like"),
     path("<int:pk>/unlike/", PostInteractionView.as_view(), name="post-unlike"),
     path("<int:pk>/comment/", PostInteractionView.as_view(), name="post-comment"),
-    path("<int:pk>/comments/", CommentListView.as_view(), name="comment-list"),
+    path("<int:pk>/comments/", read_view(CommentListView), name="comment-list"),
+    path("<int:pk>/likes/", read_view(LikeListView), name="like-list"),
 ]
\ No newline at end of file
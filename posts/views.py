@@ -1,13 +1,33 @@
-from django.db.models import Count
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Prefetch
+from django.http import Http404
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import permissions
 
 from .models import Like, Post, Comment
-from .serializers import CommentSerializer, PostSerializer
-from follows.models import Follow
+from .serializers import BulkLikeSerializer, CommentSerializer, LikeSerializer, PostSerializer
+from . import delta, tasks, timeline, trending
+from social_api import cache, conditional
+from social_api.async_views import AsyncListMixin
+from social_api.conditional import conditional_get
+from social_api.db import delete_returning, insert_ignoring_conflicts
+from social_api.serializers import get_query_list
+from social_api.streaming import StreamingListMixin
+from jobs.queue import enqueue
+from notifications import delivery as notifications
+from realtime import events
+from users.serializers import get_user_card
+
+logger = logging.getLogger(__name__)
 
 
 class IsOwnerOrReadOnly(permissions.BasePermission):
@@ -17,30 +37,80 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
         return obj.user == request.user
 
 
-class PostListCreateView(generics.ListCreateAPIView):
+def update_counters(post_ids, **deltas):
+    """Soma `deltas` nos contadores dos posts com F() e marca a atividade para o polling do feed."""
+    return Post.objects.filter(id__in=post_ids).update(
+        activity_at=timezone.now(),
+        **{name: F(name) + delta for name, delta in deltas.items()},
+    )
+
+
+def with_feed_data(queryset, request):
+    """
+    Carrega o que o PostSerializer compacto usa: autor, `liked_by_me` e os
+    comentários recentes. Likes/comments completos só com `?expand=`.
+    """
+    recent_comments = Comment.objects.select_related('user').order_by(
+        '-created_at', '-id'
+    )[:settings.FEED_RECENT_COMMENTS]
+
+    queryset = queryset.select_related('user').annotate(
+        liked_by_me=Exists(
+            Like.objects.filter(post=OuterRef('pk'), user=request.user)
+        )
+    ).prefetch_related(
+        Prefetch('comments', queryset=recent_comments, to_attr='recent_comments')
+    )
+
+    expand = get_query_list(request, 'expand')
+    if 'likes' in expand:
+        queryset = queryset.prefetch_related('likes__user')
+    if 'comments' in expand:
+        queryset = queryset.prefetch_related('comments__user')
+    return queryset
+
+
+class PostListCreateView(StreamingListMixin, AsyncListMixin, generics.ListCreateAPIView):
     serializer_class = PostSerializer
     permission_classes = [IsAuthenticated]
+    keyset_ordering = ('-feed_at', '-id')
+    celebrity_ids = None
 
     def get_queryset(self):
-        following_ids = Follow.objects.filter(
-            follower=self.request.user
-        ).values_list('followed_id', flat=True)
-
-        # Inclui posts do próprio usuário e de quem ele segue
-        user_ids = list(following_ids) + [self.request.user.id]
-
-        # Otimiza queries e adiciona contagens
-        return Post.objects.filter(
-            user_id__in=user_ids
-        ).select_related('user').prefetch_related(
-            'likes__user', 'comments__user'
-        ).annotate(
-            likes_count=Count('likes', distinct=True),
-            comments_count=Count('comments', distinct=True)
-        ).order_by('-created_at')
+        # Timeline materializada (posts próprios e de quem o usuário segue)
+        # mesclada com os autores populares lidos sob demanda
+        return with_feed_data(
+            timeline.feed_queryset(self.request.user, self.get_celebrity_ids()), self.request
+        ).order_by('-feed_at', '-id')
 
+    def get_celebrity_ids(self):
+        """Autores populares seguidos, consultados uma vez por requisição (ETag e página)."""
+        if self.celebrity_ids is None:
+            self.celebrity_ids = list(timeline.celebrity_ids_followed_by(self.request.user))
+        return self.celebrity_ids
+
+    @conditional_get
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    @conditional_get
+    async def aget(self, request, *args, **kwargs):
+        return await super().aget(request, *args, **kwargs)
+
+    def get_etag(self, request):
+        # Mesma página do GET, mas só (id, autor): sem JOINs, anotações nem prefetch
+        page = self.paginator.prepare_page(
+            timeline.feed_queryset(request.user, self.get_celebrity_ids()), request, self
+        )
+        return conditional.page_etag('post', request, page.values_list('id', 'user_id'))
+
+    @transaction.atomic
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        # O job entra na mesma transação do post: ou os dois ou nenhum
+        post = serializer.save(user=self.request.user)
+        timeline.add_to_author_timeline(post)
+        # Fan-out para os seguidores fora da requisição (custa um INSERT por seguidor)
+        enqueue(tasks.fan_out, key=f'fan-out:{post.pk}', post_id=post.pk)
 
 
 class PostDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -48,12 +118,69 @@ class PostDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAuthenticated, IsOwnerOrReadOnly]
 
     def get_queryset(self):
-        return Post.objects.select_related('user').prefetch_related(
-            'likes__user', 'comments__user'
-        ).annotate(
-            likes_count=Count('likes', distinct=True),
-            comments_count=Count('comments', distinct=True)
+        return with_feed_data(Post.objects.all(), self.request)
+
+    @conditional_get
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def get_etag(self, request):
+        """Versões do post e do card do autor: com o cache quente, nenhuma query."""
+        pk = self.kwargs['pk']
+        author_id = self.get_cached_entry(request)['author_id']
+        return conditional.make_etag(
+            'post', pk, cache.get_version('post', pk), author_id, cache.get_version('user', author_id),
+            request.user.pk, conditional.query_parts(request),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Serve o post do cache versionado. O autor vem do cache de cards e
+        só `liked_by_me`, que depende de quem pede, é calculado a cada vez.
+        """
+        entry = self.get_cached_entry(request)
+        data = dict(entry['data'])
+
+        if 'user' in data:
+            data['user'] = get_user_card(entry['author_id'])
+        if 'liked_by_me' in data:
+            data['liked_by_me'] = data.get('likes_count') != 0 and self.get_liked_by_me().exists()
+
+        return Response(data)
+
+    @conditional_get
+    async def aget(self, request, *args, **kwargs):
+        """Mesmo que `retrieve`, com a consulta de `liked_by_me` no ORM assíncrono."""
+        entry = await sync_to_async(self.get_cached_entry)(request)
+        data = dict(entry['data'])
+
+        if 'user' in data:
+            data['user'] = await sync_to_async(get_user_card)(entry['author_id'])
+        if 'liked_by_me' in data:
+            data['liked_by_me'] = data.get('likes_count') != 0 and await self.get_liked_by_me().aexists()
+
+        return Response(data)
+
+    def get_cached_entry(self, request):
+        pk = self.kwargs['pk']
+        params = '&'.join(
+            f'{name}={request.query_params.get(name, "")}' for name in ('fields', 'expand')
         )
+        key = f'post-detail:{pk}:{cache.get_version("post", pk)}:{params}'
+
+        def serialize():
+            instance = self.get_object()
+            data = dict(self.get_serializer(instance).data)
+            # Campos preenchidos na leitura não ficam no cache
+            for name in ('user', 'liked_by_me'):
+                if name in data:
+                    data[name] = None
+            return {'data': data, 'author_id': instance.user_id}
+
+        return cache.get_or_set('post_detail', key, serialize)
+
+    def get_liked_by_me(self):
+        return Like.objects.filter(post_id=self.kwargs['pk'], user=self.request.user)
 
     def destroy(self, request, *args, **kwargs):
         try:
@@ -69,14 +196,178 @@ class PostDetailView(generics.RetrieveUpdateDestroyAPIView):
                 {'message': 'Post deletado com sucesso!'},
                 status=status.HTTP_204_NO_CONTENT
             )
-        except Exception as e:
-            print(f"Erro ao deletar o post: {e}")
+        except Exception:
+            logger.exception("Erro ao deletar o post %s", kwargs.get('pk'))
             return Response(
                 {'error': 'Erro ao deletar o post.'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
 
+class TrendingPostListView(generics.GenericAPIView):
+    """
+    Posts em alta. A lista de ids vem pronta do cache (ver posts/trending.py),
+    então cada requisição só carrega os TRENDING_SIZE posts.
+    """
+    serializer_class = PostSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return with_feed_data(Post.objects.all(), self.request)
+
+    def get(self, request):
+        top = trending.get_top()
+        posts = self.get_queryset().in_bulk([post_id for post_id, _ in top])
+
+        # Posts apagados depois do último refresh ficam de fora
+        ranked = [(posts[post_id], rank) for post_id, rank in top if post_id in posts]
+        data = self.get_serializer([post for post, _ in ranked], many=True).data
+
+        now = time.time()
+        for item, (_, rank) in zip(data, ranked):
+            item['trending_score'] = round(trending.current_score(rank, now), 4)
+        return Response({'results': data})
+
+
+class FeedDeltaView(generics.GenericAPIView):
+    """
+    Mudanças no feed desde o cursor `since` (ver posts/delta.py): posts novos,
+    ids apagados e contadores alterados, ou `reset` se o cliente deve recarregar o feed.
+    """
+    serializer_class = PostSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            since = delta.parse_since(request.query_params.get('since', ''))
+        except ValueError:
+            return Response(
+                {'error': 'Parâmetro since deve ser um cursor do delta ou o id de um post'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        now = timezone.now()
+        cursor = delta.next_cursor(now)
+        if delta.is_expired(since, now):
+            return Response({'reset': True, 'cursor': cursor})
+
+        user = request.user
+        celebrity_ids = list(timeline.celebrity_ids_followed_by(user))
+        max_posts, max_changes = settings.DELTA_MAX_POSTS, settings.DELTA_MAX_CHANGES
+        # Um item além do limite só para saber se ele foi ultrapassado
+        posts = list(with_feed_data(delta.new_posts(user, since, celebrity_ids), request)[:max_posts + 1])
+        deleted = list(delta.deleted_ids(user, since, max_changes + 1))
+        counters = list(delta.changed_counters(user, since, celebrity_ids, max_changes + 1))
+        if len(posts) > max_posts or len(deleted) > max_changes or len(counters) > max_changes:
+            return Response({'reset': True, 'cursor': cursor})
+
+        # Posts novos já vêm completos
+        new_ids = {post.id for post in posts}
+        return Response({
+            'reset': False,
+            'cursor': cursor,
+            'posts': self.get_serializer(posts, many=True).data,
+            'deleted': deleted,
+            'counters': [item for item in counters if item['id'] not in new_ids],
+        })
+
+
+class LikeListView(StreamingListMixin, AsyncListMixin, generics.ListAPIView):
+    """Lista quem curtiu um post"""
+    permission_classes = [IsAuthenticated]
+    serializer_class = LikeSerializer
+
+    def list(self, request, *args, **kwargs):
+        get_object_or_404(Post, pk=self.kwargs.get('pk'))
+        return super().list(request, *args, **kwargs)
+
+    async def alist(self, request, *args, **kwargs):
+        if not await Post.objects.filter(pk=self.kwargs.get('pk')).aexists():
+            raise Http404
+        return await super().alist(request, *args, **kwargs)
+
+    def get_queryset(self):
+        return Like.objects.filter(
+            post_id=self.kwargs.get('pk')
+        ).select_related('user').order_by('-created_at', '-id')
+
+
+class BulkLikeView(generics.GenericAPIView):
+    """Curte ou descurte vários posts em uma requisição"""
+    permission_classes = [IsAuthenticated]
+    serializer_class = BulkLikeSerializer
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        action = serializer.validated_data['action']
+        post_ids = serializer.validated_data['post_ids']
+
+        if action == 'like':
+            results, changed = self.like(request.user, post_ids)
+            # bulk_create e update() não disparam signals: invalida, pontua e avisa os autores aqui
+            for post_id in changed:
+                cache.bump_on_commit('post', post_id)
+            trending.record_on_commit(changed, settings.TRENDING_LIKE_WEIGHT)
+            events.likes_created(request.user.pk, changed)
+            notifications.likes_created(request.user.pk, changed)
+        else:
+            results, removed = self.unlike(request.user, post_ids)
+            changed = [post_id for post_id, _ in removed]
+            # O DELETE direto não dispara o post_delete de Like
+            for post_id in changed:
+                cache.bump_on_commit('post', post_id)
+            trending.discount_on_commit(removed, settings.TRENDING_LIKE_WEIGHT)
+
+        return Response({
+            'results': [{'post_id': post_id, 'status': results[post_id]} for post_id in post_ids],
+            'changed': len(changed),
+        })
+
+    @transaction.atomic
+    def like(self, user, post_ids):
+        """Devolve os resultados por post e {post curtido agora: autor}."""
+        existing = dict(Post.objects.filter(id__in=post_ids).values_list('id', 'user_id'))
+        already = set(Like.objects.filter(
+            user=user, post_id__in=post_ids
+        ).values_list('post_id', flat=True))
+
+        results = {}
+        for post_id in post_ids:
+            if post_id not in existing:
+                results[post_id] = 'not_found'
+            elif post_id in already:
+                results[post_id] = 'already_liked'
+            else:
+                results[post_id] = 'liked'
+
+        liked = [post_id for post_id, result in results.items() if result == 'liked']
+        # Os contadores somam só as linhas inseridas: uma curtida gravada por
+        # uma requisição concorrente depois da leitura acima não conta duas vezes
+        created = insert_ignoring_conflicts([Like(user=user, post_id=post_id) for post_id in liked], 'post')
+        for post_id in set(liked) - set(created):
+            results[post_id] = 'already_liked'
+        if created:
+            update_counters(created, likes_count=1)
+        return results, {post_id: existing[post_id] for post_id in created}
+
+    @transaction.atomic
+    def unlike(self, user, post_ids):
+        """Devolve os resultados por post e [(post descurtido agora, data do like)]."""
+        # Só as curtidas que este DELETE apagou: um unlike concorrente das
+        # mesmas não desconta duas vezes
+        removed = delete_returning(Like.objects.filter(user=user, post_id__in=post_ids), 'post', 'created_at')
+        removed_ids = {post_id for post_id, _ in removed}
+        if removed_ids:
+            update_counters(removed_ids, likes_count=-1)
+
+        results = {
+            post_id: 'unliked' if post_id in removed_ids else 'not_liked'
+            for post_id in post_ids
+        }
+        return results, removed
+
+
 class PostInteractionView(generics.GenericAPIView):
     permission_classes = [IsAuthenticated]
 
@@ -90,10 +381,13 @@ class PostInteractionView(generics.GenericAPIView):
             action = request.path.split('/')[-2]  # 'like' ou 'comment'
 
             if action == 'like':
-                like, created = Like.objects.get_or_create(
-                    user=request.user,
-                    post=post
-                )
+                with transaction.atomic():
+                    like, created = Like.objects.get_or_create(
+                        user=request.user,
+                        post=post
+                    )
+                    if created:
+                        update_counters([post.pk], likes_count=1)
                 if created:
                     return Response(
                         {'message': 'Post curtido!'},
@@ -110,11 +404,13 @@ class PostInteractionView(generics.GenericAPIView):
                         status=status.HTTP_400_BAD_REQUEST
                     )
 
-                comment = Comment.objects.create(
-                    user=request.user,
-                    post=post,
-                    content=content
-                )
+                with transaction.atomic():
+                    comment = Comment.objects.create(
+                        user=request.user,
+                        post=post,
+                        content=content
+                    )
+                    update_counters([post.pk], comments_count=1)
 
                 return Response(
                     CommentSerializer(comment).data,
@@ -126,7 +422,7 @@ class PostInteractionView(generics.GenericAPIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         except Exception as e:
-            print(f"Erro na interação com o post: {e}")
+            logger.exception("Erro na interação com o post %s", pk)
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -138,10 +434,13 @@ class PostInteractionView(generics.GenericAPIView):
             action = request.path.split('/')[-2]
 
             if action == 'unlike':
-                deleted, _ = Like.objects.filter(
-                    user=request.user,
-                    post=post
-                ).delete()
+                with transaction.atomic():
+                    deleted, _ = Like.objects.filter(
+                        user=request.user,
+                        post=post
+                    ).delete()
+                    if deleted:
+                        update_counters([post.pk], likes_count=-1)
 
                 if deleted:
                     return Response({'message': 'Like removido!'})
@@ -156,7 +455,7 @@ class PostInteractionView(generics.GenericAPIView):
             )
 
         except Exception as e:
-            print(f"Erro ao remover interação do post: {e}")
+            logger.exception("Erro ao remover interação do post %s", pk)
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
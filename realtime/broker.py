@@ -0,0 +1,245 @@
+"""
+Pub/sub dos eventos em tempo real.
+
+Cada conexão de streaming é uma `Subscription` com uma fila limitada,
+registrada nos canais que interessam ao usuário (ver events.py). O
+`LocalBroker` entrega direto às filas deste processo e serve para um worker
+só (desenvolvimento e testes); o `RedisBroker` publica no Redis e cada
+processo repassa às suas filas as mensagens dos canais com assinantes locais,
+para rodar com vários workers ou nós.
+
+Publicar nunca bloqueia quem publica (a view que criou o like, por exemplo):
+o evento é serializado uma vez e agendado no event loop de cada assinante.
+Se um cliente não consome e a fila dele enche, os eventos pendentes são
+descartados e ele recebe um único `reset`, para recuperar o estado pelo
+/api/posts/delta/ em vez de segurar memória no servidor.
+"""
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from social_api import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def format_event(event_type, data):
+    """Frame SSE já codificado, compartilhado por todos os assinantes."""
+    return f'event: {event_type}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'.encode('utf-8')
+
+
+RESET = format_event('reset', {})
+
+
+def count(name, help_text, **labels):
+    metrics.registry.increment(f'realtime_{name}', help_text, **labels)
+
+
+class Subscription:
+    def __init__(self, channels, size):
+        self.channels = frozenset(channels)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=size)
+
+    def deliver(self, frame):
+        """Roda no event loop da assinatura."""
+        if self.queue.full():
+            # Cliente lento: descarta o atrasado e avisa uma vez só
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESET)
+            count('resets_total', "Conexões que ficaram para trás e receberam reset")
+        else:
+            self.queue.put_nowait(frame)
+
+    async def get(self, timeout):
+        """Próximo frame, ou None se nada chegar em `timeout` segundos."""
+        # asyncio.timeout e não wait_for: no Python 3.11 o wait_for pode engolir o
+        # cancelamento da desconexão se um item chegar junto, e o stream não terminaria
+        try:
+            async with asyncio.timeout(timeout):
+                return await self.queue.get()
+        except TimeoutError:
+            return None
+
+
+def deliver_all(subscriptions, frame):
+    for subscription in subscriptions:
+        subscription.deliver(frame)
+
+
+class LocalBroker:
+    """Entrega só às conexões deste processo."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.channels = defaultdict(set)
+        self.subscriptions = set()
+
+    def connection_count(self):
+        return len(self.subscriptions)
+
+    def add(self, subscription):
+        with self.lock:
+            self.subscriptions.add(subscription)
+            for channel in subscription.channels:
+                self.channels[channel].add(subscription)
+
+    def remove(self, subscription):
+        """Remove a assinatura; devolve os canais que ficaram sem assinantes."""
+        with self.lock:
+            self.subscriptions.discard(subscription)
+            emptied = []
+            for channel in subscription.channels:
+                subscribers = self.channels.get(channel)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.channels[channel]
+                    emptied.append(channel)
+            return emptied
+
+    async def subscribe(self, channels, size=None):
+        subscription = Subscription(channels, size or settings.REALTIME_QUEUE_SIZE)
+        self.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Pode ser chamado de qualquer thread (ver views.EventStream.close)."""
+        self.remove(subscription)
+
+    def publish(self, channel, event_type, data):
+        """Pode ser chamado de qualquer thread."""
+        count('events_total', "Eventos publicados por tipo", type=event_type)
+        self.dispatch(channel, format_event(event_type, data))
+
+    def dispatch(self, channel, frame):
+        by_loop = defaultdict(list)
+        with self.lock:
+            for subscription in self.channels.get(channel, ()):
+                by_loop[subscription.loop].append(subscription)
+        # Um agendamento por event loop, e não por conexão: cada call_soon_threadsafe acorda o loop
+        for loop, subscriptions in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(deliver_all, subscriptions, frame)
+            except RuntimeError:
+                # Event loop já encerrado: as conexões morreram sem passar pelo unsubscribe
+                for subscription in subscriptions:
+                    self.remove(subscription)
+
+
+class RedisBroker(LocalBroker):
+    """
+    Publica pelo Redis (PUBLISH) e, em cada processo, mantém uma conexão de
+    pub/sub inscrita só nos canais com assinantes locais.
+    """
+    prefix = 'realtime:'
+
+    def __init__(self, url=None):
+        import redis
+
+        super().__init__()
+        self.url = url or settings.REDIS_URL
+        self.client = redis.Redis.from_url(self.url)
+        self.pubsub = None
+        self.listener = None
+        # Canais em que a conexão de pub/sub está inscrita (só mexidos sob subscribe_lock)
+        self.redis_channels = set()
+        self.subscribe_lock = None
+
+    def publish(self, channel, event_type, data):
+        count('events_total', "Eventos publicados por tipo", type=event_type)
+        self.client.publish(self.prefix + channel, format_event(event_type, data))
+
+    async def subscribe(self, channels, size=None):
+        subscription = Subscription(channels, size or settings.REALTIME_QUEUE_SIZE)
+        async with self.get_lock():
+            self.add(subscription)
+            new = [channel for channel in subscription.channels if channel not in self.redis_channels]
+            if new:
+                pubsub = await self.get_pubsub()
+                await pubsub.subscribe(*(self.prefix + channel for channel in new))
+                self.redis_channels.update(new)
+            self.ensure_listener()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        if self.remove(subscription):
+            subscription.loop.call_soon_threadsafe(
+                lambda: subscription.loop.create_task(self.unsubscribe_empty())
+            )
+
+    async def unsubscribe_empty(self):
+        """Sai dos canais do Redis que ficaram sem assinantes locais."""
+        async with self.get_lock():
+            with self.lock:
+                empty = [channel for channel in self.redis_channels if channel not in self.channels]
+            if empty and self.pubsub is not None:
+                await self.pubsub.unsubscribe(*(self.prefix + channel for channel in empty))
+                self.redis_channels.difference_update(empty)
+
+    def get_lock(self):
+        if self.subscribe_lock is None:
+            self.subscribe_lock = asyncio.Lock()
+        return self.subscribe_lock
+
+    async def get_pubsub(self):
+        if self.pubsub is None:
+            import redis.asyncio
+
+            self.pubsub = redis.asyncio.Redis.from_url(self.url).pubsub()
+        return self.pubsub
+
+    def ensure_listener(self):
+        if self.listener is None or self.listener.done():
+            self.listener = asyncio.get_running_loop().create_task(self.listen())
+
+    async def listen(self):
+        while True:
+            try:
+                if self.pubsub is None:
+                    await self.resubscribe()
+                    if self.pubsub is None:
+                        return
+                async for message in self.pubsub.listen():
+                    if message['type'] == 'message':
+                        channel = message['channel'].decode('utf-8').removeprefix(self.prefix)
+                        self.dispatch(channel, message['data'])
+                # Sem canais inscritos: o próximo subscribe recria o listener
+                return
+            except Exception:
+                logger.exception("Conexão de pub/sub com o Redis interrompida; reconectando")
+                self.pubsub = None
+                await asyncio.sleep(1)
+
+    async def resubscribe(self):
+        """Nova conexão de pub/sub inscrita em todos os canais com assinantes locais."""
+        async with self.get_lock():
+            self.pubsub = None
+            self.redis_channels.clear()
+            with self.lock:
+                channels = list(self.channels)
+            if channels:
+                pubsub = await self.get_pubsub()
+                await pubsub.subscribe(*(self.prefix + channel for channel in channels))
+                self.redis_channels.update(channels)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Broker do processo, da classe em REALTIME_BROKER."""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.REALTIME_BROKER)()
+    return _broker
@@ -0,0 +1,51 @@
+"""
+Eventos em tempo real e seus canais.
+
+- `author:<id>`: posts novos do autor, assinado por quem o segue;
+- `user:<id>`: likes e comentários nos posts do usuário.
+
+Os eventos levam só ids; o cliente busca o conteúdo pelos endpoints de
+leitura. São publicados depois do commit, para ninguém receber um id que
+ainda não pode ser lido.
+"""
+from django.db import transaction
+
+from .broker import get_broker
+
+
+def author_channel(user_id):
+    return f'author:{user_id}'
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+def channels_for(user_id, followed_ids):
+    return [user_channel(user_id)] + [author_channel(followed_id) for followed_id in followed_ids]
+
+
+def publish_on_commit(channel, event_type, **data):
+    transaction.on_commit(lambda: get_broker().publish(channel, event_type, data))
+
+
+def post_created(post_id, author_id):
+    publish_on_commit(author_channel(author_id), 'post', post_id=post_id, user_id=author_id)
+
+
+def liked(post_id, owner_id, user_id):
+    if owner_id != user_id:
+        publish_on_commit(user_channel(owner_id), 'like', post_id=post_id, user_id=user_id)
+
+
+def likes_created(user_id, owners):
+    """Likes em lote: `owners` é {post_id: autor do post}."""
+    for post_id, owner_id in owners.items():
+        liked(post_id, owner_id, user_id)
+
+
+def commented(comment_id, post_id, owner_id, user_id):
+    if owner_id != user_id:
+        publish_on_commit(
+            user_channel(owner_id), 'comment', post_id=post_id, comment_id=comment_id, user_id=user_id
+        )
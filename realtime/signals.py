@@ -0,0 +1,24 @@
+"""Publica os eventos em tempo real quando posts, likes e comentários são criados."""
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from posts.models import Comment, Like, Post
+from . import events
+
+
+@receiver(post_save, sender=Post)
+def publish_post(sender, instance, created, **kwargs):
+    if created:
+        events.post_created(instance.pk, instance.user_id)
+
+
+@receiver(post_save, sender=Like)
+def publish_like(sender, instance, created, **kwargs):
+    if created:
+        events.liked(instance.post_id, instance.post.user_id, instance.user_id)
+
+
+@receiver(post_save, sender=Comment)
+def publish_comment(sender, instance, created, **kwargs):
+    if created:
+        events.commented(instance.pk, instance.post_id, instance.post.user_id, instance.user_id)
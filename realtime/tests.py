@@ -0,0 +1,129 @@
+import asyncio
+import json
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from follows.models import Follow
+from posts.models import Post
+from users.models import User
+from . import events
+from .broker import RESET, LocalBroker
+
+
+def api_client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def parse(frame):
+    """(tipo, dados) de um frame SSE."""
+    event_line, data_line = frame.decode('utf-8').strip().split('\n')
+    return event_line.removeprefix('event: '), json.loads(data_line.removeprefix('data: '))
+
+
+class BrokerTestMixin:
+    """
+    Assinaturas em um event loop próprio, parado enquanto o teste publica:
+    os frames agendados por `publish` são entregues no próximo `receive`.
+    """
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.broker = LocalBroker()
+
+    def subscribe(self, channels, size=None):
+        return self.loop.run_until_complete(self.broker.subscribe(channels, size))
+
+    def receive(self, subscription, timeout=0.05):
+        """Frames entregues até agora."""
+        async def drain():
+            frames = []
+            while (frame := await subscription.get(timeout)) is not None:
+                frames.append(frame)
+            return frames
+        return self.loop.run_until_complete(drain())
+
+
+class LocalBrokerTest(BrokerTestMixin, SimpleTestCase):
+    def test_delivers_to_subscribed_channels_only(self):
+        subscription = self.subscribe(['user:1', 'author:2'])
+        other = self.subscribe(['user:3'])
+
+        self.broker.publish('user:1', 'like', {'post_id': 10, 'user_id': 5})
+        self.broker.publish('author:2', 'post', {'post_id': 11, 'user_id': 2})
+        self.broker.publish('author:4', 'post', {'post_id': 12, 'user_id': 4})
+
+        self.assertEqual([parse(frame) for frame in self.receive(subscription)], [
+            ('like', {'post_id': 10, 'user_id': 5}),
+            ('post', {'post_id': 11, 'user_id': 2}),
+        ])
+        self.assertEqual(self.receive(other), [])
+
+    def test_publish_from_another_thread(self):
+        subscription = self.subscribe(['user:1'])
+        thread = threading.Thread(target=self.broker.publish, args=('user:1', 'like', {'post_id': 1}))
+        thread.start()
+        thread.join()
+        self.assertEqual([parse(frame) for frame in self.receive(subscription)], [('like', {'post_id': 1})])
+
+    def test_unsubscribe(self):
+        subscription = self.subscribe(['user:1'])
+        self.assertEqual(self.broker.connection_count(), 1)
+        self.broker.unsubscribe(subscription)
+        self.broker.publish('user:1', 'like', {'post_id': 1})
+        self.assertEqual(self.receive(subscription), [])
+        self.assertEqual((self.broker.connection_count(), dict(self.broker.channels)), (0, {}))
+
+    def test_slow_subscriber_gets_reset(self):
+        subscription = self.subscribe(['user:1'], size=2)
+        for post_id in range(3):
+            self.broker.publish('user:1', 'like', {'post_id': post_id})
+        self.assertEqual(self.receive(subscription), [RESET])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, JOBS_ALWAYS_EAGER=True)
+class PublishTest(BrokerTestMixin, TestCase):
+    """Posts, likes e comentários chegam aos canais certos depois do commit"""
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(events, 'get_broker', return_value=self.broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.author = User.objects.create(username='autor', email='autor@example.com')
+        self.reader = User.objects.create(username='leitor', email='leitor@example.com')
+        Follow.objects.create(follower=self.reader, followed=self.author)
+
+    def test_post_like_and_comment(self):
+        reader_stream = self.subscribe(events.channels_for(self.reader.pk, [self.author.pk]))
+        author_stream = self.subscribe(events.channels_for(self.author.pk, []))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            post_id = api_client(self.author).post('/api/posts/', {'content': 'Oi'}, format='json').json()['id']
+        self.assertEqual([parse(frame) for frame in self.receive(reader_stream)], [
+            ('post', {'post_id': post_id, 'user_id': self.author.pk}),
+        ])
+
+        client = api_client(self.reader)
+        with self.captureOnCommitCallbacks(execute=True):
+            client.post(f'/api/posts/{post_id}/like/')
+            comment_id = client.post(
+                f'/api/posts/{post_id}/comment/', {'content': 'Legal'}, format='json'
+            ).json()['id']
+            # Interação com o próprio post não notifica
+            api_client(self.author).post(f'/api/posts/{post_id}/like/')
+        self.assertEqual([parse(frame) for frame in self.receive(author_stream)], [
+            ('like', {'post_id': post_id, 'user_id': self.reader.pk}),
+            ('comment', {'post_id': post_id, 'comment_id': comment_id, 'user_id': self.reader.pk}),
+        ])
+
+    def test_nothing_published_before_commit(self):
+        stream = self.subscribe(events.channels_for(self.reader.pk, [self.author.pk]))
+        with self.captureOnCommitCallbacks(execute=False):
+            Post.objects.create(user=self.author, content='Sem commit')
+        self.assertEqual(self.receive(stream), [])
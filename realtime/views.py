@@ -0,0 +1,97 @@
+"""
+Canal de push por Server-Sent Events (`GET /api/realtime/stream/`).
+
+Precisa do servidor ASGI (social_api/asgi.py): a conexão fica aberta
+esperando eventos sem ocupar uma thread. O token JWT vai no header
+Authorization ou, para o EventSource dos navegadores (que não envia headers),
+em `?access_token=`. Os autores seguidos são lidos na conexão; quem passa a
+seguir alguém recebe os posts dele a partir da próxima conexão.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+
+from follows.models import Follow
+from posts import delta
+from users.authentication import StatelessJWTAuthentication, raw_token
+from . import events
+from .broker import count, format_event, get_broker
+
+
+def authenticate(request):
+    """Usuário do token (header ou `?access_token=`), ou None."""
+    token = raw_token(request)
+    if token is None:
+        return None
+    authentication = StatelessJWTAuthentication()
+    try:
+        return authentication.get_user(authentication.get_validated_token(token))
+    except (AuthenticationFailed, InvalidToken, TokenError):
+        return None
+
+
+def followed_ids(user_id):
+    return list(
+        Follow.objects.filter(follower_id=user_id)
+        .values_list('followed_id', flat=True)[:settings.REALTIME_MAX_FOLLOWED]
+    )
+
+
+class EventStream:
+    """
+    Conteúdo da resposta: frames SSE de uma assinatura. O Django chama
+    `close()` no fim da resposta, inclusive quando o cliente cai no meio de um
+    envio, então a assinatura não depende do coletor de lixo para ser desfeita.
+    """
+
+    def __init__(self, broker, channels):
+        self.broker = broker
+        self.channels = channels
+        self.subscription = None
+
+    def __aiter__(self):
+        return self.frames()
+
+    async def frames(self):
+        # Assina só quando o streaming começa: uma resposta descartada antes disso não deixa assinatura
+        self.subscription = await self.broker.subscribe(self.channels)
+        count('connections_total', "Conexões de streaming abertas e fechadas", state='opened')
+        try:
+            # O cursor permite recuperar o que se perdeu (reset/reconexão) pelo delta do feed
+            yield format_event('ready', {'cursor': delta.next_cursor(timezone.now())})
+            while True:
+                frame = await self.subscription.get(settings.REALTIME_HEARTBEAT_SECONDS)
+                # Comentário SSE mantém a conexão viva em proxies com timeout de ociosidade
+                yield frame if frame is not None else b': ping\n\n'
+        finally:
+            self.close()
+
+    def close(self):
+        subscription, self.subscription = self.subscription, None
+        if subscription is not None:
+            self.broker.unsubscribe(subscription)
+            count('connections_total', "Conexões de streaming abertas e fechadas", state='closed')
+
+
+async def stream(request):
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Método não permitido'}, status=405)
+
+    user = await sync_to_async(authenticate)(request)
+    if user is None:
+        return JsonResponse({'error': 'Token ausente ou inválido'}, status=401)
+
+    broker = get_broker()
+    if broker.connection_count() >= settings.REALTIME_MAX_CONNECTIONS:
+        response = JsonResponse({'error': 'Servidor cheio, tente novamente'}, status=503)
+        response['Retry-After'] = str(settings.REALTIME_HEARTBEAT_SECONDS)
+        return response
+
+    channels = events.channels_for(user.pk, await sync_to_async(followed_ids)(user.pk))
+    response = StreamingHttpResponse(EventStream(broker, channels), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Sem buffer em proxies (nginx), para cada evento sair na hora
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,18 @@
+from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def ensure_triggers(sender, using, **kwargs):
+    from django.db import connections
+
+    from . import schema
+
+    schema.ensure_triggers(connections[using])
+
+
+class SearchConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'search'
+
+    def ready(self):
+        post_migrate.connect(ensure_triggers, sender=self)
@@ -0,0 +1,145 @@
+"""
+Busca textual em posts e usuários sobre os índices de search/schema.py.
+
+Cada backend devolve ids em ordem de relevância; a view carrega os objetos.
+O último termo casa por prefixo (typeahead). Termos comuns podem casar com
+boa parte dos posts, então a relevância é calculada só entre os
+SEARCH_CANDIDATES casamentos mais recentes.
+"""
+import re
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, connections, router
+from django.db.models import Q
+
+from posts.models import Post
+from . import schema
+
+User = get_user_model()
+
+# Letras e dígitos, como os tokenizers do Postgres ('simple') e do FTS5 (unicode61)
+TERM = re.compile(r'[^\W_]+')
+MAX_TERMS = 8
+# Prefixos menores casariam com quase tudo
+MIN_PREFIX_LENGTH = 2
+
+
+def parse_terms(query):
+    return TERM.findall(query.lower())[:MAX_TERMS]
+
+
+def is_prefix(terms, prefix):
+    return prefix and len(terms[-1]) >= MIN_PREFIX_LENGTH
+
+
+def read_cursor():
+    """Cursor no banco de leitura (uma réplica, se houver; ver social_api/db_router.py)."""
+    return connections[router.db_for_read(Post)].cursor()
+
+
+class PostgresBackend:
+    def tsquery(self, terms, prefix):
+        parts = list(terms)
+        if is_prefix(terms, prefix):
+            parts[-1] += ':*'
+        return ' & '.join(parts)
+
+    def search(self, sql, terms, prefix, limit):
+        with read_cursor() as cursor:
+            query = self.tsquery(terms, prefix)
+            cursor.execute(sql, [query, settings.SEARCH_CANDIDATES, query, limit])
+            return [row[0] for row in cursor.fetchall()]
+
+    def posts(self, terms, prefix, limit):
+        return self.search(f"""
+            SELECT id FROM (
+                SELECT id, {schema.POST_VECTOR} AS vector
+                FROM posts_post, to_tsquery('simple', %s) query
+                WHERE {schema.POST_VECTOR} @@ query
+                ORDER BY id DESC LIMIT %s
+            ) candidates, to_tsquery('simple', %s) query
+            ORDER BY ts_rank(vector, query) DESC, id DESC LIMIT %s
+        """, terms, prefix, limit)
+
+    def users(self, terms, prefix, limit):
+        return self.search(f"""
+            SELECT id FROM (
+                SELECT id, {schema.USER_VECTOR} AS vector
+                FROM custom_user, to_tsquery('simple', %s) query
+                WHERE {schema.USER_VECTOR} @@ query AND is_active
+                ORDER BY followers_count DESC, id DESC LIMIT %s
+            ) candidates, to_tsquery('simple', %s) query
+            ORDER BY ts_rank(vector, query) DESC, id DESC LIMIT %s
+        """, terms, prefix, limit)
+
+
+class SQLiteBackend:
+    def match(self, terms, prefix):
+        parts = [f'"{term}"' for term in terms]
+        if is_prefix(terms, prefix):
+            parts[-1] += '*'
+        return ' '.join(parts)
+
+    def search(self, table, terms, prefix, limit):
+        # Os candidatos são os casamentos com rowid a partir do N-ésimo mais
+        # recente: o FTS5 aplica esse limite de rowid no próprio índice e o
+        # bm25 (coluna `rank`, menor é melhor) só é calculado para eles
+        match = self.match(terms, prefix)
+        with read_cursor() as cursor:
+            cursor.execute(f"""
+                SELECT rowid FROM {table}
+                WHERE {table} MATCH %s AND rowid >= coalesce((
+                    SELECT rowid FROM {table} WHERE {table} MATCH %s
+                    ORDER BY rowid DESC LIMIT 1 OFFSET %s
+                ), 0)
+                ORDER BY rank, rowid DESC LIMIT %s
+            """, [match, match, settings.SEARCH_CANDIDATES - 1, limit])
+            return [row[0] for row in cursor.fetchall()]
+
+    def posts(self, terms, prefix, limit):
+        return self.search('search_post_fts', terms, prefix, limit)
+
+    def users(self, terms, prefix, limit):
+        return self.search('search_user_fts', terms, prefix, limit)
+
+
+class FallbackBackend:
+    """Sem índice textual: `icontains` em todos os termos, mais recentes primeiro."""
+
+    def filter(self, queryset, fields, terms):
+        for term in terms:
+            condition = Q()
+            for field in fields:
+                condition |= Q(**{f'{field}__icontains': term})
+            queryset = queryset.filter(condition)
+        return queryset
+
+    def posts(self, terms, prefix, limit):
+        queryset = self.filter(Post.objects.all(), ['content'], terms)
+        return list(queryset.order_by('-id').values_list('id', flat=True)[:limit])
+
+    def users(self, terms, prefix, limit):
+        queryset = self.filter(
+            User.objects.filter(is_active=True), ['username', 'first_name', 'last_name', 'bio'], terms
+        )
+        return list(queryset.order_by('-followers_count', '-id').values_list('id', flat=True)[:limit])
+
+
+_fts_tables = {}
+
+
+def has_fts_tables():
+    name = connection.settings_dict['NAME']
+    if name not in _fts_tables:
+        _fts_tables[name] = set(schema.FTS_TABLES) <= set(connection.introspection.table_names())
+    return _fts_tables[name]
+
+
+def get_backend():
+    if connection.vendor == 'postgresql':
+        return PostgresBackend()
+    # SQLite compilado sem FTS5 fica sem as tabelas (ver schema.install)
+    if connection.vendor == 'sqlite' and has_fts_tables():
+        return SQLiteBackend()
+    return FallbackBackend()
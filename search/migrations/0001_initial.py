@@ -0,0 +1,27 @@
+from django.db import migrations
+
+
+def install(apps, schema_editor):
+    from search import schema
+
+    schema.install(schema_editor.connection)
+
+
+def uninstall(apps, schema_editor):
+    from search import schema
+
+    schema.uninstall(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY (Postgres) não roda dentro de transação
+    atomic = False
+
+    dependencies = [
+        ('posts', '0008_postscore'),
+        ('users', '0005_user_lower_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
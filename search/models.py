@@ -0,0 +1 @@
+# Sem models: a busca usa os índices criados em schema.py
@@ -0,0 +1,126 @@
+"""
+Índices de busca textual, diferentes por banco:
+
+- PostgreSQL: índices GIN nas expressões `to_tsvector(...)` de posts e
+  usuários (as mesmas usadas pelas queries em search/backends.py);
+- SQLite: tabelas FTS5 de conteúdo externo, mantidas por triggers.
+
+Em outros bancos (ou no SQLite sem FTS5) não cria nada e a busca cai no
+`icontains`.
+
+No SQLite, migrações que alteram `posts_post` ou `custom_user` recriam a
+tabela e perdem os triggers; `ensure_triggers` (rodado no `post_migrate`) os
+recria e reconstrói o índice.
+"""
+POST_VECTOR = "to_tsvector('simple'::regconfig, coalesce(content, ''))"
+USER_VECTOR = (
+    "setweight(to_tsvector('simple'::regconfig, coalesce(username, '')), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(first_name, '') || ' ' || coalesce(last_name, '')), 'B') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(bio, '')), 'C')"
+)
+
+POSTGRES_INSTALL = [
+    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS post_content_search_idx ON posts_post USING GIN (({POST_VECTOR}))",
+    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS user_search_idx ON custom_user USING GIN (({USER_VECTOR}))",
+]
+POSTGRES_UNINSTALL = [
+    "DROP INDEX CONCURRENTLY IF EXISTS post_content_search_idx",
+    "DROP INDEX CONCURRENTLY IF EXISTS user_search_idx",
+]
+
+# {tabela FTS: (tabela de origem, colunas)}
+FTS_TABLES = {
+    'search_post_fts': ('posts_post', ['content']),
+    'search_user_fts': ('custom_user', ['username', 'first_name', 'last_name', 'bio']),
+}
+# Username pesa mais que o nome, que pesa mais que a bio
+FTS_RANK = {
+    'search_user_fts': 'bm25(10.0, 5.0, 5.0, 1.0)',
+}
+
+
+def fts_table_sql(table):
+    source, columns = FTS_TABLES[table]
+    return (
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5({', '.join(columns)}, "
+        f"content='{source}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+
+
+def fts_triggers_sql(table):
+    """{nome do trigger: SQL} que mantêm a tabela FTS igual à de origem."""
+    source, columns = FTS_TABLES[table]
+    names = ', '.join(columns)
+    insert = (
+        f"INSERT INTO {table}(rowid, {names}) "
+        f"VALUES (new.id, {', '.join(f'new.{column}' for column in columns)});"
+    )
+    delete = (
+        f"INSERT INTO {table}({table}, rowid, {names}) "
+        f"VALUES ('delete', old.id, {', '.join(f'old.{column}' for column in columns)});"
+    )
+    # `UPDATE OF <colunas>`: os contadores atualizados a cada like/follow não reescrevem o índice
+    return {
+        f'{table}_ai': f"CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON {source} BEGIN {insert} END",
+        f'{table}_ad': f"CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON {source} BEGIN {delete} END",
+        f'{table}_au': (
+            f"CREATE TRIGGER IF NOT EXISTS {table}_au AFTER UPDATE OF {names} ON {source} "
+            f"BEGIN {delete} {insert} END"
+        ),
+    }
+
+
+def install(connection):
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            for statement in POSTGRES_INSTALL:
+                cursor.execute(statement)
+    elif connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+            if not cursor.fetchone()[0]:
+                return
+            for table in FTS_TABLES:
+                cursor.execute(fts_table_sql(table))
+                for statement in fts_triggers_sql(table).values():
+                    cursor.execute(statement)
+                cursor.execute(f"INSERT INTO {table}({table}) VALUES ('rebuild')")
+                if table in FTS_RANK:
+                    cursor.execute(f"INSERT INTO {table}({table}, rank) VALUES ('rank', %s)", [FTS_RANK[table]])
+
+
+def uninstall(connection):
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            for statement in POSTGRES_UNINSTALL:
+                cursor.execute(statement)
+    elif connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            for table in FTS_TABLES:
+                for name in fts_triggers_sql(table):
+                    cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+                cursor.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+def ensure_triggers(connection):
+    """Recria triggers do SQLite perdidos em migrações e reconstrói o índice afetado."""
+    if connection.vendor != 'sqlite':
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+        existing = {row[0] for row in cursor.fetchall()}
+
+        rebuilt = []
+        for table in FTS_TABLES:
+            # Migração da busca ainda não aplicada (ou revertida)
+            if table not in existing:
+                continue
+            triggers = fts_triggers_sql(table)
+            if all(name in existing for name in triggers):
+                continue
+            for statement in triggers.values():
+                cursor.execute(statement)
+            cursor.execute(f"INSERT INTO {table}({table}) VALUES ('rebuild')")
+            rebuilt.append(table)
+    return rebuilt
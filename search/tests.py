@@ -0,0 +1,75 @@
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from posts.models import Post
+from users.models import User
+from .backends import SQLiteBackend, get_backend
+
+
+def api_client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@skipUnless(connection.vendor == 'sqlite', "Índice FTS5 do SQLite")
+@override_settings(SECURE_SSL_REDIRECT=False)
+class SQLiteSearchTest(TestCase):
+    """Busca pelo FTS5: casamentos, prefixo, acentos, relevância e índice em dia com as edições"""
+
+    def setUp(self):
+        cache.clear()
+        self.assertIsInstance(get_backend(), SQLiteBackend)
+        self.user = User.objects.create(username='leitor', email='leitor@example.com')
+        self.client = api_client(self.user)
+
+    def search(self, q, **params):
+        return self.client.get('/api/search/', {'q': q, **params}).json()
+
+    def post_ids(self, q, **params):
+        return [post['id'] for post in self.search(q, type='posts', **params)['posts']]
+
+    def test_posts_match_and_rank(self):
+        long = Post.objects.create(user=self.user, content='Um dia inteiro no parque, e no fim apareceu um gato')
+        short = Post.objects.create(user=self.user, content='Gato, gato, gato')
+        Post.objects.create(user=self.user, content='Só cachorros por aqui')
+        # Mais ocorrências em um texto menor: o bm25 põe na frente, apesar de o outro ser mais antigo
+        self.assertEqual(self.post_ids('gato'), [short.pk, long.pk])
+        self.assertEqual(self.post_ids('parque gato'), [long.pk])
+
+    def test_prefix_and_diacritics(self):
+        post = Post.objects.create(user=self.user, content='Café com pão de queijo')
+        self.assertEqual(self.post_ids('cafe'), [post.pk])
+        self.assertEqual(self.post_ids('pão qu'), [post.pk])
+        self.assertEqual(self.post_ids('pão qu', prefix='false'), [])
+
+    def test_index_follows_edits_and_deletes(self):
+        post = Post.objects.create(user=self.user, content='Primeira versão')
+        post.content = 'Texto revisado'
+        post.save()
+        self.assertEqual(self.post_ids('primeira'), [])
+        self.assertEqual(self.post_ids('revisado'), [post.pk])
+        post.delete()
+        self.assertEqual(self.post_ids('revisado'), [])
+
+    @override_settings(SEARCH_CANDIDATES=2)
+    def test_ranks_only_recent_candidates(self):
+        best = Post.objects.create(user=self.user, content='Gato gato gato')
+        recent = [Post.objects.create(user=self.user, content=f'Post {i} com um gato no meio') for i in range(2)]
+        self.assertEqual(sorted(self.post_ids('gato')), sorted(post.pk for post in recent))
+        self.assertNotIn(best.pk, self.post_ids('gato'))
+
+    def test_users_rank_username_above_bio(self):
+        in_bio = User.objects.create(username='ana', email='ana@example.com', bio='Fotografia e viagens')
+        in_username = User.objects.create(username='fotografia', email='foto@example.com')
+        User.objects.create(username='fotografia_antiga', email='antiga@example.com', is_active=False)
+        users = self.search('fotografia', type='users')['users']
+        self.assertEqual([user['id'] for user in users], [in_username.pk, in_bio.pk])
+
+    def test_requires_terms(self):
+        response = self.client.get('/api/search/', {'q': '  !! '})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from rest_framework import generics, status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from posts.models import Post
+from posts.serializers import PostSerializer
+from posts.views import with_feed_data
+from social_api.serializers import get_query_list
+from users.serializers import get_user_cards
+from .backends import get_backend, parse_terms
+
+User = get_user_model()
+
+KINDS = ('posts', 'users')
+
+
+class SearchView(generics.GenericAPIView):
+    """
+    Busca em posts e usuários: `?q=` (o último termo casa por prefixo, para
+    typeahead; `?prefix=false` desliga), `?type=posts,users` e `?limit=`.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = PostSerializer
+
+    def get(self, request):
+        terms = parse_terms(request.query_params.get('q', ''))
+        if not terms:
+            return Response(
+                {'error': 'Informe o que buscar em ?q='},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        kinds = get_query_list(request, 'type') or set(KINDS)
+        if not kinds <= set(KINDS):
+            return Response(
+                {'error': f"Tipos válidos: {', '.join(KINDS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        prefix = request.query_params.get('prefix', 'true').lower() not in ('0', 'false', 'no')
+        limit = self.get_limit(request)
+        backend = get_backend()
+
+        data = {}
+        if 'users' in kinds:
+            ids = backend.users(terms, prefix, limit)
+            users = User.objects.filter(is_active=True).in_bulk(ids)
+            cards = get_user_cards(users.values())
+            data['users'] = [cards[pk] for pk in ids if pk in users]
+        if 'posts' in kinds:
+            ids = backend.posts(terms, prefix, limit)
+            posts = with_feed_data(Post.objects.all(), request).in_bulk(ids)
+            data['posts'] = self.get_serializer([posts[pk] for pk in ids if pk in posts], many=True).data
+        return Response(data)
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params.get('limit', settings.SEARCH_DEFAULT_LIMIT))
+        except ValueError:
+            limit = settings.SEARCH_DEFAULT_LIMIT
+        return max(1, min(limit, settings.SEARCH_MAX_LIMIT))
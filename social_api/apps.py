@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+class SocialApiConfig(AppConfig):
+    name = 'social_api'
+
+    def ready(self):
+        from . import db, metrics
+
+        connection_created.connect(db.apply_sqlite_pragmas, dispatch_uid='sqlite-pragmas')
+        metrics.registry.add_collector(db.metric_lines)
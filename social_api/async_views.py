@@ -0,0 +1,73 @@
+"""
+Views de leitura assíncronas sobre as views DRF existentes.
+
+O DRF não tem views async: aqui o GET da view roda em um handler async que
+reaproveita autenticação, permissões e renderização do APIView, chamando o
+método `aget` da view (que usa o ORM assíncrono). Os demais métodos caem na
+view síncrona de sempre.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.response import Response
+
+
+def async_read_view(view_class, **initkwargs):
+    """Como `view_class.as_view()`, mas com o GET servido por `view_class.aget`."""
+    sync_view = sync_to_async(view_class.as_view(**initkwargs))
+
+    async def view(request, *args, **kwargs):
+        if request.method != 'GET':
+            return await sync_view(request, *args, **kwargs)
+
+        self = view_class(**initkwargs)
+        self.setup(request, *args, **kwargs)
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            # Autenticação e permissões podem consultar o banco
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            response = await self.aget(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    view.cls = view_class
+    view.initkwargs = initkwargs
+    return csrf_exempt(view)
+
+
+def read_view(view_class, **initkwargs):
+    """View para as URLs: async com ASYNC_READ_VIEWS ligado, síncrona caso contrário."""
+    if settings.ASYNC_READ_VIEWS:
+        return async_read_view(view_class, **initkwargs)
+    return view_class.as_view(**initkwargs)
+
+
+class AsyncListMixin:
+    """
+    `aget` para ListAPIView: a página é buscada com o ORM assíncrono e só a
+    serialização (que pode consultar o cache de cards) roda em thread.
+    """
+
+    async def aget(self, request, *args, **kwargs):
+        return await self.alist(request, *args, **kwargs)
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(await sync_to_async(self.get_queryset)())
+
+        if self.paginator is None:
+            objects = [obj async for obj in queryset]
+            return Response(await sync_to_async(self.serialize)(objects))
+
+        page = await self.paginator.apaginate_queryset(queryset, request, view=self)
+        return self.get_paginated_response(await sync_to_async(self.serialize)(page))
+
+    def serialize(self, objects):
+        return self.get_serializer(objects, many=True).data
@@ -0,0 +1,106 @@
+"""
+Cache de leituras quentes com chaves versionadas.
+
+Cada objeto cacheável tem um número de versão guardado no próprio cache
+(`v:<tipo>:<pk>`). As chaves dos dados incluem essa versão, então invalidar é
+só incrementá-la (ver os `signals.py` das apps). Versões ausentes ou
+despejadas recebem um valor novo baseado no relógio, nunca reaproveitando uma
+versão antiga.
+"""
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from . import db_router
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def record(namespace, hits=0, misses=0):
+    """Contabiliza acertos/erros de cache por namespace."""
+    with _stats_lock:
+        _stats[(namespace, 'hit')] += hits
+        _stats[(namespace, 'miss')] += misses
+
+
+def get_stats():
+    """Contadores de acertos/erros do processo atual, por namespace."""
+    with _stats_lock:
+        namespaces = {namespace for namespace, _ in _stats}
+        return {
+            namespace: {
+                'hits': _stats[(namespace, 'hit')],
+                'misses': _stats[(namespace, 'miss')],
+            }
+            for namespace in sorted(namespaces)
+        }
+
+
+def version_key(kind, pk):
+    return f'v:{kind}:{pk}'
+
+
+def get_versions(kind, pks):
+    """Versões atuais de vários objetos em uma ida ao cache: {pk: versão}."""
+    keys = {version_key(kind, pk): pk for pk in set(pks)}
+    found = cache.get_many(keys)
+
+    missing = [key for key in keys if key not in found]
+    if missing:
+        for key in missing:
+            # add() não sobrescreve uma versão criada em paralelo por outro processo
+            cache.add(key, time.time_ns(), timeout=None)
+        found.update(cache.get_many(missing))
+
+    return {pk: found.get(key) for key, pk in keys.items()}
+
+
+def get_version(kind, pk):
+    return get_versions(kind, [pk])[pk]
+
+
+def bump(kind, pk):
+    """Invalida tudo o que foi cacheado com a versão atual do objeto."""
+    key = version_key(kind, pk)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def bump_on_commit(kind, pk):
+    """
+    Agenda a invalidação para depois do commit, para que uma leitura
+    concorrente não grave no cache, com a versão nova, dados ainda não commitados.
+    """
+    transaction.on_commit(lambda: bump(kind, pk))
+
+
+def get_many_or_set(namespace, keys, producer, timeout=None):
+    """
+    Busca vários valores de uma vez; os ausentes são gerados por
+    `producer(lista_de_chaves_ausentes) -> {chave: valor}` e gravados.
+    """
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    record(namespace, hits=len(found), misses=len(missing))
+
+    if missing:
+        produced = producer(missing)
+        timeout = timeout or settings.CACHE_TTL
+        if db_router.reading_from_replica():
+            timeout = min(timeout, settings.DATABASE_REPLICA_CACHE_SECONDS)
+        cache.set_many(produced, timeout)
+        found.update(produced)
+    return found
+
+
+def get_or_set(namespace, key, producer, timeout=None):
+    return get_many_or_set(
+        namespace, [key], lambda missing: {key: producer()}, timeout
+    )[key]
@@ -0,0 +1,99 @@
+"""
+GET condicional (ETag / If-None-Match) nas leituras mais frequentes.
+
+A ETag de cada view sai das versões do cache (ver social_api/cache.py) e, nas
+listas, dos ids da página lidos em uma query enxuta, sem anotações, prefetch
+nem serialização. Quando ela bate com o If-None-Match do cliente, a view
+devolve 304 sem executar o resto do GET.
+
+Lida de uma réplica, a resposta pode vir atrasada em relação às versões (ver
+social_api/db_router.py); por isso a ETag dessas leituras inclui uma janela
+de DATABASE_REPLICA_CACHE_SECONDS e um par desencontrado expira com ela.
+
+Não há Last-Modified: likes, comentários e contadores mudam a representação
+sem mexer em `updated_at`, e um If-Modified-Since baseado nele daria 304 para
+dados desatualizados.
+"""
+import hashlib
+import inspect
+import json
+import time
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+
+from . import cache, db_router, streaming
+
+
+def make_etag(*parts):
+    """ETag forte a partir de valores serializáveis em JSON."""
+    raw = json.dumps([settings.ETAG_VERSION, *parts], default=str, separators=(',', ':'))
+    return '"%s"' % hashlib.md5(raw.encode('utf-8'), usedforsecurity=False).hexdigest()
+
+
+def request_etag(view, request):
+    """ETag da view, com a janela de tempo quando a leitura vai para uma réplica."""
+    etag = view.get_etag(request)
+    if db_router.reading_from_replica():
+        etag = make_etag(etag, int(time.time() // settings.DATABASE_REPLICA_CACHE_SECONDS))
+    return etag
+
+
+def query_parts(request):
+    """Parâmetros da query em ordem estável (entram na ETag)."""
+    return sorted(request.query_params.lists())
+
+
+def page_etag(kind, request, rows, *parts):
+    """
+    ETag de uma página de `rows` = [(id, autor)]: muda quando a página muda de
+    itens ou quando um item (versão `kind`) ou o card de um autor é invalidado.
+    """
+    rows = list(rows)
+    item_versions = cache.get_versions(kind, [pk for pk, _ in rows]) if kind else {}
+    author_versions = cache.get_versions('user', [author_id for _, author_id in rows])
+    return make_etag(
+        kind, request.user.pk, query_parts(request), *parts,
+        [(pk, item_versions.get(pk), author_id, author_versions[author_id]) for pk, author_id in rows],
+    )
+
+
+def add_validators(response, etag):
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        # A representação depende de quem pede (ex.: `liked_by_me`)
+        patch_vary_headers(response, ('Authorization',))
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional_get(method):
+    """
+    Decora o `get`/`aget` de uma view que define `get_etag(request)`: responde
+    304 se o If-None-Match casar e, caso contrário, executa o GET e anexa a ETag.
+    Listas em streaming (ver streaming.py) passam direto.
+    """
+    if inspect.iscoroutinefunction(method):
+        @wraps(method)
+        async def aget(self, request, *args, **kwargs):
+            if streaming.requested(request):
+                return await method(self, request, *args, **kwargs)
+            etag = await sync_to_async(request_etag)(self, request)
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = await method(self, request, *args, **kwargs)
+            return add_validators(response, etag)
+        return aget
+
+    @wraps(method)
+    def get(self, request, *args, **kwargs):
+        if streaming.requested(request):
+            return method(self, request, *args, **kwargs)
+        etag = request_etag(self, request)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = method(self, request, *args, **kwargs)
+        return add_validators(response, etag)
+    return get
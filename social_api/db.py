@@ -0,0 +1,114 @@
+"""
+Ajustes das conexões com o banco.
+
+No SQLite cada conexão nova recebe os PRAGMAs de SQLITE_PRAGMAS: em WAL as
+leituras não esperam a escrita em andamento, e uma escrita que encontra o
+banco travado espera por busy_timeout em vez de falhar na hora. No Postgres o
+pool nativo do Django (psycopg 3, DATABASE_POOL_SIZE) reaproveita as conexões
+entre requisições e threads; o estado dele vai para `/api/metrics/`.
+
+`insert_ignoring_conflicts` e `delete_returning` são o `bulk_create` e o
+`delete()` das ações em lote, mas dizendo quais linhas entraram ou saíram de
+fato, para os contadores não somarem o que uma requisição concorrente já fez.
+"""
+from django.conf import settings
+from django.db import connections, router
+
+# Estatísticas do psycopg_pool expostas como gauges
+POOL_STATS = ('pool_min', 'pool_max', 'pool_size', 'pool_available', 'requests_waiting')
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Receiver de `connection_created`."""
+    if connection.vendor != 'sqlite':
+        return
+    # Direto na conexão do sqlite3: não entra na contagem de queries da requisição
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+
+def insert_ignoring_conflicts(objs, returning):
+    """
+    INSERT ... ON CONFLICT DO NOTHING RETURNING (PostgreSQL e SQLite 3.35+).
+    Devolve o valor do campo `returning` de cada linha inserida; as que já
+    existiam, inclusive as gravadas por uma transação concorrente depois da
+    nossa leitura, não voltam. Como no bulk_create, não dispara signals.
+    """
+    if not objs:
+        return []
+    model = type(objs[0])
+    connection = connections[router.db_for_write(model)]
+    quote = connection.ops.quote_name
+    fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+
+    params = []
+    for obj in objs:
+        # pre_save preenche o auto_now_add, como no bulk_create
+        params += [field.get_db_prep_save(field.pre_save(obj, True), connection) for field in fields]
+    row = f"({', '.join(['%s'] * len(fields))})"
+    sql = (
+        f"INSERT INTO {quote(model._meta.db_table)} ({', '.join(quote(field.column) for field in fields)}) "
+        f"VALUES {', '.join([row] * len(objs))} ON CONFLICT DO NOTHING "
+        f"RETURNING {quote(model._meta.get_field(returning).column)}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [value for value, in cursor.fetchall()]
+
+
+def delete_returning(queryset, *returning):
+    """
+    DELETE ... RETURNING das linhas de `queryset` (PostgreSQL e SQLite 3.35+).
+    Devolve o valor do campo `returning` de cada linha apagada por este
+    DELETE (uma tupla por linha com mais de um campo); as que uma transação
+    concorrente apagou antes não voltam. Só para modelos sem dependentes: não
+    há cascata nem signals, como no update().
+    """
+    model = queryset.model
+    connection = connections[router.db_for_write(model)]
+    quote = connection.ops.quote_name
+    select, params = queryset.values('pk').query.get_compiler(connection=connection).as_sql()
+    columns = [model._meta.get_field(name).get_col(model._meta.db_table) for name in returning]
+    sql = (
+        f"DELETE FROM {quote(model._meta.db_table)} WHERE {quote(model._meta.pk.column)} IN ({select}) "
+        f"RETURNING {', '.join(quote(column.target.column) for column in columns)}"
+    )
+    # Os mesmos conversores de um SELECT (datas do SQLite, por exemplo)
+    converters = [
+        connection.ops.get_db_converters(column) + column.get_db_converters(connection) for column in columns
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = [
+            tuple(_convert(value, column_converters, column, connection)
+                  for value, column_converters, column in zip(row, converters, columns))
+            for row in cursor.fetchall()
+        ]
+    return rows if len(returning) > 1 else [value for value, in rows]
+
+
+def _convert(value, converters, expression, connection):
+    for converter in converters:
+        value = converter(value, expression, connection)
+    return value
+
+
+def metric_lines():
+    """Conexões abertas, livres e requisições esperando em cada pool deste processo."""
+    lines = []
+    for alias in connections:
+        pool = getattr(connections[alias], 'pool', None)
+        if pool is None:
+            continue
+        stats = pool.get_stats()
+        lines += [
+            f'social_api_db_pool{{database="{alias}",stat="{stat}"}} {stats.get(stat, 0)}'
+            for stat in POOL_STATS
+        ]
+    if not lines:
+        return []
+    return [
+        '# HELP social_api_db_pool Estado do pool de conexões por banco',
+        '# TYPE social_api_db_pool gauge',
+        *lines,
+    ]
@@ -0,0 +1,73 @@
+"""
+Leituras nas réplicas, escritas no primário.
+
+Só as requisições de leitura (GET/HEAD/OPTIONS) liberam as réplicas, marcando
+uma contextvar no `ReplicaRoutingMiddleware`; fora delas (escritas, jobs,
+comandos) tudo vai para o primário. Mesmo numa requisição de leitura, uma query
+dentro de um `transaction.atomic()` no primário fica no primário.
+
+Para cada um ver as próprias escritas, quem escreve com sucesso fica preso ao
+primário por DATABASE_STICKY_SECONDS (uma marca no cache, compartilhada entre
+os workers com Redis): o post novo ou o like aparecem no próprio feed mesmo
+com a réplica atrasada. Os demais usuários veem a escrita quando a réplica
+alcança o primário. Como as versões do cache mudam no commit do primário, o
+que vem de uma réplica fica no cache e nas ETags no máximo
+DATABASE_REPLICA_CACHE_SECONDS (ver cache.py e conditional.py).
+"""
+import contextvars
+import random
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_replica_reads = contextvars.ContextVar('replica_reads', default=False)
+
+
+def sticky_key(user_id):
+    return f'db-primary:{user_id}'
+
+
+def stick_to_primary(user_id):
+    """Manda as leituras do usuário para o primário pelos próximos segundos."""
+    cache.set(sticky_key(user_id), True, timeout=settings.DATABASE_STICKY_SECONDS)
+
+
+def is_sticky(user_id):
+    return user_id is not None and bool(cache.get(sticky_key(user_id)))
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """Libera (ou bloqueia) as réplicas para as leituras dentro do bloco."""
+    token = _replica_reads.set(enabled)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def reading_from_replica():
+    """Se as leituras deste contexto podem ir para uma réplica."""
+    return (
+        bool(settings.DATABASE_REPLICAS)
+        and _replica_reads.get()
+        and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+    )
+
+
+class ReplicaRouter:
+    """Router do DATABASE_ROUTERS; só é instalado com réplicas configuradas."""
+
+    def db_for_read(self, model, **hints):
+        if reading_from_replica():
+            return random.choice(settings.DATABASE_REPLICAS)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Réplicas têm os mesmos dados do primário
+        return True
@@ -0,0 +1,219 @@
+"""
+Métricas por requisição: queries, tempo de banco, de serialização e da view.
+
+O `RequestMetricsMiddleware` abre um `RequestMetrics` em uma contextvar; o
+wrapper de execução instalado em cada conexão e os timers de serialização
+somam nele (a contextvar acompanha o `sync_to_async` das views async). No fim
+da requisição os valores viram header `Server-Timing`, uma linha de log JSON e
+amostras nos histogramas por rota, expostos em formato Prometheus.
+
+Os histogramas são por processo: cada worker expõe os seus.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from . import cache
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        # {'serialize': s, 'render': s}
+        self.timers = {}
+        self.running = set()
+        self.total_time = 0.0
+        self.view_time = 0.0
+
+    def add_time(self, name, seconds):
+        self.timers[name] = self.timers.get(name, 0.0) + seconds
+
+    def finish(self):
+        self.total_time = time.perf_counter() - self.started
+        # O que sobra é tempo da própria view (regras, cache, middlewares)
+        self.view_time = max(0.0, self.total_time - self.db_time - sum(self.timers.values()))
+        return self
+
+    def server_timing(self):
+        entries = [f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"']
+        entries += [f'{name};dur={seconds * 1000:.1f}' for name, seconds in self.timers.items()]
+        entries.append(f'view;dur={self.view_time * 1000:.1f}')
+        entries.append(f'total;dur={self.total_time * 1000:.1f}')
+        return ', '.join(entries)
+
+
+def start_request():
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    """Wrapper de `connection.execute_wrappers`: conta queries e tempo de banco."""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_time += time.perf_counter() - started
+
+
+def install_execute_wrapper(sender, connection, **kwargs):
+    """Receiver de `connection_created`: instrumenta toda conexão nova."""
+    if execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(execute_wrapper)
+
+
+@contextmanager
+def timer(name):
+    """
+    Soma o tempo do bloco em `name` na requisição atual. Blocos aninhados com
+    o mesmo nome (um serializer dentro de outro) contam uma vez só, e queries
+    feitas dentro do bloco ficam só no tempo de banco.
+    """
+    metrics = _current.get()
+    if metrics is None or name in metrics.running:
+        yield
+        return
+
+    metrics.running.add(name)
+    started = time.perf_counter()
+    db_time = metrics.db_time
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started - (metrics.db_time - db_time)
+        metrics.add_time(name, max(0.0, elapsed))
+        metrics.running.discard(name)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """Histogramas por (métrica, rota, método) do processo atual."""
+
+    metrics = {
+        'request_duration_seconds': ("Tempo total da requisição", DURATION_BUCKETS),
+        'db_duration_seconds': ("Tempo gasto em queries por requisição", DURATION_BUCKETS),
+        'db_queries': ("Queries por requisição", QUERY_BUCKETS),
+        'serialize_duration_seconds': ("Tempo de serialização por requisição", DURATION_BUCKETS),
+        'render_duration_seconds': ("Tempo de renderização da resposta", DURATION_BUCKETS),
+    }
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.responses = {}
+        # {nome: texto de ajuda} e {(nome, labels): valor} dos contadores avulsos
+        self.counter_help = {}
+        self.counters = {}
+        # Funções que devolvem linhas prontas, lidas a cada coleta (ex.: jobs/queue.py)
+        self.collectors = []
+
+    def add_collector(self, collect):
+        if collect not in self.collectors:
+            self.collectors.append(collect)
+
+    def increment(self, name, help_text, amount=1, **labels):
+        """Soma `amount` em um contador `social_api_<name>` com os labels dados."""
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counter_help[name] = help_text
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, view, method, status, metrics):
+        values = {
+            'request_duration_seconds': metrics.total_time,
+            'db_duration_seconds': metrics.db_time,
+            'db_queries': metrics.queries,
+            'serialize_duration_seconds': metrics.timers.get('serialize', 0.0),
+            'render_duration_seconds': metrics.timers.get('render', 0.0),
+        }
+        with self.lock:
+            for name, value in values.items():
+                key = (name, view, method)
+                if key not in self.histograms:
+                    self.histograms[key] = Histogram(self.metrics[name][1])
+                self.histograms[key].observe(value)
+
+            key = (view, method, str(status))
+            self.responses[key] = self.responses.get(key, 0) + 1
+
+    def render(self):
+        """Texto no formato de exposição do Prometheus (0.0.4)."""
+        lines = []
+        with self.lock:
+            for name, (help_text, _) in self.metrics.items():
+                metric = f'social_api_{name}'
+                lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} histogram']
+                for (hist_name, view, method), histogram in sorted(self.histograms.items()):
+                    if hist_name != name:
+                        continue
+                    labels = f'view="{view}",method="{method}"'
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+                        cumulative += count
+                        lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                    lines.append(f'{metric}_sum{{{labels}}} {histogram.sum}')
+                    lines.append(f'{metric}_count{{{labels}}} {histogram.count}')
+
+            lines += [
+                '# HELP social_api_responses_total Respostas por rota e status',
+                '# TYPE social_api_responses_total counter',
+            ]
+            for (view, method, status), count in sorted(self.responses.items()):
+                lines.append(
+                    f'social_api_responses_total{{view="{view}",method="{method}",status="{status}"}} {count}'
+                )
+
+            for name, help_text in sorted(self.counter_help.items()):
+                metric = f'social_api_{name}'
+                lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} counter']
+                for (counter_name, labels), total in sorted(self.counters.items()):
+                    if counter_name != name:
+                        continue
+                    label_text = ','.join(f'{label}="{value}"' for label, value in labels)
+                    lines.append(f'{metric}{{{label_text}}} {total}' if label_text else f'{metric} {total}')
+
+        lines += [
+            '# HELP social_api_cache_requests_total Leituras do cache por namespace',
+            '# TYPE social_api_cache_requests_total counter',
+        ]
+        for namespace, stats in cache.get_stats().items():
+            for result in ('hits', 'misses'):
+                lines.append(
+                    f'social_api_cache_requests_total{{namespace="{namespace}",result="{result}"}} {stats[result]}'
+                )
+        for collect in self.collectors:
+            lines += collect()
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
@@ -0,0 +1,146 @@
+"""Middlewares do projeto."""
+import json
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils.functional import empty
+
+from users.authentication import token_user_id
+from . import db_router, metrics
+
+logger = logging.getLogger('social_api.requests')
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RequestMetricsMiddleware:
+    """
+    Mede cada requisição (queries, tempo de banco, serialização e view),
+    devolve os tempos no header `Server-Timing`, registra uma linha de log JSON
+    e alimenta os histogramas de `/api/metrics/`.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+        # Conexões são por thread: instrumenta as que já existem e as futuras
+        connection_created.connect(metrics.install_execute_wrapper, dispatch_uid='request-metrics')
+        for connection in connections.all(initialized_only=True):
+            metrics.install_execute_wrapper(None, connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        request_metrics, token = metrics.start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        return self.finish(request, response, request_metrics)
+
+    async def __acall__(self, request):
+        request_metrics, token = metrics.start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        return self.finish(request, response, request_metrics)
+
+    def finish(self, request, response, request_metrics):
+        request_metrics.finish()
+        match = request.resolver_match
+        view = match.view_name if match else 'unmatched'
+
+        response['Server-Timing'] = request_metrics.server_timing()
+        metrics.registry.observe(view, request.method, response.status_code, request_metrics)
+
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': view,
+            'status': response.status_code,
+            'user_id': self.get_user_id(request),
+            'queries': request_metrics.queries,
+            'db_ms': round(request_metrics.db_time * 1000, 2),
+            'serialize_ms': round(request_metrics.timers.get('serialize', 0.0) * 1000, 2),
+            'render_ms': round(request_metrics.timers.get('render', 0.0) * 1000, 2),
+            'view_ms': round(request_metrics.view_time * 1000, 2),
+            'total_ms': round(request_metrics.total_time * 1000, 2),
+        }))
+        return response
+
+    def get_user_id(self, request):
+        # Não força o usuário lazy do AuthenticationMiddleware (seria uma query de sessão);
+        # nas views DRF ele já foi trocado pelo usuário do JWT
+        user = request.__dict__.get('user')
+        user = getattr(user, '_wrapped', user)
+        if user is None or user is empty:
+            return None
+        return user.pk
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Libera as réplicas de leitura (ver db_router.py) nas requisições GET/HEAD/
+    OPTIONS de quem não escreveu há pouco, e prende ao primário quem acaba de
+    escrever com sucesso. Sem DATABASE_REPLICAS sai da pilha.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        user_id, replica = self.route(request)
+        with db_router.replica_reads(replica):
+            response = self.get_response(request)
+        self.finish(request, response, user_id)
+        return response
+
+    async def __acall__(self, request):
+        # O cache pode ir à rede (Redis): fora do event loop
+        user_id, replica = await sync_to_async(self.route)(request)
+        with db_router.replica_reads(replica):
+            response = await self.get_response(request)
+        if self.wrote(request, response, user_id):
+            await sync_to_async(db_router.stick_to_primary)(user_id)
+        return response
+
+    def route(self, request):
+        user_id = token_user_id(request)
+        if request.method not in SAFE_METHODS:
+            route = 'write'
+        elif db_router.is_sticky(user_id):
+            route = 'sticky'
+        else:
+            route = 'replica'
+        metrics.registry.increment(
+            'db_routed_requests_total',
+            "Requisições por destino das leituras: replica, sticky (primário por escrita recente) ou write",
+            route=route,
+        )
+        return user_id, route == 'replica'
+
+    def wrote(self, request, response, user_id):
+        return request.method not in SAFE_METHODS and user_id is not None and response.status_code < 400
+
+    def finish(self, request, response, user_id):
+        if self.wrote(request, response, user_id):
+            db_router.stick_to_primary(user_id)
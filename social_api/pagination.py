@@ -0,0 +1,165 @@
+"""
+Paginação por cursor (keyset) compartilhada pelas views de listagem.
+
+Em vez de OFFSET, cada página filtra a partir da última posição vista
+(por padrão `(created_at, id)`), então o custo é proporcional ao tamanho da
+página e a ordem continua estável mesmo com inserções concorrentes.
+"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginação keyset com cursor opaco.
+
+    A ordenação pode ser sobrescrita na view com o atributo `keyset_ordering`;
+    o último campo deve ser único (ex.: `id`) para desempatar registros.
+    """
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+    invalid_cursor_message = 'Cursor inválido'
+
+    def get_ordering(self, view):
+        return tuple(getattr(view, 'keyset_ordering', self.ordering))
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page = self.prepare_page(queryset, request, view)
+        if page is None:
+            return None
+        return self.finish_page(list(page))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Versão assíncrona de paginate_queryset, para as views async."""
+        page = self.prepare_page(queryset, request, view)
+        if page is None:
+            return None
+        # chunk_size cobre a página inteira: uma ida ao banco, com prefetch
+        return self.finish_page([obj async for obj in page.aiterator(chunk_size=self.page_size + 1)])
+
+    def prepare_page(self, queryset, request, view):
+        self.request = request
+        self.ordering = self.get_ordering(view)
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        return self.get_page_queryset(queryset, self.decode_cursor(request))
+
+    def finish_page(self, results):
+        self.has_next = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        self.next_position = self.get_position(results[-1]) if self.has_next else None
+        return results
+
+    def get_page_queryset(self, queryset, position=None):
+        """Queryset (ainda não avaliado) da página que começa após `position`."""
+        queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            queryset = queryset.filter(self.get_keyset_filter(self.to_python(queryset, position)))
+        # Busca um item extra só para saber se existe próxima página
+        return queryset[:self.page_size + 1]
+
+    def to_python(self, queryset, position):
+        """
+        Converte os valores do cursor com o campo (ou anotação) de cada
+        posição da ordenação; um valor que não converte é cursor inválido.
+        """
+        values = []
+        for field, value in zip(self.ordering, position):
+            output_field = queryset.query.resolve_ref(field.lstrip('-')).output_field
+            try:
+                value = output_field.to_python(value)
+            except (ValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+            if value is None:
+                raise NotFound(self.invalid_cursor_message)
+            if isinstance(value, datetime) and timezone.is_naive(value):
+                value = timezone.make_aware(value, dt_timezone.utc)
+            values.append(value)
+        return values
+
+    def get_keyset_filter(self, position):
+        """
+        Monta `(a < va) OR (a = va AND b < vb) OR ...` respeitando a direção
+        de cada campo da ordenação.
+        """
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    def get_position(self, instance):
+        position = []
+        for field in self.ordering:
+            value = getattr(instance, field.lstrip('-'))
+            if isinstance(value, (datetime, date)):
+                value = value.isoformat()
+            position.append(value)
+        return position
+
+    def encode_cursor(self, position):
+        raw = json.dumps(position, separators=(',', ':')).encode('utf-8')
+        return urlsafe_b64encode(raw).decode('ascii')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = json.loads(urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {
+                    'type': 'string',
+                    'nullable': True,
+                    'format': 'uri',
+                },
+                'results': schema,
+            },
+        }
@@ -0,0 +1,12 @@
+"""Renderers da API."""
+from rest_framework.renderers import JSONRenderer
+
+from . import metrics
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """JSONRenderer que registra o tempo de renderização nas métricas da requisição."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with metrics.timer('render'):
+            return super().render(data, accepted_media_type, renderer_context)
@@ -0,0 +1,71 @@
+"""Utilitários compartilhados pelos serializers das apps."""
+from rest_framework import serializers
+
+from . import metrics
+
+
+def get_query_list(request, param):
+    """Lê um parâmetro separado por vírgulas (ex.: `?fields=id,content`) como set."""
+    if request is None:
+        return set()
+    raw = request.query_params.get(param, '')
+    return {item.strip() for item in raw.split(',') if item.strip()}
+
+
+class DynamicFieldsMixin:
+    """
+    Sparse fieldsets para ModelSerializer.
+
+    - `?fields=a,b` limita a resposta aos campos pedidos;
+    - `?expand=x` inclui campos pesados listados em `Meta.expandable_fields`,
+      que por padrão ficam fora da resposta.
+
+    O tempo gasto em `to_representation` entra nas métricas da requisição.
+
+    Os parâmetros da query só valem para o serializer raiz; os aninhados
+    podem receber `fields`/`expand` explicitamente no construtor.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._requested_fields = kwargs.pop('fields', None)
+        self._requested_expand = kwargs.pop('expand', None)
+        super().__init__(*args, **kwargs)
+
+    def _is_root(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def get_requested_fields(self):
+        if self._requested_fields is not None:
+            return set(self._requested_fields)
+        if self._is_root():
+            return get_query_list(self.context.get('request'), 'fields')
+        return set()
+
+    def get_requested_expand(self):
+        if self._requested_expand is not None:
+            return set(self._requested_expand)
+        if self._is_root():
+            return get_query_list(self.context.get('request'), 'expand')
+        return set()
+
+    def get_fields(self):
+        fields = super().get_fields()
+
+        expand = self.get_requested_expand()
+        for name in getattr(self.Meta, 'expandable_fields', ()):
+            if name not in expand:
+                fields.pop(name, None)
+
+        requested = self.get_requested_fields()
+        if requested:
+            for name in set(fields) - requested - expand:
+                fields.pop(name)
+
+        return fields
+
+    def to_representation(self, instance):
+        with metrics.timer('serialize'):
+            return super().to_representation(instance)
@@ -1,4 +1,4 @@
-from decouple import config
+from decouple import Csv, config
 import os
 from pathlib import Path
 from datetime import timedelta
@@ -30,9 +30,18 @@ INSTALLED_APPS = [
     'users',
     'posts',
     'follows',
+    'search',
+    'realtime',
+    'jobs',
+    'notifications',
+    'images',
+    'social_api',
 ]
 
 MIDDLEWARE = [
+    # Primeiro da lista, para medir a requisição inteira
+    'social_api.middleware.RequestMetricsMiddleware',
+    'social_api.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -62,34 +71,121 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'social_api.wsgi.application'
+ASGI_APPLICATION = 'social_api.asgi.application'
+
+# Views de leitura assíncronas (ORM async). O asgi.py liga por padrão;
+# no WSGI continuam síncronas, já que lá cada view async custaria um event loop
+ASYNC_READ_VIEWS = config('ASYNC_READ_VIEWS', default=False, cast=bool)
 
 # Database
 ON_HEROKU = os.environ.get('DATABASE_URL')
 
-if ON_HEROKU:
-    DATABASES = {
-        'default': dj_database_url.config(
-            default=os.environ.get('DATABASE_URL'),
-            conn_max_age=600,
-            conn_health_checks=True
-        )
+# No Postgres (psycopg 3) cada processo mantém um pool de até DATABASE_POOL_SIZE
+# conexões, que voltam para ele no fim de cada requisição, inclusive nas threads
+# por requisição do ASGI (o Procfile). O padrão cabe nas 20 conexões dos planos
+# menores do Heroku Postgres com 2 processos web e o worker. Com 0 a conexão
+# fica aberta por DATABASE_CONN_MAX_AGE segundos; no modo async isso não se
+# aproveita (cada requisição roda em uma thread nova), então lá cada uma abre e
+# fecha a sua
+DATABASE_POOL_SIZE = config('DATABASE_POOL_SIZE', default=8, cast=int)
+DATABASE_POOL_MIN_SIZE = config('DATABASE_POOL_MIN_SIZE', default=2, cast=int)
+# Segundos esperando uma conexão livre antes de falhar
+DATABASE_POOL_TIMEOUT = config('DATABASE_POOL_TIMEOUT', default=10, cast=int)
+DATABASE_CONN_MAX_AGE = 0 if ASYNC_READ_VIEWS else config('DATABASE_CONN_MAX_AGE', default=600, cast=int)
+
+
+def database(url):
+    """Configuração de um banco a partir da URL, com pool ou conexão persistente."""
+    database_settings = dj_database_url.parse(url, conn_max_age=DATABASE_CONN_MAX_AGE, conn_health_checks=True)
+    options = database_settings.setdefault('OPTIONS', {})
+    if database_settings['ENGINE'] == 'django.db.backends.sqlite3':
+        # O lock de escrita é pego no BEGIN: em WAL, uma transação que lê e depois
+        # escreve falharia com "database is locked" sem esperar o busy_timeout
+        options['transaction_mode'] = 'IMMEDIATE'
+    elif DATABASE_POOL_SIZE:
+        # O pool substitui as conexões persistentes (o Django exige CONN_MAX_AGE=0)
+        database_settings['CONN_MAX_AGE'] = 0
+        options['pool'] = {
+            'min_size': min(DATABASE_POOL_MIN_SIZE, DATABASE_POOL_SIZE),
+            'max_size': DATABASE_POOL_SIZE,
+            'timeout': DATABASE_POOL_TIMEOUT,
+        }
+    return database_settings
+
+
+DATABASES = {
+    'default': database(ON_HEROKU or f'sqlite:///{BASE_DIR / "db.sqlite3"}'),
+}
+
+# PRAGMAs de cada conexão SQLite (ver social_api/db.py). WAL deixa as leituras
+# rodarem junto com uma escrita; synchronous=NORMAL é seguro com WAL
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': config('SQLITE_BUSY_TIMEOUT_MS', default=5000, cast=int),
+    'mmap_size': config('SQLITE_MMAP_SIZE', default=256 * 1024 * 1024, cast=int),
+    'cache_size': -20000,  # em KiB
+    'temp_store': 'MEMORY',
+}
+
+# Réplicas de leitura (URLs separadas por vírgula, ex.: postgres://... ou
+# sqlite:////caminho/replica.sqlite3). GETs leem delas e o resto vai para o
+# primário (ver social_api/db_router.py); sem réplicas tudo fica no `default`.
+# Nos testes cada réplica aponta para o banco de teste do `default` (MIRROR)
+DATABASE_REPLICAS = []
+for index, url in enumerate(config('DATABASE_REPLICA_URLS', default='', cast=Csv())):
+    alias = f'replica_{index}'
+    DATABASES[alias] = database(url)
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['social_api.db_router.ReplicaRouter'] if DATABASE_REPLICAS else []
+
+# Segundos em que quem acabou de escrever continua lendo do primário
+DATABASE_STICKY_SECONDS = config('DATABASE_STICKY_SECONDS', default=5, cast=int)
+
+# A versão do cache muda no commit do primário, antes de a réplica alcançá-lo:
+# o que foi lido de uma réplica fica no cache, e vale na ETag, no máximo esse tempo
+DATABASE_REPLICA_CACHE_SECONDS = config('DATABASE_REPLICA_CACHE_SECONDS', default=30, cast=int)
+
+# Cache
+# Com REDIS_URL definido usa Redis (compartilhado entre workers); senão, memória local
+REDIS_URL = config('REDIS_URL', default='')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
     }
 else:
-    DATABASES = {
+    CACHES = {
         'default': {
-            'ENGINE': 'django.db.backends.sqlite3',
-            'NAME': BASE_DIR / 'db.sqlite3',
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'social-api',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
         }
     }
 
+# Tempo de vida (segundos) dos dados cacheados; versões não expiram
+CACHE_TTL = config('CACHE_TTL', default=300, cast=int)
+
 # JWT Settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWT sem consulta ao usuário por requisição (ver users/authentication.py)
+        'users.authentication.StatelessJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'social_api.renderers.TimedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PAGINATION_CLASS': 'social_api.pagination.KeysetPagination',
+    'PAGE_SIZE': 20,
 }
 
 SIMPLE_JWT = {
@@ -103,6 +199,145 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# JWT sem consulta ao usuário por requisição (ver users/authentication.py). A
+# revogação de contas desativadas fica no cache, então só vale com um cache
+# compartilhado entre os workers; sem Redis, o padrão volta a consultar o banco
+AUTH_STATELESS_JWT = config('AUTH_STATELESS_JWT', default=bool(REDIS_URL), cast=bool)
+
+# Usuários do JWT carregados sob demanda ficam em um LRU por processo
+AUTH_USER_CACHE_SIZE = config('AUTH_USER_CACHE_SIZE', default=1024, cast=int)
+AUTH_USER_CACHE_TTL = config('AUTH_USER_CACHE_TTL', default=30, cast=int)
+
+# Timeline (fan-out on write)
+# Autores com mais seguidores que o limite são lidos sob demanda (fan-out on read)
+TIMELINE_CELEBRITY_THRESHOLD = config('TIMELINE_CELEBRITY_THRESHOLD', default=10000, cast=int)
+# Quantidade de posts copiados para a timeline ao seguir um novo usuário
+TIMELINE_BACKFILL_LIMIT = config('TIMELINE_BACKFILL_LIMIT', default=200, cast=int)
+
+# Sugestões de quem seguir (pré-calculadas por `compute_suggestions`)
+SUGGESTIONS_SIZE = config('SUGGESTIONS_SIZE', default=20, cast=int)
+# Tempo no cache da lista de usuários populares usada para quem ainda não tem sugestões
+SUGGESTIONS_POPULAR_TTL = config('SUGGESTIONS_POPULAR_TTL', default=600, cast=int)
+
+# Busca textual
+SEARCH_DEFAULT_LIMIT = config('SEARCH_DEFAULT_LIMIT', default=20, cast=int)
+SEARCH_MAX_LIMIT = config('SEARCH_MAX_LIMIT', default=50, cast=int)
+# Relevância calculada só entre os casamentos mais recentes (termos comuns casam com muitos posts)
+SEARCH_CANDIDATES = config('SEARCH_CANDIDATES', default=1000, cast=int)
+
+# Feed
+# Quantidade de comentários recentes embutidos em cada post do feed
+FEED_RECENT_COMMENTS = config('FEED_RECENT_COMMENTS', default=3, cast=int)
+
+# Polling incremental do feed (`/api/posts/delta/`)
+# Cursores mais antigos pedem para recarregar o feed; é também o tempo que os tombstones ficam guardados
+DELTA_MAX_AGE_SECONDS = config('DELTA_MAX_AGE_SECONDS', default=3600, cast=int)
+# Acima disso a resposta pede para recarregar o feed em vez de mandar as mudanças
+DELTA_MAX_POSTS = config('DELTA_MAX_POSTS', default=50, cast=int)
+DELTA_MAX_CHANGES = config('DELTA_MAX_CHANGES', default=200, cast=int)
+# Margem do cursor para escritas commitadas logo depois da leitura e para o atraso do fan-out nos jobs
+DELTA_OVERLAP_SECONDS = config('DELTA_OVERLAP_SECONDS', default=5, cast=int)
+
+# Push em tempo real (SSE em `/api/realtime/stream/`)
+# LocalBroker só entrega no próprio processo; com vários workers use o Redis
+REALTIME_BROKER = config(
+    'REALTIME_BROKER',
+    default='realtime.broker.RedisBroker' if REDIS_URL else 'realtime.broker.LocalBroker',
+)
+# Eventos pendentes por conexão; um cliente que fica para trás recebe `reset`
+REALTIME_QUEUE_SIZE = config('REALTIME_QUEUE_SIZE', default=100, cast=int)
+# Conexões abertas por processo; acima disso a conexão recebe 503
+REALTIME_MAX_CONNECTIONS = config('REALTIME_MAX_CONNECTIONS', default=5000, cast=int)
+REALTIME_HEARTBEAT_SECONDS = config('REALTIME_HEARTBEAT_SECONDS', default=25, cast=int)
+# Autores seguidos assinados por conexão
+REALTIME_MAX_FOLLOWED = config('REALTIME_MAX_FOLLOWED', default=5000, cast=int)
+
+# Fila de jobs em segundo plano (worker: `python manage.py run_jobs`)
+# Com DEBUG as tarefas rodam na hora, sem worker; JOBS_ALWAYS_EAGER=False para testar a fila
+JOBS_ALWAYS_EAGER = config('JOBS_ALWAYS_EAGER', default=DEBUG, cast=bool)
+JOBS_MAX_ATTEMPTS = config('JOBS_MAX_ATTEMPTS', default=5, cast=int)
+# Espera antes da 1ª retentativa; dobra a cada nova falha
+JOBS_RETRY_DELAY_SECONDS = config('JOBS_RETRY_DELAY_SECONDS', default=10, cast=int)
+JOBS_POLL_SECONDS = config('JOBS_POLL_SECONDS', default=1.0, cast=float)
+# Jobs executando há mais que isso são de um worker que morreu e voltam para a fila
+JOBS_LOCK_TIMEOUT_SECONDS = config('JOBS_LOCK_TIMEOUT_SECONDS', default=300, cast=int)
+# Jobs concluídos (e suas chaves de idempotência) guardados até o `prune_jobs`
+JOBS_KEEP_DONE_SECONDS = config('JOBS_KEEP_DONE_SECONDS', default=86400, cast=int)
+
+# Notificações (agrupadas por post e tipo enquanto não lidas)
+# Autores guardados por notificação ("Ana, Bruno e mais 40 pessoas")
+NOTIFICATIONS_ACTORS = config('NOTIFICATIONS_ACTORS', default=3, cast=int)
+# Notificações lidas há mais tempo que isso saem no `prune_notifications`
+NOTIFICATIONS_KEEP_DAYS = config('NOTIFICATIONS_KEEP_DAYS', default=90, cast=int)
+
+# Imagens enviadas (variantes geradas pelo worker, ver images/pipeline.py)
+IMAGES_MAX_UPLOAD_BYTES = config('IMAGES_MAX_UPLOAD_BYTES', default=10 * 1024 * 1024, cast=int)
+# Acima disso a decodificação sozinha já pesa na memória (bomba de descompressão)
+IMAGES_MAX_PIXELS = config('IMAGES_MAX_PIXELS', default=40_000_000, cast=int)
+# Larguras das variantes dos posts e lados dos avatares (quadrados); nunca amplia o original
+IMAGES_POST_WIDTHS = config('IMAGES_POST_WIDTHS', default='320,640,1080', cast=Csv(int))
+IMAGES_AVATAR_SIZES = config('IMAGES_AVATAR_SIZES', default='48,96,192', cast=Csv(int))
+# Formato -> qualidade de cada variante; o primeiro é o preferido no `srcset`
+IMAGES_FORMATS = {
+    'avif': config('IMAGES_AVIF_QUALITY', default=55, cast=int),
+    'webp': config('IMAGES_WEBP_QUALITY', default=80, cast=int),
+}
+# Processos que codificam as variantes em paralelo; 0 codifica no próprio processo
+IMAGES_PROCESSES = config('IMAGES_PROCESSES', default=os.cpu_count() or 1, cast=int)
+
+# Trending: likes e comentários com decaimento exponencial (meia-vida em horas)
+TRENDING_HALF_LIFE_HOURS = config('TRENDING_HALF_LIFE_HOURS', default=6.0, cast=float)
+TRENDING_LIKE_WEIGHT = config('TRENDING_LIKE_WEIGHT', default=1.0, cast=float)
+TRENDING_COMMENT_WEIGHT = config('TRENDING_COMMENT_WEIGHT', default=3.0, cast=float)
+# Interações mais antigas que a janela não contam (e posts sem nada recente saem da tabela)
+TRENDING_WINDOW_HOURS = config('TRENDING_WINDOW_HOURS', default=72.0, cast=float)
+# Tamanho da lista pré-calculada e por quanto tempo ela fica no cache
+TRENDING_SIZE = config('TRENDING_SIZE', default=50, cast=int)
+TRENDING_CACHE_TTL = config('TRENDING_CACHE_TTL', default=60, cast=int)
+
+# Entra em todas as ETags: mude ao alterar o formato das respostas para invalidar as dos clientes
+ETAG_VERSION = config('ETAG_VERSION', default='1')
+
+# Máximo de itens por requisição nos endpoints em lote (follows/likes)
+BULK_MAX_ITEMS = config('BULK_MAX_ITEMS', default=200, cast=int)
+
+# Listas inteiras com `?stream=1` (ver social_api/streaming.py): itens
+# serializados e enviados por vez e limite de itens por resposta
+STREAM_CHUNK_SIZE = config('STREAM_CHUNK_SIZE', default=500, cast=int)
+STREAM_MAX_ITEMS = config('STREAM_MAX_ITEMS', default=100_000, cast=int)
+
+# Logging
+# `social_api.requests` recebe uma linha JSON por requisição (ver middleware.py)
+LOG_LEVEL = config('LOG_LEVEL', default='INFO')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'plain': {'format': '%(message)s'},
+        'verbose': {'format': '%(asctime)s %(levelname)s %(name)s %(message)s'},
+    },
+    'handlers': {
+        'requests': {'class': 'logging.StreamHandler', 'formatter': 'plain'},
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'verbose'},
+    },
+    'loggers': {
+        'social_api.requests': {
+            'handlers': ['requests'],
+            'level': config('REQUEST_LOG_LEVEL', default=LOG_LEVEL),
+            'propagate': False,
+        },
+        'social_api': {'handlers': ['console'], 'level': LOG_LEVEL},
+        'posts': {'handlers': ['console'], 'level': LOG_LEVEL},
+        'users': {'handlers': ['console'], 'level': LOG_LEVEL},
+        'follows': {'handlers': ['console'], 'level': LOG_LEVEL},
+        'realtime': {'handlers': ['console'], 'level': LOG_LEVEL},
+        'notifications': {'handlers': ['console'], 'level': LOG_LEVEL},
+        # Uma linha JSON por lote executado pelo worker
+        'jobs': {'handlers': ['requests'], 'level': LOG_LEVEL, 'propagate': False},
+    },
+}
+
 # CORS Settings
 if DEBUG:
     CORS_ALLOW_ALL_ORIGINS = True
@@ -164,6 +399,20 @@ STATIC_URL = 'static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
+# Uploads (imagens enviadas e suas variantes). O disco local serve para
+# desenvolvimento e testes; no Heroku o disco é efêmero, então aponte
+# MEDIA_STORAGE_BACKEND para um backend remoto (ex.: S3 do django-storages)
+MEDIA_URL = config('MEDIA_URL', default='/media/')
+MEDIA_ROOT = config('MEDIA_ROOT', default=os.path.join(BASE_DIR, 'media'))
+STORAGES = {
+    'default': {
+        'BACKEND': config('MEDIA_STORAGE_BACKEND', default='django.core.files.storage.FileSystemStorage'),
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -175,4 +424,4 @@ if not DEBUG:
     CSRF_COOKIE_SECURE = True
     SECURE_BROWSER_XSS_FILTER = True
     SECURE_CONTENT_TYPE_NOSNIFF = True
-    X_FRAME_OPTIONS = 'DENY'
\ No newline at end of file
+    X_FRAME_OPTIONS = 'DENY'
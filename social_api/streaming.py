@@ -0,0 +1,105 @@
+"""
+Listas inteiras em streaming (`?stream=1`).
+
+As listas paginadas devolvem no máximo `max_page_size` itens por requisição.
+Para baixar uma lista inteira (os seguidores de uma conta popular, o feed
+completo) sem montá-la na memória, `?stream=1` responde com um
+StreamingHttpResponse no mesmo formato de uma página, `{"next": null,
+"results": [...]}`: o queryset é percorrido com `.iterator(chunk_size=...)`
+(cursor do lado do servidor no PostgreSQL) e cada bloco de STREAM_CHUNK_SIZE
+itens é serializado, codificado e enviado antes do próximo. Na memória fica
+só o bloco atual, não a lista de objetos, os dicts e os bytes da resposta
+inteira.
+
+O status 200 sai antes do primeiro item: um erro no meio corta a resposta,
+que fica sem o `]}` final (JSON inválido) em vez de parecer uma lista menor.
+Não há ETag (ela cobriria só a primeira página), e as queries feitas depois
+que a view retorna não entram nas métricas da requisição.
+"""
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+
+STREAM_PARAM = 'stream'
+
+OPEN = b'{"next":null,"results":['
+CLOSE = b']}'
+
+
+def requested(request):
+    """Se a requisição pediu a lista inteira em streaming."""
+    return request.query_params.get(STREAM_PARAM) in ('1', 'true')
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class StreamingListMixin:
+    """
+    `?stream=1` para ListAPIView (antes do AsyncListMixin nas bases): a lista
+    inteira na ordem da paginação, até STREAM_MAX_ITEMS itens. Com o
+    `aget` das views assíncronas o streaming também é assíncrono, sem que o
+    servidor ASGI precise juntar a resposta.
+    """
+    renderer = JSONRenderer()
+
+    def list(self, request, *args, **kwargs):
+        if not requested(request):
+            return super().list(request, *args, **kwargs)
+        return self.streaming_response(self.stream(self.get_stream_queryset()))
+
+    async def alist(self, request, *args, **kwargs):
+        if not requested(request):
+            return await super().alist(request, *args, **kwargs)
+        queryset = await sync_to_async(self.get_stream_queryset)()
+        return self.streaming_response(self.astream(queryset))
+
+    def get_stream_queryset(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.paginator is not None:
+            queryset = queryset.order_by(*self.paginator.get_ordering(self))
+        return queryset[:settings.STREAM_MAX_ITEMS]
+
+    def streaming_response(self, content):
+        return StreamingHttpResponse(content, content_type='application/json')
+
+    def encode(self, objects):
+        """Itens de um bloco já codificados e separados por vírgula, sem os colchetes."""
+        serializer = self.get_serializer(objects, many=True)
+        # `to_representation` e não `.data`, que guardaria os dicts no serializer
+        rendered = self.renderer.render(serializer.to_representation(objects))[1:-1]
+        # O serializer e seus campos formam ciclos (`parent`) que ainda apontam
+        # para o bloco; sem esvaziá-lo, os objetos dos blocos já enviados só
+        # seriam liberados na próxima coleta completa do gc
+        objects.clear()
+        return rendered
+
+    def stream(self, queryset):
+        size = settings.STREAM_CHUNK_SIZE
+        yield OPEN
+        separator = b''
+        for chunk in chunked(queryset.iterator(chunk_size=size), size):
+            yield separator + self.encode(chunk)
+            separator = b','
+        yield CLOSE
+
+    async def astream(self, queryset):
+        size = settings.STREAM_CHUNK_SIZE
+        yield OPEN
+        separator = b''
+        chunk = []
+        async for obj in queryset.aiterator(chunk_size=size):
+            chunk.append(obj)
+            if len(chunk) == size:
+                yield separator + await sync_to_async(self.encode)(chunk)
+                separator = b','
+                chunk = []
+        if chunk:
+            yield separator + await sync_to_async(self.encode)(chunk)
+        yield CLOSE
@@ -5,6 +5,8 @@ from django.conf.urls.static import static
 from django.http import JsonResponse
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
+from .views import cache_stats_view, metrics_view
+
 
 def api_root(request):
     """View de boas-vindas da API"""
@@ -27,12 +29,29 @@ def api_root(request):
                 'unlike': '/api/posts/{id}/unlike/',
                 'comment': '/api/posts/{id}/comment/',
                 'comments': '/api/posts/{id}/comments/',
+                'likes': '/api/posts/{id}/likes/',
+                'likes_bulk': '/api/posts/likes/bulk/',
+                'trending': '/api/posts/trending/',
+                'delta': '/api/posts/delta/?since={cursor}',
             },
             'follows': {
                 'follow': '/api/follows/users/{id}/follow/',
                 'unfollow': '/api/follows/users/{id}/unfollow/',
                 'following': '/api/follows/following/',
                 'followers': '/api/follows/followers/',
+                'bulk': '/api/follows/bulk/',
+                'suggestions': '/api/follows/suggestions/',
+            },
+            'search': '/api/search/?q={texto}',
+            'realtime': '/api/realtime/stream/',
+            'notifications': {
+                'list': '/api/notifications/',
+                'unread_count': '/api/notifications/unread-count/',
+                'read': '/api/notifications/read/',
+            },
+            'images': {
+                'upload': '/api/images/',
+                'detail': '/api/images/{id}/',
             },
             'admin': '/admin/',
         },
@@ -55,6 +74,14 @@ urlpatterns = [
     # App endpoints
     path('api/posts/', include('posts.urls')),
     path('api/follows/', include('follows.urls')),
+    path('api/search/', include('search.urls')),
+    path('api/realtime/', include('realtime.urls')),
+    path('api/notifications/', include('notifications.urls')),
+    path('api/images/', include('images.urls')),
+
+    # Observabilidade
+    path('api/cache/stats/', cache_stats_view, name='cache-stats'),
+    path('api/metrics/', metrics_view, name='metrics'),
 ]
 
 # Serve media files in development
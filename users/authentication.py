@@ -0,0 +1,166 @@
+"""
+Autenticação JWT sem consulta ao banco por requisição.
+
+O `JWTAuthentication` do simplejwt busca o usuário no banco a cada
+requisição, mas a maior parte das views (feed, likes, follows) só usa o id.
+Aqui `request.user` é um `User` montado só com o id do token; os demais
+campos ficam adiados e o primeiro acesso a qualquer um deles carrega todos de
+uma vez (ver `User.refresh_from_db`), passando antes por um LRU em memória
+com TTL curto.
+
+Usuários desativados ou removidos entram em uma marca no cache compartilhado
+(ver `signals.py`), checada a cada requisição no lugar da consulta ao banco.
+Com um cache por processo (LocMemCache, sem REDIS_URL) a marca não chegaria
+aos outros workers: sem AUTH_STATELESS_JWT cada requisição busca o usuário no
+banco, como o JWTAuthentication.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from social_api import metrics
+
+User = get_user_model()
+
+
+def revoked_key(user_id):
+    return f'user-revoked:{user_id}'
+
+
+def revoke(user_id):
+    """Recusa os tokens do usuário até expirarem (conta desativada ou removida)."""
+    forget(user_id)
+    timeout = int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds())
+    cache.set(revoked_key(user_id), True, timeout=timeout)
+
+
+def unrevoke(user_id):
+    cache.delete(revoked_key(user_id))
+
+
+class RecentUsers:
+    """LRU por processo com os campos dos usuários carregados recentemente."""
+
+    def __init__(self, size, ttl):
+        self.size = size
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get(self, user_id):
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None:
+                return None
+            expires, values = entry
+            if expires < time.monotonic():
+                del self.entries[user_id]
+                return None
+            self.entries.move_to_end(user_id)
+            return values
+
+    def set(self, user_id, values):
+        with self.lock:
+            self.entries[user_id] = (time.monotonic() + self.ttl, values)
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def discard(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+
+recent_users = RecentUsers(settings.AUTH_USER_CACHE_SIZE, settings.AUTH_USER_CACHE_TTL)
+
+
+def forget(user_id):
+    """Tira o usuário do LRU deste processo (os demais expiram pelo TTL)."""
+    recent_users.discard(user_id)
+
+
+def count_load(source):
+    metrics.registry.increment(
+        'auth_user_loads_total',
+        "Usuários vindos do JWT (source=token) e carregamentos adiados (lru/db); "
+        "queries poupadas = token - db",
+        source=source,
+    )
+
+
+def load_user_fields(user):
+    """
+    Preenche todos os campos adiados de um usuário vindo do token, do LRU ou
+    com uma única query. Chamado por `User.refresh_from_db`.
+    """
+    values = recent_users.get(user.pk)
+    if values is None:
+        attnames = [field.attname for field in User._meta.concrete_fields]
+        values = User.objects.filter(pk=user.pk).values(*attnames).first()
+        if values is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        recent_users.set(user.pk, values)
+        count_load('db')
+    else:
+        count_load('lru')
+
+    deferred = user.get_deferred_fields()
+    for attname, value in values.items():
+        if attname in deferred:
+            setattr(user, attname, value)
+
+    if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+        raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication que devolve um usuário só com o id, carregado sob demanda."""
+
+    def get_user(self, validated_token):
+        if not settings.AUTH_STATELESS_JWT:
+            # Uma query por requisição, mas `is_active` sempre em dia
+            return super().get_user(validated_token)
+
+        try:
+            user_id = User._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, ValidationError) as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        if cache.get(revoked_key(user_id)):
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        # Instância com todos os campos adiados, exceto o id
+        user = User.from_db(router.db_for_read(User), [User._meta.pk.attname], [user_id])
+        user.deferred_loader = load_user_fields
+        count_load('token')
+        return user
+
+
+def raw_token(request):
+    """Token do header Authorization ou de `?access_token=` (EventSource não envia headers)."""
+    authentication = StatelessJWTAuthentication()
+    header = authentication.get_header(request)
+    token = authentication.get_raw_token(header) if header else None
+    return token or request.GET.get('access_token', '').encode('utf-8') or None
+
+
+def token_user_id(request):
+    """Id do usuário do token da requisição, sem ir ao banco nem ao cache; None sem token válido."""
+    token = raw_token(request)
+    if token is None:
+        return None
+    try:
+        validated = StatelessJWTAuthentication().get_validated_token(token)
+        return User._meta.pk.to_python(validated[api_settings.USER_ID_CLAIM])
+    except (InvalidToken, TokenError, KeyError, ValidationError):
+        return None
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.8 on 2026-10-17 19:56
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_counters(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    Follow = apps.get_model('follows', 'Follow')
+
+    def count_of(field):
+        return Coalesce(Subquery(
+            Follow.objects.filter(**{field: OuterRef('pk')}).order_by().values(field)
+            .annotate(total=Count('id')).values('total')
+        ), 0)
+
+    User.objects.update(followers_count=count_of('followed'), following_count=count_of('follower'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_alter_user_profile_picture'),
+        ('follows', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='followers_count',
+            field=models.IntegerField(default=0, help_text='Contador desnormalizado de seguidores.'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='following_count',
+            field=models.IntegerField(default=0, help_text='Contador desnormalizado de usuários seguidos.'),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
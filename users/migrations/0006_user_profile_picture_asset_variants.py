@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-17 21:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('images', '0001_initial'),
+        ('users', '0005_user_lower_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='profile_picture_asset',
+            field=models.ForeignKey(blank=True, help_text='Foto de perfil enviada por /api/images/.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='images.imageasset'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='profile_picture_variants',
+            field=models.JSONField(blank=True, help_text='Cópia das variantes da foto de perfil (srcset por formato).', null=True),
+        ),
+    ]
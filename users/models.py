@@ -1,5 +1,44 @@
 from django.db import models
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager as DjangoUserManager
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+
+class UserManager(DjangoUserManager):
+    """
+    Buscas case-insensitive por username/email que usam os índices em
+    LOWER(username) e LOWER(email), ao contrário de `__iexact`.
+    """
+
+    def with_lower(self):
+        return self.alias(username_lower=Lower('username'), email_lower=Lower('email'))
+
+    def username_taken(self, username):
+        return self.with_lower().filter(username_lower=username.lower()).exists()
+
+    def email_taken(self, email):
+        return self.with_lower().filter(email_lower=email.lower()).exists()
+
+    def get_by_login(self, identifier):
+        """
+        Usuário do login por username ou email em uma única query. Se o valor
+        casar com mais de um usuário, o username exato tem prioridade, depois
+        o username sem diferenciar maiúsculas e por fim o email.
+        """
+        value = identifier.strip().lower()
+        candidates = list(self.with_lower().filter(
+            Q(username_lower=value) | Q(email_lower=value)
+        ).order_by()[:3])
+
+        def priority(user):
+            if user.username == identifier:
+                return 0
+            if user.username.lower() == value:
+                return 1
+            return 2
+
+        return min(candidates, key=priority, default=None)
+
 
 class User(AbstractUser):
     profile_picture = models.URLField(
@@ -8,12 +47,33 @@ class User(AbstractUser):
         null=True,
         help_text="URL da foto de perfil do usuário no Cloudinary."
     )
+    profile_picture_asset = models.ForeignKey(
+        'images.ImageAsset',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        help_text="Foto de perfil enviada por /api/images/."
+    )
+    profile_picture_variants = models.JSONField(
+        null=True,
+        blank=True,
+        help_text="Cópia das variantes da foto de perfil (srcset por formato)."
+    )
     bio = models.TextField(
         blank=True,
         null=True,
         max_length=500,
         help_text="Breve descrição sobre o usuário."
     )
+    followers_count = models.IntegerField(
+        default=0,
+        help_text="Contador desnormalizado de seguidores."
+    )
+    following_count = models.IntegerField(
+        default=0,
+        help_text="Contador desnormalizado de usuários seguidos."
+    )
 
     groups = models.ManyToManyField(
         'auth.Group',
@@ -33,6 +93,22 @@ class User(AbstractUser):
     def __str__(self):
         return f"{self.username} ({self.email})"
 
+    objects = UserManager()
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        """
+        Usuários montados a partir do JWT (ver authentication.py) chegam só com
+        o id: o primeiro campo adiado acessado carrega todos de uma vez.
+        """
+        loader = getattr(self, 'deferred_loader', None)
+        if loader is not None and fields is not None:
+            self.deferred_loader = None
+            loader(self)
+            fields = [name for name in fields if name in self.get_deferred_fields()]
+            if not fields:
+                return
+        super().refresh_from_db(using, fields, from_queryset)
+
     def get_full_name(self):
         """Retorna o nome completo, se disponível."""
         full_name = super().get_full_name()
@@ -42,4 +118,10 @@ class User(AbstractUser):
         verbose_name = "Usuário"
         verbose_name_plural = "Usuários"
         ordering = ['username']
-        db_table = 'custom_user'
\ No newline at end of file
+        db_table = 'custom_user'
+        indexes = [
+            models.Index(fields=['-date_joined', '-id'], name='user_joined_idx'),
+            # Login e cadastro comparam username/email sem diferenciar maiúsculas
+            models.Index(Lower('username'), name='user_username_lower_idx'),
+            models.Index(Lower('email'), name='user_email_lower_idx'),
+        ]
\ No newline at end of file
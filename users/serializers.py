@@ -2,15 +2,22 @@
 from django.db import transaction
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 
+from images.models import ImageAsset
+from images.serializers import ImageAssetField, attach_variants, resolve_image
+from social_api import cache
+from social_api.serializers import DynamicFieldsMixin
+
 User = get_user_model()
 
 
-class UserSerializer(serializers.ModelSerializer):
-    followers_count = serializers.SerializerMethodField(read_only=True)
-    following_count = serializers.SerializerMethodField(read_only=True)
+class UserSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    followers_count = serializers.IntegerField(read_only=True)
+    following_count = serializers.IntegerField(read_only=True)
 
     profile_picture = serializers.CharField(
         required=False,
@@ -18,6 +25,11 @@ class UserSerializer(serializers.ModelSerializer):
         allow_null=True,
         max_length=500
     )
+    # Foto enviada por /api/images/ (kind=avatar); `profile_picture` passa a ser a URL do original
+    profile_picture_id = ImageAssetField(
+        kind=ImageAsset.AVATAR, source="profile_picture_asset", write_only=True
+    )
+    profile_picture_variants = serializers.JSONField(read_only=True)
 
     class Meta:
         model = User
@@ -28,6 +40,8 @@ class UserSerializer(serializers.ModelSerializer):
             "first_name",
             "last_name",
             "profile_picture",
+            "profile_picture_id",
+            "profile_picture_variants",
             "bio",
             "followers_count",
             "following_count",
@@ -42,15 +56,14 @@ class UserSerializer(serializers.ModelSerializer):
             "profile_picture": {"required": False},
         }
 
-    def get_followers_count(self, obj):
-        followers = getattr(obj, "followers", None)
-        return followers.count() if followers is not None else 0
-
-    def get_following_count(self, obj):
-        following = getattr(obj, "following", None)
-        return following.count() if following is not None else 0
+    def validate(self, attrs):
+        return resolve_image(
+            attrs, self.instance, "profile_picture", "profile_picture_asset", "profile_picture_variants"
+        )
 
+    @transaction.atomic
     def update(self, instance, validated_data):
+        attach_variants(validated_data, "profile_picture_asset", "profile_picture_variants")
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
 
@@ -58,13 +71,80 @@ class UserSerializer(serializers.ModelSerializer):
         return instance
 
 
+def user_card_key(pk, version):
+    return f'user-card:{pk}:{version}'
+
+
+def get_user_cards(users):
+    """
+    Representações do UserSerializer de vários usuários, lidas do cache
+    versionado (`user-card:<id>:<versão>`). Retorna {id: dados}.
+    """
+    users = {user.pk: user for user in users}
+    if not users:
+        return {}
+
+    versions = cache.get_versions('user', users)
+    keys = {user_card_key(pk, versions[pk]): pk for pk in users}
+
+    def serialize(missing):
+        return {key: UserSerializer(users[keys[key]]).data for key in missing}
+
+    found = cache.get_many_or_set('user_card', list(keys), serialize)
+    return {pk: found[key] for key, pk in keys.items()}
+
+
+def get_user_cards_by_id(user_ids):
+    """
+    Como get_user_cards, a partir dos ids: só consulta o banco pelos cards
+    que não estão no cache. Usuários que não existem mais ficam de fora.
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return {}
+
+    versions = cache.get_versions('user', user_ids)
+    keys = {user_card_key(pk, versions[pk]): pk for pk in user_ids}
+
+    def serialize(missing):
+        users = User.objects.in_bulk([keys[key] for key in missing])
+        return {key: UserSerializer(users[keys[key]]).data for key in missing if keys[key] in users}
+
+    found = cache.get_many_or_set('user_card', list(keys), serialize)
+    return {pk: found[key] for key, pk in keys.items() if key in found}
+
+
+def get_user_card(user_id):
+    """Card de um usuário pelo id; só consulta o banco se não estiver no cache."""
+    key = user_card_key(user_id, cache.get_version('user', user_id))
+    return cache.get_or_set(
+        'user_card', key, lambda: UserSerializer(User.objects.get(pk=user_id)).data
+    )
+
+
+class UserCardField(serializers.Field):
+    """
+    Usuário aninhado (mesmo formato do UserSerializer) servido do cache.
+    Uma lista pode pré-carregar os cards em `context['user_cards']`.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, user):
+        cards = self.context.get('user_cards') or {}
+        if user.pk not in cards:
+            cards = get_user_cards([user])
+        return cards[user.pk]
+
+
 class RegisterSerializer(serializers.ModelSerializer):
     email = serializers.EmailField(required=True)
     password = serializers.CharField(
         write_only=True,
         required=True,
         style={"input_type": "password"},
-        validators=[validate_password],
         help_text=_("Senha deve ter no mínimo 8 caracteres e obedecer as regras de segurança"),
     )
     password2 = serializers.CharField(
@@ -80,33 +160,42 @@ class RegisterSerializer(serializers.ModelSerializer):
         extra_kwargs = {
             "first_name": {"required": False},
             "last_name": {"required": False},
+            # A unicidade (sem diferenciar maiúsculas) é checada em validate_username
+            "username": {"validators": [UnicodeUsernameValidator()]},
         }
 
     def validate_email(self, value):
         """Normaliza e valida se o email já está em uso (case-insensitive)."""
         email = value.strip().lower()
-        if User.objects.filter(email__iexact=email).exists():
+        if User.objects.email_taken(email):
             raise serializers.ValidationError(_("Este email já está cadastrado."))
         return email
 
     def validate_username(self, value):
         """Normaliza e valida se o username já está em uso (case-insensitive)."""
         username = value.strip()
-        if User.objects.filter(username__iexact=username).exists():
+        if User.objects.username_taken(username):
             raise serializers.ValidationError(_("Este username já está em uso."))
         return username
 
     def validate(self, attrs):
-        """Valida se as senhas coincidem."""
+        """Valida se as senhas coincidem e a força da senha (uma vez só)."""
         if attrs.get("password") != attrs.get("password2"):
             raise serializers.ValidationError(
                 {"password": _("As senhas não coincidem.")}
                 )
 
-        password = attrs.get("password")
+        # Com o usuário em mãos o validador de similaridade compara a senha
+        # com username, email e nome
+        candidate = User(
+            username=attrs.get("username", ""),
+            email=attrs.get("email", ""),
+            first_name=attrs.get("first_name", ""),
+            last_name=attrs.get("last_name", ""),
+        )
         try:
-            validate_password(password)
-        except Exception as e:
+            validate_password(attrs.get("password"), user=candidate)
+        except DjangoValidationError as e:
             raise serializers.ValidationError({"password": list(e.messages)})
 
         return attrs
@@ -0,0 +1,30 @@
+"""Invalidação do card do usuário em cache quando o perfil muda."""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from social_api import cache
+from . import authentication
+
+User = get_user_model()
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user(sender, instance, **kwargs):
+    cache.bump_on_commit('user', instance.pk)
+
+
+@receiver(post_save, sender=User)
+def sync_token_user(sender, instance, **kwargs):
+    """Mantém o LRU e a marca de revogação da autenticação JWT em dia."""
+    authentication.forget(instance.pk)
+    if 'is_active' not in instance.get_deferred_fields():
+        if instance.is_active:
+            authentication.unrevoke(instance.pk)
+        else:
+            authentication.revoke(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def revoke_deleted_user(sender, instance, **kwargs):
+    authentication.revoke(instance.pk)
@@ -0,0 +1,18 @@
+"""Tarefas em segundo plano dos usuários (ver jobs/queue.py)."""
+from django.contrib.auth import get_user_model
+
+from jobs.queue import task
+from .serializers import get_user_cards
+
+User = get_user_model()
+
+
+@task(batch_size=100)
+def warm_user_cards(items):
+    """
+    Regrava no cache os cards de usuários cuja versão mudou, para o próximo
+    feed com posts deles não pagar a serialização. Em lote: uma query para
+    todos os usuários pedidos desde a última execução.
+    """
+    user_ids = {item['user_id'] for item in items}
+    get_user_cards(User.objects.filter(pk__in=user_ids))
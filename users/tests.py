@@ -1,3 +1,136 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from social_api import cache as versioned_cache
+from users.models import User
+
+
+def api_client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class QueryCountTest(TestCase):
+    """
+    Lista de usuários e perfil rodam o mesmo número de queries com 2 e com
+    15 usuários (cache frio nas duas medições).
+    """
+    sizes = (2, 15)
+
+    def setUp(self):
+        cache.clear()
+        self.viewer = User.objects.create(username='leitor', email='leitor@example.com')
+        self.client = api_client(self.viewer)
+        self.items = 0
+
+    def grow(self, size):
+        """Cada item é um usuário seguido pelo leitor, que também o segue."""
+        while self.items < size:
+            user = User.objects.create(username=f'usuario{self.items}', email=f'usuario{self.items}@example.com')
+            self.client.post(f'/api/follows/users/{user.pk}/follow/')
+            api_client(user).post(f'/api/follows/users/{self.viewer.pk}/follow/')
+            self.items += 1
+
+    def assertConstantQueries(self, path, num, listing=True):
+        for size in self.sizes:
+            self.grow(size)
+            cache.clear()
+            with self.subTest(items=size):
+                with self.assertNumQueries(num):
+                    response = self.client.get(path)
+                self.assertEqual(response.status_code, 200)
+                if listing:
+                    self.assertEqual(len(response.json()['results']), size)
+
+    def test_user_list(self):
+        self.assertConstantQueries('/api/auth/list/', 1)
+
+    def test_profile(self):
+        self.assertConstantQueries('/api/auth/profile/', 0, listing=False)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class TokenAuthenticationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='leitor', email='leitor@example.com')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def deactivate_elsewhere(self):
+        """Desativa a conta como outro worker faria: a marca no cache deste processo não existe."""
+        self.user.is_active = False
+        self.user.save()
+        cache.clear()
+
+    @override_settings(AUTH_STATELESS_JWT=False)
+    def test_database_lookup_without_shared_cache(self):
+        self.assertEqual(self.client.get('/api/auth/list/').status_code, 200)
+        self.deactivate_elsewhere()
+        self.assertEqual(self.client.get('/api/auth/list/').status_code, 401)
+
+    @override_settings(AUTH_STATELESS_JWT=True)
+    def test_stateless_with_shared_cache(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get('/api/auth/list/').status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/auth/list/').status_code, 401)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class LoginTest(TestCase):
+    def test_inactive_user_gets_invalid_credentials(self):
+        User.objects.create_user(username='inativo', email='inativo@example.com', password='senha', is_active=False)
+        client = APIClient()
+        inactive = client.post('/api/auth/login/', {'username': 'inativo', 'password': 'senha'}, format='json')
+        wrong = client.post('/api/auth/login/', {'username': 'inativo', 'password': 'errada'}, format='json')
+        self.assertEqual(inactive.status_code, 401)
+        self.assertEqual(inactive.json(), wrong.json())
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ProfileConditionalGetTest(TestCase):
+    def test_not_modified_without_queries(self):
+        cache.clear()
+        user = User.objects.create(username='leitor', email='leitor@example.com')
+        client = api_client(user)
+        etag = client.get('/api/auth/profile/')['ETag']
+        with self.assertNumQueries(0):
+            response = client.get('/api/auth/profile/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            client.patch('/api/auth/profile/', {'bio': 'Nova bio'}, format='json')
+        response = client.get('/api/auth/profile/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['bio'], 'Nova bio')
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class UserCardCacheTest(TestCase):
+    """Editar o perfil troca a versão do usuário e o card em cache é refeito"""
+
+    def cards(self, reader):
+        return {card['id']: card for card in api_client(reader).get('/api/auth/list/').json()['results']}
+
+    def test_profile_edit_refreshes_card(self):
+        cache.clear()
+        user = User.objects.create(username='leitor', email='leitor@example.com')
+        reader = User.objects.create(username='outro', email='outro@example.com')
+        self.assertEqual(self.cards(reader)[user.pk]['last_name'], '')
+        version = versioned_cache.get_version('user', user.pk)
+
+        # Sem o commit a versão não muda: leituras concorrentes não gravam dados não commitados
+        with self.captureOnCommitCallbacks() as callbacks:
+            api_client(user).patch('/api/auth/profile/', {'last_name': 'Souza'}, format='json')
+        self.assertEqual(versioned_cache.get_version('user', user.pk), version)
+
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(versioned_cache.get_version('user', user.pk), version)
+        self.assertEqual(self.cards(reader)[user.pk]['last_name'], 'Souza')
@@ -1,6 +1,7 @@
-import traceback
-from django.contrib.auth import get_user_model, authenticate
-from rest_framework import generics, status
+import logging
+
+from django.contrib.auth import get_user_model
+from rest_framework import generics, serializers, status
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
@@ -8,11 +9,14 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.views import APIView
 from rest_framework.parsers import JSONParser
 
-from follows import serializers
-
-from .serializers import RegisterSerializer, UserSerializer
+from jobs.queue import enqueue
+from social_api import cache, conditional
+from social_api.conditional import conditional_get
+from . import tasks
+from .serializers import RegisterSerializer, UserSerializer, get_user_cards
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
 
 class RegisterView(generics.CreateAPIView):
@@ -24,7 +28,7 @@ class RegisterView(generics.CreateAPIView):
 
     def create(self, request, *args, **kwargs):
         try:
-            print(f"Dados recebidos para registro: {request.data}")
+            logger.debug("Registro recebido para o username %r", request.data.get('username'))
 
             serializer = self.get_serializer(data=request.data)
             serializer.is_valid(raise_exception=True)
@@ -40,12 +44,11 @@ class RegisterView(generics.CreateAPIView):
             }, status=status.HTTP_201_CREATED)
 
         except serializers.ValidationError as e:
-            print(f"Erro de validação no registro: {e.detail}")
+            logger.info("Erro de validação no registro: %s", e.detail)
             return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
 
-        except Exception as e:
-            print(f"Erro no registro: {str(e)}")
-            traceback.print_exc()
+        except Exception:
+            logger.exception("Erro no registro")
 
             return Response(
                 {'error': 'Erro ao criar usuário. Tente novamente.'},
@@ -66,27 +69,23 @@ def login_view(request):
             status=status.HTTP_400_BAD_REQUEST
         )
 
-    # Tenta autenticar por username
-    user = authenticate(username=username_or_email, password=password)
-
-    # Se falhar, tenta por email
-    if user is None:
-        try:
-            user_obj = User.objects.get(email__iexact=username_or_email)
-            user = authenticate(username=user_obj.username, password=password)
-        except User.DoesNotExist:
-            pass
+    # Resolve o usuário por username ou email em uma query e confere a senha
+    # uma única vez (check_password é a parte cara do login)
+    user = User.objects.get_by_login(username_or_email)
 
     if user is None:
+        # Gasta o mesmo tempo de um hash para não revelar quais contas existem
+        User().set_password(password)
         return Response(
             {'error': 'Credenciais inválidas'},
             status=status.HTTP_401_UNAUTHORIZED
         )
 
-    if not user.is_active:
+    # Conta desativada responde como senha errada, sem revelar que existe
+    if not user.check_password(password) or not user.is_active:
         return Response(
-            {'error': 'Esta conta está desativada'},
-            status=status.HTTP_403_FORBIDDEN
+            {'error': 'Credenciais inválidas'},
+            status=status.HTTP_401_UNAUTHORIZED
         )
 
     refresh = RefreshToken.for_user(user)
@@ -103,15 +102,25 @@ class ProfileUpdateView(APIView):
     permission_classes = [IsAuthenticated]
     parser_classes = [JSONParser]
 
+    def get_etag(self, request):
+        # Perfil e contadores de follows invalidam a versão do usuário
+        user_id = request.user.pk
+        return conditional.make_etag(
+            'profile', user_id, cache.get_version('user', user_id), conditional.query_parts(request)
+        )
+
+    @conditional_get
     def get(self, request):
-        serializer = UserSerializer(request.user)
-        return Response(serializer.data)
+        if 'fields' in request.query_params:
+            serializer = UserSerializer(request.user, context={'request': request})
+            return Response(serializer.data)
+        return Response(get_user_cards([request.user])[request.user.pk])
 
     def patch(self, request):
         try:
             user = request.user
 
-            print(f"Request data: {request.data}")
+            logger.debug("Atualização de perfil do usuário %s: campos %s", user.pk, sorted(request.data))
 
             serializer = UserSerializer(
                 user,
@@ -122,20 +131,20 @@ class ProfileUpdateView(APIView):
 
             if serializer.is_valid():
                 updated_user = serializer.save()
-                print(f"Perfil atualizado com sucesso")
-                print(f"Profile picture URL: {updated_user.profile_picture}")
+                logger.info("Perfil do usuário %s atualizado", updated_user.pk)
+                # O card em cache foi invalidado; o worker o regrava antes das próximas leituras do feed
+                enqueue(tasks.warm_user_cards, user_id=updated_user.pk)
 
                 return Response({
                     'user': UserSerializer(updated_user).data,
                     'message': 'Perfil atualizado com sucesso!'
                 })
 
-            print(f"Serializer errors: {serializer.errors}")
+            logger.info("Perfil do usuário %s inválido: %s", user.pk, serializer.errors)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         except Exception as e:
-            print(f"Erro ao atualizar perfil: {str(e)}")
-            traceback.print_exc()
+            logger.exception("Erro ao atualizar perfil do usuário %s", request.user.pk)
 
             return Response(
                 {'error': f'Erro ao atualizar perfil: {str(e)}'},
@@ -150,6 +159,9 @@ class UserListView(generics.ListAPIView):
     """Lista todos os usuários (exceto o usuário atual)"""
     permission_classes = [IsAuthenticated]
     serializer_class = UserSerializer
+    keyset_ordering = ('-date_joined', '-id')
 
     def get_queryset(self):
-        return User.objects.exclude(id=self.request.user.id).filter(is_active=True)
\ No newline at end of file
+        return User.objects.exclude(id=self.request.user.id).filter(
+            is_active=True
+        ).order_by('-date_joined', '-id')
\ No newline at end of file